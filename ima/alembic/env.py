@@ -1,7 +1,33 @@
+"""
+Alembic environment for IMA service.
+
+Without ``-x`` options the shared schema is migrated as usual. Tenant
+schemas (``app.db.tenancy``) are migrated with:
+
+    alembic -x tenants=all upgrade head
+    alembic -x tenants=acme,globex -x concurrency=16 -x batch_size=100 upgrade head
+
+``tenants=all`` migrates every existing schema starting with
+``TENANT_SCHEMA_PREFIX``; listed tenants get their schema created first.
+Schemas are split into batches of ``batch_size``
+(``TENANT_MIGRATION_BATCH_SIZE``) and up to ``concurrency``
+(``TENANT_MIGRATION_CONCURRENCY``) batches run at once, each in its own
+``alembic`` process (Alembic's context is process-global) with the same
+command line plus ``-x tenant_batch=...``. A batch migrates its schemas
+one after another on a single connection, each in its own transaction
+with its own ``alembic_version`` table and ``search_path`` set to that
+schema alone, so a failing schema does not stop the others; failures
+are listed at the end. Tenant migrations therefore cannot see (nor
+touch) objects in the shared schema.
+"""
+
 import asyncio
+import logging
+import subprocess
 import sys
 from logging.config import fileConfig
 from pathlib import Path
+from typing import Dict, List, Sequence
 
 from sqlalchemy import engine_from_config, pool
 from sqlalchemy.ext.asyncio import AsyncEngine
@@ -12,20 +38,38 @@ from alembic import context
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(BASE_DIR))
 
-import app.db.users.models  # import all models to register with metadata
+import app.db.events.models  # import all models to register with metadata
+import app.db.users.models
 from app.core.config import settings  # for .env database URI
+
 # Now you can import app modules
 from app.db.base import Base
+from app.db.tenancy import fetch_tenant_schemas, schema_for, search_path
 
 # --- Alembic config ---
 config = context.config
 fileConfig(config.config_file_name)
+logger = logging.getLogger("alembic.env")
 
 # Override DB URL from .env
 config.set_main_option("sqlalchemy.url", settings.database.uri)
 
 target_metadata = Base.metadata
 
+# -x options that select a tenant fan-out (not passed on to batches)
+FANOUT_OPTIONS = ("tenants", "concurrency", "batch_size")
+
+
+def _engine() -> AsyncEngine:
+    return AsyncEngine(
+        engine_from_config(
+            config.get_section(config.config_ini_section),
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
+            future=True,
+        )
+    )
+
 
 # --- Offline migrations ---
 def run_migrations_offline():
@@ -49,14 +93,7 @@ def do_run_migrations(connection):
 
 
 async def run_migrations_online():
-    connectable = AsyncEngine(
-        engine_from_config(
-            config.get_section(config.config_ini_section),
-            prefix="sqlalchemy.",
-            poolclass=pool.NullPool,
-            future=True,
-        )
-    )
+    connectable = _engine()
 
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
@@ -64,8 +101,119 @@ async def run_migrations_online():
     await connectable.dispose()
 
 
+# --- Tenant schemas: one batch ---
+def do_run_tenant_migrations(connection, schemas: Sequence[str]) -> List[str]:
+    """Migrate ``schemas`` in turn; return the ones that failed."""
+    failed = []
+    for schema in schemas:
+        try:
+            # Session-level, committed before Alembic opens its transaction.
+            # The tenant schema alone: with the shared schema on the path an
+            # unqualified DROP of an object missing from the tenant would
+            # resolve to (and drop) the shared one.
+            connection.exec_driver_sql(
+                f"CREATE SCHEMA IF NOT EXISTS {search_path(schema)}"
+            )
+            connection.exec_driver_sql(f"SET search_path TO {search_path(schema)}")
+            connection.commit()
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                version_table_schema=schema,
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+            connection.commit()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Migrating schema %s failed", schema)
+            connection.rollback()
+            failed.append(schema)
+    return failed
+
+
+async def run_tenant_batch(schemas: Sequence[str]) -> None:
+    connectable = _engine()
+    try:
+        async with connectable.connect() as connection:
+            failed = await connection.run_sync(do_run_tenant_migrations, schemas)
+    finally:
+        await connectable.dispose()
+    if failed:
+        raise SystemExit(f"{len(failed)} schema(s) failed: {','.join(failed)}")
+    logger.info("Migrated %d schema(s)", len(schemas))
+
+
+# --- Tenant schemas: fan-out ---
+async def _tenant_schemas(tenants: str) -> List[str]:
+    prefix = settings.tenancy.schema_prefix
+    if tenants != "all":
+        return [schema_for(tenant, prefix) for tenant in tenants.split(",")]
+    connectable = _engine()
+    try:
+        return sorted(await fetch_tenant_schemas(connectable, prefix))
+    finally:
+        await connectable.dispose()
+
+
+def _batch_argv(batch: Sequence[str]) -> List[str]:
+    """This command line with the fan-out options swapped for one batch."""
+    argv, args = sys.argv[1:], []
+    i = 0
+    while i < len(argv):
+        if argv[i] == "-x" and argv[i + 1].split("=")[0] in FANOUT_OPTIONS:
+            i += 2
+            continue
+        args.append(argv[i])
+        i += 1
+    batch_opt = f"tenant_batch={','.join(batch)}"
+    return [sys.executable, "-m", "alembic", "-x", batch_opt, *args]
+
+
+async def _run_batch(batch: Sequence[str], slots: asyncio.Semaphore) -> bool:
+    async with slots:
+        proc = await asyncio.create_subprocess_exec(
+            *_batch_argv(batch),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        output, _ = await proc.communicate()
+    if proc.returncode:
+        logger.error("Batch %s..%s failed:\n%s", batch[0], batch[-1], output.decode())
+        return False
+    logger.info("Batch %s..%s migrated (%d schemas)", batch[0], batch[-1], len(batch))
+    return True
+
+
+async def run_tenant_fanout(x_args: Dict[str, str]) -> None:
+    cfg = settings.tenancy
+    concurrency = int(x_args.get("concurrency", cfg.migration_concurrency))
+    batch_size = int(x_args.get("batch_size", cfg.migration_batch_size))
+    schemas = await _tenant_schemas(x_args["tenants"])
+    batches = [schemas[i : i + batch_size] for i in range(0, len(schemas), batch_size)]
+    logger.info(
+        "Migrating %d tenant schema(s) in %d batch(es), %d at a time",
+        len(schemas),
+        len(batches),
+        concurrency,
+    )
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    results = await asyncio.gather(*(_run_batch(batch, slots) for batch in batches))
+    failed = results.count(False)
+    if failed:
+        raise SystemExit(f"{failed} of {len(batches)} tenant batch(es) failed")
+
+
 # --- Run migrations ---
-if context.is_offline_mode():
+x_args = context.get_x_argument(as_dictionary=True)
+tenant_mode = "tenants" in x_args or "tenant_batch" in x_args
+
+if tenant_mode and context.is_offline_mode():
+    raise SystemExit("Tenant migrations need a database connection (no --sql)")
+if "tenant_batch" in x_args:
+    asyncio.run(run_tenant_batch(x_args["tenant_batch"].split(",")))
+elif "tenants" in x_args:
+    asyncio.run(run_tenant_fanout(x_args))
+elif context.is_offline_mode():
     run_migrations_offline()
 else:
     asyncio.run(run_migrations_online())
@@ -0,0 +1,34 @@
+"""drop duplicate unique constraint on users.uid
+
+The primary key already enforces uniqueness of ``uid``; the extra
+``users_uid_key`` constraint only adds a second B-tree to maintain on
+every insert.
+
+Revision ID: 0fd356698a27
+Revises: dbbae723b981
+Create Date: 2025-09-20 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0fd356698a27"
+down_revision: Union[str, Sequence[str], None] = "dbbae723b981"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dropping a constraint needs a brief exclusive lock: give up rather than
+    # queue behind long transactions and block traffic on a live table
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("ALTER TABLE users DROP CONSTRAINT IF EXISTS users_uid_key")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_unique_constraint("users_uid_key", "users", ["uid"])
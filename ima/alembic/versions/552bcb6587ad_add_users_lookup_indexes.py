@@ -0,0 +1,89 @@
+"""add indexes for user lookups and keyset listing
+
+All indexes are built with CREATE INDEX CONCURRENTLY so the migration can
+run against a live table. CONCURRENTLY cannot run inside a transaction,
+hence the autocommit block. A failed concurrent build leaves an INVALID
+index behind, so an index that ``pg_index.indisvalid`` reports as invalid
+is dropped (concurrently) before it is rebuilt, which makes a re-run
+after a failure safe. A valid index is left in place.
+
+The ``lower(email)`` unique index fails to build if two existing emails
+differ only by case; resolve those rows first.
+
+Revision ID: 552bcb6587ad
+Revises: 0fd356698a27
+Create Date: 2025-09-20 10:14:05.902117
+
+"""
+
+from typing import Sequence, Set, Union
+
+import sqlalchemy as sa
+
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = "552bcb6587ad"
+down_revision: Union[str, Sequence[str], None] = "0fd356698a27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (columns, create_index kwargs)
+INDEXES = {
+    "ux_users_email_lower": ([sa.text("lower(email)")], {"unique": True}),
+    "ix_users_username": (["username"], {}),
+    "ix_users_created_at_uid": (["created_at", "uid"], {}),
+    "ix_users_active_created_at_uid": (
+        ["created_at", "uid"],
+        {"postgresql_where": sa.text("is_active")},
+    ),
+}
+
+
+INVALID_INDEXES = sa.text("""
+    SELECT c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema()
+      AND c.relname IN :names
+      AND NOT i.indisvalid
+    """).bindparams(sa.bindparam("names", expanding=True))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # Offline (--sql) there is no catalog to ask: nothing is dropped
+        invalid: Set[str] = set()
+        if not context.is_offline_mode():
+            bind = op.get_bind()
+            invalid = set(bind.scalars(INVALID_INDEXES, {"names": list(INDEXES)}))
+        for name, (columns, kwargs) in INDEXES.items():
+            if name in invalid:
+                op.drop_index(
+                    name,
+                    table_name="users",
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+            op.create_index(
+                name,
+                "users",
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in reversed(list(INDEXES)):
+            op.drop_index(
+                name,
+                table_name="users",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,58 @@
+"""create auth_events table
+
+Event log written by the auth event consumer (app.services.event_consumer).
+
+Revision ID: 7c4e2a91d0b3
+Revises: 552bcb6587ad
+Create Date: 2025-10-04 09:12:44.381205
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c4e2a91d0b3"
+down_revision: Union[str, Sequence[str], None] = "552bcb6587ad"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "auth_events",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("actor", sa.UUID(), nullable=True),
+        sa.Column("tenant", sa.String(), nullable=True),
+        sa.Column("data", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "recorded_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_auth_events_occurred_at", "auth_events", ["occurred_at"], unique=False
+    )
+    op.create_index(
+        "ix_auth_events_actor_occurred_at",
+        "auth_events",
+        ["actor", "occurred_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_auth_events_actor_occurred_at", table_name="auth_events")
+    op.drop_index("ix_auth_events_occurred_at", table_name="auth_events")
+    op.drop_table("auth_events")
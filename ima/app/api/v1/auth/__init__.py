@@ -0,0 +1,10 @@
+"""
+File: app/api/v1/auth/__init__.py
+Package entrypoint for the authentication API.
+
+Provides signup, login (access token issuing) and current-user endpoints.
+"""
+
+from .router import router
+
+__all__ = ["router"]
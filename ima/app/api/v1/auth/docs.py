@@ -0,0 +1,49 @@
+"""
+File : app / api / v1 / auth / docs.py
+OpenAPI documentation metadata for authentication endpoints.
+"""
+
+SIGNUP_DOCS = {
+    "summary": "Sign Up",
+    "description": (
+        "Create a user account. Returns 409 when the email is already "
+        "registered and 503 when the password hashing pool is saturated."
+    ),
+}
+
+LOGIN_DOCS = {
+    "summary": "Log In",
+    "description": (
+        "Verify email and password and issue a bearer access token. "
+        "When sessions are enabled, also starts a login session and returns "
+        "its refresh token (valid SESSION_TTL seconds). "
+        "Rate limited per client (RATE_LIMIT_COUNT per RATE_LIMIT_WINDOW)."
+    ),
+}
+
+REFRESH_DOCS = {
+    "summary": "Refresh Tokens",
+    "description": (
+        "Exchange a refresh token for a new access token and a new refresh "
+        "token; the old refresh token stops working. Reusing an old refresh "
+        "token ends the session. Returns 401 for an invalid token."
+    ),
+}
+
+LOGOUT_DOCS = {
+    "summary": "Log Out",
+    "description": "End the login session of a refresh token.",
+}
+
+LOGOUT_ALL_DOCS = {
+    "summary": "Log Out Everywhere",
+    "description": (
+        "End every login session of the bearer: their refresh tokens and "
+        "the access tokens issued for them stop working."
+    ),
+}
+
+ME_DOCS = {
+    "summary": "Current User",
+    "description": "Return the user identified by the bearer token.",
+}
@@ -0,0 +1,217 @@
+"""
+Authentication endpoints for the API.
+
+Defines signup, login, token refresh, logout and current-user routes.
+Password hashing runs in the bounded password pool; login is rate limited
+per client. Login starts a session in Redis (``app.services.sessions``)
+whose refresh token is rotated on every refresh. Signups and login
+attempts are recorded as auth events (``app.services.events``), buffered
+in process and published off the request path.
+Responses are standardized using success_response / error_response.
+"""
+
+import uuid
+from typing import Any, Dict, Optional
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.rate_limit import client_identity, rate_limit
+from app.core.response import error_response, success_response
+from app.db.session import get_db
+from app.db.users import crud
+from app.db.users.schemas import UserCreate
+from app.services import events
+from app.services.auth import authenticate_user
+from app.services.email_filter import email_filter
+from app.services.events import event_publisher
+from app.services.passwords import PasswordHasherOverloaded, password_service
+from app.services.permissions import Action, require_permission
+from app.services.sessions import Session, session_store
+from app.services.tokens import (
+    Claims,
+    TokenIssuer,
+    get_token_claims,
+    token_issuer,
+)
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .docs import (
+    LOGIN_DOCS,
+    LOGOUT_ALL_DOCS,
+    LOGOUT_DOCS,
+    ME_DOCS,
+    REFRESH_DOCS,
+    SIGNUP_DOCS,
+)
+from .schemas import LoginRequest, RefreshRequest, SignupRequest
+
+# --- APIRouter setup ---
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+def _overloaded() -> JSONResponse:
+    return error_response(
+        "Server busy, retry shortly", code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+def _unavailable(what: str) -> JSONResponse:
+    return error_response(
+        f"{what} is not available", code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+def _token_data(
+    issuer: TokenIssuer,
+    uid: str,
+    role: str,
+    session: Optional[Session],
+    refresh_token: Optional[str],
+) -> Dict[str, Any]:
+    """Login/refresh response body; the access token is bound to the session."""
+    claims: Dict[str, Any] = {"role": role}
+    if session is not None:
+        claims.update(sid=session.sid, gen=session.generation)
+    data: Dict[str, Any] = {
+        "access_token": issuer.issue(uid, **claims),
+        "token_type": "bearer",
+        "expires_in": issuer.ttl,
+    }
+    if refresh_token is not None:
+        data["refresh_token"] = refresh_token
+        data["refresh_expires_in"] = session_store.ttl
+    return data
+
+
+@router.post("/signup", **SIGNUP_DOCS)
+async def signup(
+    body: SignupRequest, db: AsyncSession = Depends(get_db)
+) -> JSONResponse:
+    """Create a user account."""
+    try:
+        hashed_password = await password_service.hash(body.password)
+    except PasswordHasherOverloaded:
+        return _overloaded()
+
+    user = await crud.create_user(
+        db,
+        UserCreate(
+            username=body.username,
+            email=body.email,
+            hashed_password=hashed_password,
+            first_name=body.first_name,
+            last_name=body.last_name,
+        ),
+    )
+    if user is None:
+        return error_response("Email already registered", code=status.HTTP_409_CONFLICT)
+    await email_filter.add(user.email)
+    await crud.commit(db)
+    event_publisher.publish(events.USER_CREATED, actor=str(user.uid))
+    return success_response(
+        data={"uid": str(user.uid), "username": user.username, "email": user.email},
+        message="User created",
+        code=status.HTTP_201_CREATED,
+    )
+
+
+@router.post("/login", dependencies=[Depends(rate_limit("login"))], **LOGIN_DOCS)
+async def login(
+    body: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)
+) -> JSONResponse:
+    """Verify credentials and issue an access token."""
+    if token_issuer is None:
+        return _unavailable("Token issuing")
+    try:
+        credentials = await authenticate_user(db, str(body.email), body.password)
+    except PasswordHasherOverloaded:
+        return _overloaded()
+    ip = client_identity(request.client)
+    if credentials is None:
+        event_publisher.publish(
+            events.LOGIN_FAILED, email=str(body.email).lower(), ip=ip
+        )
+        return error_response(
+            "Invalid email or password", code=status.HTTP_401_UNAUTHORIZED
+        )
+    uid = str(credentials.uid)
+    session, refresh_token = None, None
+    if settings.sessions.enabled:
+        try:
+            session, refresh_token = await session_store.create(uid)
+        except redis.RedisError:
+            return _unavailable("Session store")
+    event_publisher.publish(events.LOGIN_SUCCEEDED, actor=uid, ip=ip)
+
+    return success_response(
+        data=_token_data(
+            token_issuer, uid, credentials.role.value, session, refresh_token
+        ),
+        message="Logged in",
+    )
+
+
+@router.post("/refresh", **REFRESH_DOCS)
+async def refresh(
+    body: RefreshRequest, db: AsyncSession = Depends(get_db)
+) -> JSONResponse:
+    """Rotate a refresh token and issue a new access token."""
+    if token_issuer is None or not settings.sessions.enabled:
+        return _unavailable("Token refresh")
+    try:
+        rotated = await session_store.rotate(body.refresh_token)
+    except redis.RedisError:
+        return _unavailable("Session store")
+    if rotated is None:
+        return error_response(
+            "Invalid refresh token", code=status.HTTP_401_UNAUTHORIZED
+        )
+    session, refresh_token = rotated
+
+    # Deactivation revokes sessions too; this also picks up role changes
+    user = await crud.get_user_by_uid_cached(db, uuid.UUID(session.uid))
+    if user is None or not user.is_active:
+        await session_store.revoke(refresh_token)
+        return error_response(
+            "Invalid refresh token", code=status.HTTP_401_UNAUTHORIZED
+        )
+    return success_response(
+        data=_token_data(
+            token_issuer, session.uid, user.role.value, session, refresh_token
+        ),
+        message="Tokens refreshed",
+    )
+
+
+@router.post("/logout", **LOGOUT_DOCS)
+async def logout(body: RefreshRequest) -> JSONResponse:
+    """End the session of a refresh token."""
+    try:
+        await session_store.revoke(body.refresh_token)
+    except redis.RedisError:
+        return _unavailable("Session store")
+    return success_response(message="Logged out")
+
+
+@router.post("/logout-all", **LOGOUT_ALL_DOCS)
+async def logout_all(claims: Claims = Depends(get_token_claims)) -> JSONResponse:
+    """End every session of the bearer."""
+    try:
+        await session_store.revoke_all([claims["sub"]])
+    except redis.RedisError:
+        return _unavailable("Session store")
+    return success_response(message="Logged out everywhere")
+
+
+@router.get("/me", **ME_DOCS)
+async def me(
+    claims: Claims = Depends(require_permission(Action.READ, "users")),
+    db: AsyncSession = Depends(get_db),
+) -> JSONResponse:
+    """Return the authenticated user."""
+    user = await crud.get_user_by_uid_cached(db, uuid.UUID(claims["sub"]))
+    if user is None:
+        return error_response("User not found", code=status.HTTP_404_NOT_FOUND)
+    return success_response(data=user.model_dump(mode="json"), message="Current user")
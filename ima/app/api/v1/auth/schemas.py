@@ -0,0 +1,31 @@
+"""
+# File: app/api/v1/auth/schemas.py
+Request schemas for the authentication API.
+"""
+
+from typing import Optional
+
+from pydantic import BaseModel, EmailStr, Field
+
+
+class SignupRequest(BaseModel):
+    """Body of POST /auth/signup."""
+
+    username: str = Field(..., min_length=1, max_length=64)
+    email: EmailStr
+    password: str = Field(..., min_length=8, max_length=128)
+    first_name: Optional[str] = Field(default=None, max_length=64)
+    last_name: Optional[str] = Field(default=None, max_length=64)
+
+
+class LoginRequest(BaseModel):
+    """Body of POST /auth/login."""
+
+    email: EmailStr
+    password: str = Field(..., min_length=1, max_length=128)
+
+
+class RefreshRequest(BaseModel):
+    """Body of POST /auth/refresh and POST /auth/logout."""
+
+    refresh_token: str = Field(..., min_length=1, max_length=160)
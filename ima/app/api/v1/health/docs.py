@@ -22,3 +22,11 @@ FULL_HEALTH_DOCS = {
     "summary": "Full System Health Check",
     "description": "Run combined health checks for server, database, and Redis.",
 }
+
+READINESS_DOCS = {
+    "summary": "Readiness Check",
+    "description": (
+        "503 until startup warm-up (pooled database and Redis connections, "
+        "statement caches) has finished, then 200."
+    ),
+}
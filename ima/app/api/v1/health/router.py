@@ -1,35 +1,45 @@
 """
 Health endpoints for the API.
 
-Defines routes for server, database, and Redis health checks.
-Responses are standardized using HealthCheckResponse and success_response.
+Defines routes for server, database, and Redis health checks, and the
+readiness probe that gates traffic on startup warm-up.
+Responses are standardized using HealthCheckResponse and success_response,
+encoded through the EnvelopeResponse fast path (no re-validation).
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-import redis.asyncio as redis  # needed for RedisError
+from app.core.config import settings
 from app.core.redis_cache import redis_client
-from app.core.response import success_response
+from app.core.response import envelope_route, error_response, success_response
+from app.db import session as db_session
 from app.db.session import get_db
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .docs import (
     DATABASE_HEALTH_DOCS,
     FULL_HEALTH_DOCS,
+    READINESS_DOCS,
     REDIS_HEALTH_DOCS,
     SERVER_HEALTH_DOCS,
 )
 from .schemas import HealthCheckResponse
+from .utils import SingleFlightCache, run_checks
 from .utils import check_health as _check_health
 
 # --- APIRouter setup ---
 router = APIRouter(prefix="/health", tags=["health"])
 
+# Full-check results shared by every probe for HEALTH_CHECK_CACHE_TTL seconds
+full_health_cache: SingleFlightCache[Dict[str, Tuple[str, float]]] = SingleFlightCache(
+    ttl=settings.health.cache_ttl
+)
+
 
-@router.get("/server", response_model=HealthCheckResponse, **SERVER_HEALTH_DOCS)
+@router.get("/server", **envelope_route(HealthCheckResponse), **SERVER_HEALTH_DOCS)
 async def server_health() -> Dict[str, Any]:
     """Liveness check for the API server."""
 
@@ -39,7 +49,25 @@ async def server_health() -> Dict[str, Any]:
     return await _check_health("Server", server_check, details_key="server")
 
 
-@router.get("/database", response_model=HealthCheckResponse, **DATABASE_HEALTH_DOCS)
+@router.get("/ready", **envelope_route(HealthCheckResponse), **READINESS_DOCS)
+async def readiness(request: Request) -> JSONResponse:
+    """Readiness probe: OK once the lifespan's warm-up has finished."""
+    # Absent when the app runs without its lifespan
+    resources = getattr(request.app.state, "resources", None)
+    if resources is None or not resources.ready:
+        return error_response(
+            "Service is warming up",
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            details={"status": "fail", "details": {"warmup": "pending"}},
+        )
+    return success_response(
+        data={"status": "ok", "details": {"warmup": "done"}},
+        message="Service is ready",
+        details={"warmup": resources.warmup_report},
+    )
+
+
+@router.get("/database", **envelope_route(HealthCheckResponse), **DATABASE_HEALTH_DOCS)
 async def database_health(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """Check database connectivity."""
 
@@ -50,7 +78,7 @@ async def database_health(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     return await _check_health("Database", db_check, details_key="database")
 
 
-@router.get("/redis", response_model=HealthCheckResponse, **REDIS_HEALTH_DOCS)
+@router.get("/redis", **envelope_route(HealthCheckResponse), **REDIS_HEALTH_DOCS)
 async def redis_health() -> Dict[str, Any]:
     """Check Redis connectivity."""
 
@@ -61,31 +89,46 @@ async def redis_health() -> Dict[str, Any]:
     return await _check_health("Redis", redis_check, details_key="redis")
 
 
-@router.get("/", response_model=HealthCheckResponse, **FULL_HEALTH_DOCS)
-async def full_health(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+async def _db_ping() -> bool:
+    # Session factory looked up at call time so tests can patch it
+    async with db_session.get_sessionmaker()() as session:
+        await session.execute(text("SELECT 1"))
+    return True
+
+
+async def _redis_ping() -> bool:
+    return bool(await redis_client.ping())
+
+
+async def _run_full_checks() -> Dict[str, Tuple[str, float]]:
+    return await run_checks(
+        {"database": _db_ping, "redis": _redis_ping},
+        timeout=settings.health.check_timeout,
+        deadline=settings.health.deadline,
+    )
+
+
+@router.get("/", **envelope_route(HealthCheckResponse), **FULL_HEALTH_DOCS)
+async def full_health() -> JSONResponse:
     """
     Combined system health check for server, database, and Redis.
     Returns a standardized HealthCheckResponse.
-    """
-    results: Dict[str, str] = {"server": "ok"}
 
-    # Database check
-    try:
-        await db.execute(text("SELECT 1"))
-        results["database"] = "ok"
-    except SQLAlchemyError:
-        results["database"] = "fail"
-
-    # Redis check
-    try:
-        pong = await redis_client.ping()
-        results["redis"] = "ok" if pong else "fail"
-    except redis.RedisError:
-        results["redis"] = "fail"
+    Dependency checks run concurrently under a per-check timeout and an
+    overall deadline; results are cached briefly and shared by concurrent
+    probes. Per-check latency is reported in ``details``.
+    """
+    checks, cached = await full_health_cache.get(_run_full_checks)
 
+    results: Dict[str, str] = {"server": "ok"}
+    results.update({name: status_val for name, (status_val, _) in checks.items()})
     overall_status = "ok" if all(val == "ok" for val in results.values()) else "fail"
 
     return success_response(
         data={"status": overall_status, "details": results},
         message="Full system health check completed",
+        details={
+            "latency_ms": {name: latency for name, (_, latency) in checks.items()},
+            "cached": cached,
+        },
     )
@@ -5,12 +5,20 @@ Health check utilities for FastAPI services.
 Provides a standardized async helper for performing health checks on
 dependencies (database, cache, external APIs). Responses use the project's
 core ResponseModel to ensure consistent JSON structure across APIs.
+
+Also provides concurrent, deadline-bounded execution of several checks and
+a short-TTL single-flight cache so that bursts of probes share one round
+trip per dependency.
 """
 
-from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
 
 from fastapi import status
 
+T = TypeVar("T")
+
 
 async def check_health(
     service_name: str,
@@ -49,3 +57,83 @@ async def check_health(
             "data": None,
             "details": {"error": str(exc), "details": details},
         }
+
+
+async def _timed_check(
+    check_fn: Callable[[], Awaitable[bool]], timeout: float
+) -> Tuple[str, float]:
+    """Run one check with its own timeout; return (status, latency_ms)."""
+    start = time.perf_counter()
+    try:
+        healthy = await asyncio.wait_for(check_fn(), timeout)
+        status_val = "ok" if healthy else "fail"
+    except Exception:  # pylint: disable=broad-except
+        status_val = "fail"
+    return status_val, round((time.perf_counter() - start) * 1000, 3)
+
+
+async def run_checks(
+    checks: Dict[str, Callable[[], Awaitable[bool]]],
+    timeout: float,
+    deadline: float,
+) -> Dict[str, Tuple[str, float]]:
+    """
+    Run health checks concurrently.
+
+    Each check is bounded by ``timeout`` and the whole batch by ``deadline``;
+    checks still pending at the deadline are cancelled and reported as
+    "fail" with the deadline as their latency.
+    """
+    tasks = {
+        name: asyncio.ensure_future(_timed_check(check_fn, timeout))
+        for name, check_fn in checks.items()
+    }
+    _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    return {
+        name: ("fail", round(deadline * 1000, 3)) if task in pending else task.result()
+        for name, task in tasks.items()
+    }
+
+
+class SingleFlightCache(Generic[T]):
+    """
+    Cache one async result for ``ttl`` seconds.
+
+    Concurrent callers that miss the cache await the same in-flight load
+    instead of starting their own.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._expires_at = 0.0
+        self._inflight: Optional["asyncio.Future[T]"] = None
+
+    def clear(self) -> None:
+        """Drop the cached value."""
+        self._value = None
+        self._expires_at = 0.0
+
+    async def get(self, loader: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Return (value, cached) loading it through ``loader`` on a miss."""
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value, True
+
+        inflight = self._inflight
+        if inflight is None or inflight.get_loop() is not asyncio.get_running_loop():
+            inflight = asyncio.ensure_future(self._load(loader))
+            self._inflight = inflight
+        # shield: a cancelled caller must not cancel the shared load
+        return await asyncio.shield(inflight), False
+
+    async def _load(self, loader: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await loader()
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+            return value
+        finally:
+            self._inflight = None
@@ -0,0 +1,12 @@
+"""
+File: app/api/v1/internal/__init__.py
+Package entrypoint for internal operational endpoints.
+
+Exposes runtime statistics (connection pools, caches) used for capacity
+planning. These routes are meant for operators: they require the
+``internal:read`` permission, which only admins hold.
+"""
+
+from .router import router
+
+__all__ = ["router"]
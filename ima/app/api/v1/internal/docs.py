@@ -0,0 +1,20 @@
+"""
+File : app / api / v1 / internal / docs.py
+OpenAPI documentation metadata for internal endpoints.
+"""
+
+DB_POOL_STATS_DOCS = {
+    "summary": "Database Pool Statistics",
+    "description": (
+        "Live connection-pool gauges (size, checked out, overflow) and "
+        "checkout-wait / connect latency histograms for every database engine."
+    ),
+}
+
+CACHE_STATS_DOCS = {
+    "summary": "Cache Statistics",
+    "description": (
+        "Hit, miss and eviction counters and occupancy of the in-process L1 "
+        "cache tier (null when the tier is disabled)."
+    ),
+}
@@ -0,0 +1,41 @@
+"""
+Internal endpoints for the API.
+
+Defines routes exposing runtime statistics for operators. Every route
+requires the ``internal:read`` permission (admins and superusers).
+Responses are standardized using success_response.
+"""
+
+from app.core.cache import cache
+from app.core.response import success_response
+from app.db.pool_stats import pool_snapshot
+from app.services.permissions import Action, require_permission
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from .docs import CACHE_STATS_DOCS, DB_POOL_STATS_DOCS
+
+# --- APIRouter setup ---
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_permission(Action.READ, "internal"))],
+)
+
+
+@router.get("/db-pool", **DB_POOL_STATS_DOCS)
+async def db_pool_stats() -> JSONResponse:
+    """Return connection-pool statistics for the primary and replicas."""
+    return success_response(
+        data={"pools": pool_snapshot()},
+        message="Database pool statistics",
+    )
+
+
+@router.get("/cache", **CACHE_STATS_DOCS)
+async def cache_stats() -> JSONResponse:
+    """Return in-process cache counters."""
+    return success_response(
+        data={"l1": cache.local.stats() if cache.local is not None else None},
+        message="Cache statistics",
+    )
@@ -0,0 +1,10 @@
+"""
+File: app/api/v1/users/__init__.py
+Package entrypoint for the users API.
+
+Provides the bulk user import and export endpoints.
+"""
+
+from .router import router
+
+__all__ = ["router"]
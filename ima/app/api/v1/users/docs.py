@@ -0,0 +1,46 @@
+"""
+File : app / api / v1 / users / docs.py
+OpenAPI documentation metadata for user endpoints.
+"""
+
+IMPORT_DOCS = {
+    "summary": "Import Users",
+    "description": (
+        "Create users from a streamed NDJSON (application/x-ndjson) or CSV "
+        "(text/csv, header row first) body. Each row has username and email, "
+        "optionally first_name, last_name, role, is_active, is_verified and "
+        "either password or an argon2 hashed_password. The import commits "
+        "as a whole; registered or repeated emails are skipped and invalid "
+        "rows reported by line. Pass X-Import-ID to follow progress with "
+        "GET /users/imports/{import_id}. Returns 415 for other content "
+        "types, 400 for a malformed body and 503 when the password hashing "
+        "pool is saturated."
+    ),
+    "openapi_extra": {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+}
+
+IMPORT_STATUS_DOCS = {
+    "summary": "Import Progress",
+    "description": (
+        "Progress of a running import (rows read, staged) or the report of "
+        "a finished one, kept for IMPORT_PROGRESS_TTL seconds."
+    ),
+}
+
+EXPORT_DOCS = {
+    "summary": "Export Users",
+    "description": (
+        "Stream every user (active users only with active_only=true) as "
+        "NDJSON or CSV, oldest first, read through a server-side cursor "
+        "EXPORT_FETCH_SIZE rows at a time. Credentials are never exported. "
+        "The export stops when the client disconnects."
+    ),
+}
@@ -0,0 +1,131 @@
+"""
+User management endpoints for the API.
+
+Defines the bulk import routes - the body is streamed through
+``app.services.user_import`` (COPY into a staging table, then one merge)
+and its progress kept in Redis - and the streaming export
+(``app.services.user_export``). Every route needs the users:create
+permission. Responses are standardized using success_response /
+error_response, except for the export body.
+"""
+
+import re
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Literal
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.response import error_response, success_response
+from app.db.session import get_db, read_session
+from app.services.passwords import PasswordHasherOverloaded
+from app.services.permissions import Action, require_permission
+from app.services.user_export import MEDIA_TYPES, export_users
+from app.services.user_import import (
+    ImportFailed,
+    build_importer,
+    import_format,
+    import_progress,
+    parse_records,
+)
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .docs import EXPORT_DOCS, IMPORT_DOCS, IMPORT_STATUS_DOCS
+
+# --- APIRouter setup ---
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    dependencies=[Depends(require_permission(Action.CREATE, "users"))],
+)
+
+_IMPORT_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+@router.post("/import", **IMPORT_DOCS)
+async def import_users(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> JSONResponse:
+    """Stream users from an NDJSON or CSV body into the users table."""
+    fmt = import_format(request.headers.get("content-type"))
+    if fmt is None:
+        return error_response(
+            "Send application/x-ndjson or text/csv",
+            code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+    import_id = request.headers.get("x-import-id") or uuid.uuid4().hex
+    if not _IMPORT_ID.fullmatch(import_id):
+        return error_response(
+            "X-Import-ID must be 1-64 letters, digits, '-' or '_'",
+            code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    importer = build_importer(db, import_id)
+    records = parse_records(request.stream(), fmt, settings.imports.max_line_bytes)
+    try:
+        report = await importer.run(records)
+    except ImportFailed as exc:
+        return error_response(
+            f"Import failed: {exc}",
+            details=importer.report.as_dict(),
+            code=status.HTTP_400_BAD_REQUEST,
+        )
+    except PasswordHasherOverloaded:
+        return error_response(
+            "Server busy, retry shortly",
+            details=importer.report.as_dict(),
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return success_response(data=report.as_dict(), message="Users imported")
+
+
+@router.get("/imports/{import_id}", **IMPORT_STATUS_DOCS)
+async def import_status(import_id: str) -> JSONResponse:
+    """Return the progress or report of an import."""
+    try:
+        report = await import_progress.load(import_id)
+    except redis.RedisError:
+        return error_response(
+            "Import progress is not available",
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    if report is None:
+        return error_response("Import not found", code=status.HTTP_404_NOT_FOUND)
+    return success_response(data=report, message="Import progress")
+
+
+async def _export_body(
+    fmt: str, active_only: bool, is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[bytes]:
+    # The session is opened by the body itself: yield dependencies may be
+    # torn down before a StreamingResponse is sent
+    async with (
+        read_session() as db,
+        aclosing(
+            export_users(
+                db,
+                fmt,
+                settings.exports.fetch_size,
+                is_disconnected,
+                active_only=active_only,
+            )
+        ) as chunks,
+    ):
+        async for chunk in chunks:
+            yield chunk
+
+
+@router.get("/export", **EXPORT_DOCS)
+async def export(
+    request: Request,
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    active_only: bool = False,
+) -> StreamingResponse:
+    """Stream every user as NDJSON or CSV from a read session."""
+    return StreamingResponse(
+        _export_body(fmt, active_only, request.is_disconnected),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="users.{fmt}"'},
+    )
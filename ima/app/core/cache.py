@@ -0,0 +1,364 @@
+"""
+Read-through Redis cache for IMA service.
+
+Builds on the ``redis_client`` singleton and provides:
+
+* ``RedisCache.get_or_load`` / ``RedisCache.cached`` - read-through API and
+  decorator keyed by function and arguments,
+* TTLs from ``REDIS_CACHE_TTL`` with random jitter, so keys written together
+  do not expire together,
+* probabilistic early refresh (XFetch): a key is recomputed slightly before
+  it expires, with a probability that grows as expiry approaches,
+* a per-key Redis lock so only one caller recomputes a missing key while the
+  others wait for its result (single-flight across workers and pods),
+* negative caching of ``None`` results under a shorter TTL,
+* an optional in-process L1 tier (``REDIS_CACHE_L1_ENABLED``) that serves
+  hot keys from memory; invalidations are broadcast to every worker and pod
+  over Redis pub/sub, and L1 entries also expire after ``REDIS_CACHE_L1_TTL``.
+
+Redis errors never fail a request: the loader is called directly instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.local_cache import LocalCache, register_metrics
+from app.core.redis_cache import redis_client
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Release the lock only if we still own it
+RELEASE_LOCK_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Parameters never included in cache keys (sessions, bound instances)
+DEFAULT_IGNORED_ARGS = ("self", "cls", "db", "session")
+
+
+@dataclass
+class CacheEntry:
+    """A decoded cache entry."""
+
+    value: Any
+    negative: bool
+    delta: float  # seconds the value took to compute
+    expires_at: float  # unix time
+
+
+def _encode(value: Any, negative: bool, delta: float, expires_at: float) -> str:
+    return json.dumps(
+        {"v": value, "n": negative, "d": round(delta, 6), "e": expires_at},
+        separators=(",", ":"),
+        default=jsonable_encoder,
+    )
+
+
+def _decode(raw: str) -> CacheEntry:
+    payload = json.loads(raw)
+    return CacheEntry(
+        value=payload["v"],
+        negative=payload["n"],
+        delta=payload["d"],
+        expires_at=payload["e"],
+    )
+
+
+class RedisCache:
+    """Read-through cache with stampede protection on top of Redis."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        namespace: str = "ima:cache",
+        ttl: int = settings.redis.cache_ttl,
+        ttl_jitter: float = settings.redis.cache_ttl_jitter,
+        negative_ttl: int = settings.redis.cache_negative_ttl,
+        beta: float = settings.redis.cache_early_refresh_beta,
+        lock_ttl: float = settings.redis.cache_lock_ttl,
+        lock_wait: float = settings.redis.cache_lock_wait,
+        local: Optional[LocalCache] = None,
+    ) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self.ttl_jitter = ttl_jitter
+        self.negative_ttl = negative_ttl
+        self.beta = beta
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._release_lock = client.register_script(RELEASE_LOCK_LUA)
+        self.local = local
+        self.channel = f"{namespace}:invalidate"
+        self._listener: Optional["asyncio.Task[None]"] = None
+
+    # --- keys ---
+
+    def key(self, *parts: str) -> str:
+        """Namespaced cache key."""
+        return ":".join((self.namespace, *parts))
+
+    def key_for_call(
+        self,
+        func: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: dict,
+        ignore: Collection[str] = DEFAULT_IGNORED_ARGS,
+    ) -> str:
+        """Key for a call: function path plus a digest of its bound arguments."""
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        relevant = {k: v for k, v in bound.arguments.items() if k not in ignore}
+        digest = hashlib.blake2b(
+            json.dumps(relevant, sort_keys=True, default=str).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return self.key(f"{func.__module__}.{func.__qualname__}", digest)
+
+    # --- primitives ---
+
+    def _jittered(self, ttl: float) -> float:
+        return max(ttl * random.uniform(1 - self.ttl_jitter, 1 + self.ttl_jitter), 1)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry stored in Redis under ``key`` or None."""
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        entry = _decode(raw)
+        self._remember(key, entry, len(raw))
+        return entry
+
+    def _remember(self, key: str, entry: CacheEntry, size: int) -> None:
+        if self.local is not None:
+            self.local.set(key, entry.value, size, ttl=entry.expires_at - time.time())
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        delta: float = 0.0,
+    ) -> None:
+        """Store ``value`` (None is cached negatively) with a jittered TTL."""
+        negative = value is None
+        base_ttl = self.negative_ttl if negative else (ttl or self.ttl)
+        ttl_s = self._jittered(base_ttl)
+        entry = CacheEntry(value, negative, delta, time.time() + ttl_s)
+        raw = _encode(value, negative, delta, entry.expires_at)
+        await self.client.set(key, raw, px=int(ttl_s * 1000))
+        self._remember(key, entry, len(raw))
+
+    async def delete(self, *keys: str) -> None:
+        """Invalidate keys in Redis and in every worker's L1 tier."""
+        if not keys:
+            return
+        if self.local is None:
+            await self.client.delete(*keys)
+            return
+        for key in keys:
+            self.local.delete(key)
+        # One round trip for the delete and every invalidation message
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            for key in keys:
+                pipe.publish(self.channel, key)
+            await pipe.execute()
+
+    def _should_refresh_early(self, entry: CacheEntry) -> bool:
+        """XFetch: recompute early with probability rising towards expiry."""
+        if entry.delta <= 0 or self.beta <= 0:
+            return False
+        return (
+            time.time() - entry.delta * self.beta * math.log(random.random())
+            >= entry.expires_at
+        )
+
+    # --- read-through ---
+
+    async def _load_and_store(
+        self, key: str, loader: Callable[[], Awaitable[T]], ttl: Optional[float]
+    ) -> T:
+        start = time.perf_counter()
+        value = await loader()
+        await self.set(key, value, ttl=ttl, delta=time.perf_counter() - start)
+        return value
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl: Optional[float] = None,
+    ) -> Optional[T]:
+        """
+        Return the cached value for ``key`` or compute it with ``loader``.
+
+        Only the caller holding the per-key lock recomputes; others wait up
+        to ``lock_wait`` seconds for its result before loading themselves.
+        """
+        if self.local is not None:
+            self._ensure_listener()
+            hit, value = self.local.get(key)
+            if hit:
+                return value
+        try:
+            entry = await self.get(key)
+            if entry is not None and not self._should_refresh_early(entry):
+                return entry.value
+
+            lock_key = f"{key}:lock"
+            token = uuid.uuid4().hex
+            if await self.client.set(
+                lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            ):
+                try:
+                    return await self._load_and_store(key, loader, ttl)
+                finally:
+                    await self._release_lock(keys=[lock_key], args=[token])
+
+            if entry is not None:
+                # Someone else is refreshing early; the current value is valid
+                return entry.value
+            return await self._wait_for_value(key, loader, ttl)
+        except redis.RedisError as exc:
+            logger.warning("Cache unavailable for %s: %s", key, exc)
+            return await loader()
+
+    async def _wait_for_value(
+        self, key: str, loader: Callable[[], Awaitable[T]], ttl: Optional[float]
+    ) -> Optional[T]:
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            entry = await self.get(key)
+            if entry is not None:
+                return entry.value
+            delay = min(delay * 2, 0.2)
+        return await self._load_and_store(key, loader, ttl)
+
+    # --- L1 invalidation ---
+
+    def _ensure_listener(self) -> None:
+        """Start the pub/sub invalidation listener on the running loop."""
+        task = self._listener
+        loop = asyncio.get_running_loop()
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Apply invalidations published by any worker; reconnect on errors."""
+        backoff = 0.1
+        reconnect = False
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Messages may have been missed while disconnected
+                if reconnect and self.local is not None:
+                    self.local.clear()
+                reconnect = True
+                backoff = 0.1
+                async for message in pubsub.listen():
+                    if message["type"] == "message" and self.local is not None:
+                        self.local.delete(message["data"])
+            except redis.RedisError as exc:
+                logger.warning("Cache invalidation listener error: %s", exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                await pubsub.aclose()
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._listener = None
+
+    def cached(
+        self,
+        ttl: Optional[float] = None,
+        model: Optional[Type[BaseModel]] = None,
+        ignore: Collection[str] = DEFAULT_IGNORED_ARGS,
+    ) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+        """
+        Decorate an async function with read-through caching.
+
+        Arguments named in ``ignore`` (sessions by default) are left out of the
+        key. When ``model`` is given, cached dicts are returned as instances of
+        it. The wrapper gains ``invalidate(*args, **kwargs)``::
+
+            @cache.cached(ttl=300, model=UserRecord)
+            async def get_user_by_email(db, email): ...
+
+            await get_user_by_email.invalidate(db, email)
+        """
+
+        def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = self.key_for_call(func, args, kwargs, ignore)
+                value = await self.get_or_load(
+                    key, lambda: func(*args, **kwargs), ttl=ttl
+                )
+                if model is not None and isinstance(value, dict):
+                    return model.model_validate(value)
+                return value
+
+            async def invalidate(*args: Any, **kwargs: Any) -> None:
+                await self.delete(self.key_for_call(func, args, kwargs, ignore))
+
+            wrapper.invalidate = invalidate  # type: ignore[attr-defined]
+            return wrapper
+
+        return decorator
+
+
+def _build_local_cache() -> Optional[LocalCache]:
+    if not settings.redis.cache_l1_enabled:
+        return None
+    local = LocalCache(
+        max_entries=settings.redis.cache_l1_max_entries,
+        max_bytes=settings.redis.cache_l1_max_bytes,
+        ttl=settings.redis.cache_l1_ttl,
+    )
+    register_metrics(local, "default")
+    return local
+
+
+# Shared cache instance
+cache = RedisCache(redis_client, local=_build_local_cache())
@@ -2,13 +2,23 @@
 Application settings using Pydantic BaseSettings (async-ready).
 
 Provides configuration for database, Redis, and application-level settings.
+
+``.env`` is parsed once, by ``get_settings``: it is loaded into the process
+environment (real environment variables win) and every section is then
+built from the environment alone, instead of each section re-reading the
+file.
 """
 
-from typing import Optional
+import os
+from functools import lru_cache
+from typing import Any, Literal, Optional, Type, Union
 
+from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ENV_FILE = ".env"
+
 
 class DatabaseSettings(BaseSettings):
     """PostgreSQL async database configuration."""
@@ -16,8 +26,24 @@ class DatabaseSettings(BaseSettings):
     uri: str = Field(..., alias="DB_URI")
     pool_min: int = Field(10, alias="DB_POOL_MIN")
     pool_max: int = Field(50, alias="DB_POOL_MAX")
+    pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")  # seconds
+    pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")  # seconds, -1 = never
+    pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    echo: Union[bool, Literal["debug"]] = Field(False, alias="DB_ECHO")
     replica1_host: Optional[str] = Field(None, alias="DB_REPLICA1_HOST")
     replica2_host: Optional[str] = Field(None, alias="DB_REPLICA2_HOST")
+    replica_max_lag: float = Field(5.0, alias="DB_REPLICA_MAX_LAG")  # seconds
+    replica_lag_check_interval: float = Field(
+        5.0, alias="DB_REPLICA_LAG_CHECK_INTERVAL"
+    )
+    replica_retry_after: float = Field(30.0, alias="DB_REPLICA_RETRY_AFTER")
+    # SQLAlchemy compiled-statement cache (per engine, entries)
+    query_cache_size: int = Field(500, alias="DB_QUERY_CACHE_SIZE")
+    # asyncpg prepared statements kept per connection (0 disables, e.g. behind
+    # a transaction-pooling PgBouncer)
+    prepared_statement_cache_size: int = Field(
+        100, alias="DB_PREPARED_STATEMENT_CACHE_SIZE"
+    )
 
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
@@ -30,6 +56,15 @@ class RedisSettings(BaseSettings):
     password: str = Field(..., alias="REDIS_PASSWORD")
     db: int = Field(..., alias="REDIS_DB")
     cache_ttl: int = Field(3600, alias="REDIS_CACHE_TTL")  # default 1 hour
+    cache_ttl_jitter: float = Field(0.1, alias="REDIS_CACHE_TTL_JITTER")  # +/-10%
+    cache_negative_ttl: int = Field(60, alias="REDIS_CACHE_NEGATIVE_TTL")
+    cache_early_refresh_beta: float = Field(1.0, alias="REDIS_CACHE_EARLY_BETA")
+    cache_lock_ttl: float = Field(10.0, alias="REDIS_CACHE_LOCK_TTL")  # seconds
+    cache_lock_wait: float = Field(2.0, alias="REDIS_CACHE_LOCK_WAIT")  # seconds
+    cache_l1_enabled: bool = Field(False, alias="REDIS_CACHE_L1_ENABLED")
+    cache_l1_max_entries: int = Field(10_000, alias="REDIS_CACHE_L1_MAX_ENTRIES")
+    cache_l1_max_bytes: int = Field(64 * 1024 * 1024, alias="REDIS_CACHE_L1_MAX_BYTES")
+    cache_l1_ttl: float = Field(30.0, alias="REDIS_CACHE_L1_TTL")  # staleness bound
 
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
@@ -37,8 +72,277 @@ class RedisSettings(BaseSettings):
 class RateLimitSettings(BaseSettings):
     """Rate limiting configuration."""
 
+    enabled: bool = Field(True, alias="RATE_LIMIT_ENABLED")
+    # Per-route limit (e.g. login), requests per window seconds
     count: int = Field(5, alias="RATE_LIMIT_COUNT")
     window: int = Field(60, alias="RATE_LIMIT_WINDOW")
+    # Service-wide per-client limit applied by the middleware
+    global_count: int = Field(600, alias="RATE_LIMIT_GLOBAL_COUNT")
+    # Local token-bucket pre-filter (per worker, per client)
+    local_rate: float = Field(50.0, alias="RATE_LIMIT_LOCAL_RATE")  # tokens/second
+    local_burst: int = Field(100, alias="RATE_LIMIT_LOCAL_BURST")
+    local_max_clients: int = Field(100_000, alias="RATE_LIMIT_LOCAL_MAX_CLIENTS")
+    fail_open: bool = Field(True, alias="RATE_LIMIT_FAIL_OPEN")
+    exempt_paths: str = Field(
+        "/api/v1/health,/metrics", alias="RATE_LIMIT_EXEMPT_PATHS"
+    )
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class HealthCheckSettings(BaseSettings):
+    """Health probe configuration (all values in seconds)."""
+
+    check_timeout: float = Field(1.0, alias="HEALTH_CHECK_TIMEOUT")
+    deadline: float = Field(2.0, alias="HEALTH_CHECK_DEADLINE")
+    cache_ttl: float = Field(2.0, alias="HEALTH_CHECK_CACHE_TTL")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class ServerSettings(BaseSettings):
+    """Production server (``python main.py``) configuration."""
+
+    host: str = Field("127.0.0.1", alias="HOST")
+    # Fixed worker count; default derives it from the CPU quota
+    workers: Optional[int] = Field(None, alias="WEB_CONCURRENCY")
+    workers_per_cpu: float = Field(1.0, alias="SERVER_WORKERS_PER_CPU")
+    max_workers: int = Field(32, alias="SERVER_MAX_WORKERS")
+    loop: str = Field("uvloop", alias="SERVER_LOOP")
+    http: str = Field("httptools", alias="SERVER_HTTP")
+    backlog: int = Field(2048, alias="SERVER_BACKLOG")
+    # Longer than the load balancer's idle timeout, so it closes first
+    keep_alive: int = Field(75, alias="SERVER_KEEP_ALIVE")  # seconds
+    # Concurrent connections + tasks per worker before answering 503
+    limit_concurrency: Optional[int] = Field(512, alias="SERVER_LIMIT_CONCURRENCY")
+    # In-flight requests get this long to finish on SIGTERM
+    graceful_timeout: int = Field(30, alias="SERVER_GRACEFUL_TIMEOUT")  # seconds
+    # Proxies whose X-Forwarded-For is trusted; also the rate-limit identity
+    forwarded_allow_ips: Optional[str] = Field(None, alias="SERVER_FORWARDED_ALLOW_IPS")
+    access_log: bool = Field(True, alias="SERVER_ACCESS_LOG")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class WarmupSettings(BaseSettings):
+    """Startup warm-up run before the readiness probe reports OK."""
+
+    enabled: bool = Field(True, alias="WARMUP_ENABLED")
+    # Connections opened up front; defaults to DB_POOL_MIN
+    db_connections: Optional[int] = Field(None, alias="WARMUP_DB_CONNECTIONS")
+    redis_connections: int = Field(10, alias="WARMUP_REDIS_CONNECTIONS")
+    # Readiness turns OK after this many seconds even if warm-up is unfinished
+    timeout: float = Field(30.0, alias="WARMUP_TIMEOUT")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class TenantSettings(BaseSettings):
+    """Schema-per-tenant routing (``app.db.tenancy``)."""
+
+    enabled: bool = Field(False, alias="TENANCY_ENABLED")
+    header: str = Field("X-Tenant-ID", alias="TENANT_HEADER")
+    schema_prefix: str = Field("tenant_", alias="TENANT_SCHEMA_PREFIX")
+    # Searched after the tenant's schema (shared tables, extensions)
+    shared_schema: str = Field("public", alias="TENANT_SHARED_SCHEMA")
+    # "session": SET once per pooled connection (direct or session pooling);
+    # "transaction": SET LOCAL per transaction (transaction-pooling PgBouncer)
+    search_path_scope: Literal["session", "transaction"] = Field(
+        "session", alias="TENANT_SEARCH_PATH_SCOPE"
+    )
+    # Known tenant schemas are re-listed this often (seconds), and at most
+    # every min interval when an unknown tenant is requested
+    directory_refresh_interval: float = Field(
+        300.0, alias="TENANT_DIRECTORY_REFRESH_INTERVAL"
+    )
+    directory_min_refresh_interval: float = Field(
+        5.0, alias="TENANT_DIRECTORY_MIN_REFRESH_INTERVAL"
+    )
+    # alembic -x tenants=...: concurrent migration processes, schemas each
+    migration_concurrency: int = Field(8, alias="TENANT_MIGRATION_CONCURRENCY")
+    migration_batch_size: int = Field(50, alias="TENANT_MIGRATION_BATCH_SIZE")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class EventSettings(BaseSettings):
+    """Auth/audit events: write-behind publisher and stream consumer."""
+
+    enabled: bool = Field(True, alias="EVENTS_ENABLED")
+    stream: str = Field("ima:events", alias="EVENTS_STREAM")
+    # Approximate cap on the stream length (XADD MAXLEN ~)
+    stream_maxlen: int = Field(1_000_000, alias="EVENTS_STREAM_MAXLEN")
+    # In-process buffer; events beyond it are dropped and counted
+    buffer_size: int = Field(10_000, alias="EVENTS_BUFFER_SIZE")
+    batch_size: int = Field(500, alias="EVENTS_BATCH_SIZE")
+    flush_interval: float = Field(0.5, alias="EVENTS_FLUSH_INTERVAL")  # seconds
+    retry_interval: float = Field(1.0, alias="EVENTS_RETRY_INTERVAL")  # seconds
+    # Time allowed at shutdown to publish what is still buffered
+    shutdown_timeout: float = Field(5.0, alias="EVENTS_SHUTDOWN_TIMEOUT")  # seconds
+    # Consumer (python -m app.services.event_consumer)
+    consumer_group: str = Field("ima-event-sink", alias="EVENTS_CONSUMER_GROUP")
+    consumer_batch_size: int = Field(500, alias="EVENTS_CONSUMER_BATCH_SIZE")
+    consumer_block: float = Field(1.0, alias="EVENTS_CONSUMER_BLOCK")  # seconds
+    # Pending entries idle this long are re-delivered to a live consumer
+    claim_idle: float = Field(60.0, alias="EVENTS_CLAIM_IDLE")  # seconds
+    # Deliveries before an entry is moved to the dead-letter stream
+    max_deliveries: int = Field(5, alias="EVENTS_MAX_DELIVERIES")
+    dlq_stream: str = Field("ima:events:dlq", alias="EVENTS_DLQ_STREAM")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class ImportSettings(BaseSettings):
+    """Bulk user import (``POST /users/import``)."""
+
+    # Rows validated, hashed and COPYed together
+    batch_size: int = Field(1000, alias="IMPORT_BATCH_SIZE")
+    # Parsed batches waiting for COPY; the request body is read no further ahead
+    queue_depth: int = Field(2, alias="IMPORT_QUEUE_DEPTH")
+    max_line_bytes: int = Field(64 * 1024, alias="IMPORT_MAX_LINE_BYTES")
+    # Row errors kept in the report (all are counted)
+    max_errors: int = Field(1000, alias="IMPORT_MAX_ERRORS")
+    progress_prefix: str = Field("ima:import", alias="IMPORT_PROGRESS_PREFIX")
+    progress_ttl: int = Field(24 * 3600, alias="IMPORT_PROGRESS_TTL")  # seconds
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class ExportSettings(BaseSettings):
+    """User export (``GET /users/export``)."""
+
+    # Rows per server-side cursor fetch, and per response chunk
+    fetch_size: int = Field(1000, alias="EXPORT_FETCH_SIZE")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class EmailFilterSettings(BaseSettings):
+    """Registered-email Bloom filter (``app.services.email_filter``)."""
+
+    enabled: bool = Field(True, alias="EMAIL_FILTER_ENABLED")
+    # Emails the filter is sized for; past it the false-positive rate climbs
+    capacity: int = Field(1_000_000, alias="EMAIL_FILTER_CAPACITY")
+    error_rate: float = Field(0.01, alias="EMAIL_FILTER_ERROR_RATE")
+    # Mirror the bits in a Redis bitset and confirm local misses against it
+    redis_mirror: bool = Field(False, alias="EMAIL_FILTER_REDIS_MIRROR")
+    key_prefix: str = Field("ima:emails", alias="EMAIL_FILTER_KEY_PREFIX")
+    # Rows per server-side cursor fetch while rebuilding
+    fetch_size: int = Field(10000, alias="EMAIL_FILTER_FETCH_SIZE")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class PasswordSettings(BaseSettings):
+    """Password hashing (argon2id) configuration."""
+
+    workers: int = Field(
+        default_factory=lambda: os.cpu_count() or 1, alias="PASSWORD_HASH_WORKERS"
+    )
+    # Bulk imports hash in their own pool, apart from logins
+    import_workers: int = Field(
+        default_factory=lambda: max((os.cpu_count() or 1) // 2, 1),
+        alias="PASSWORD_HASH_IMPORT_WORKERS",
+    )
+    max_queue: int = Field(64, alias="PASSWORD_HASH_MAX_QUEUE")
+    time_cost: int = Field(2, alias="PASSWORD_ARGON2_TIME_COST")
+    memory_cost: int = Field(19456, alias="PASSWORD_ARGON2_MEMORY_COST")  # KiB
+    parallelism: int = Field(1, alias="PASSWORD_ARGON2_PARALLELISM")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class JWTSettings(BaseSettings):
+    """Bearer token (JWT) verification configuration."""
+
+    algorithms: str = Field("RS256", alias="JWT_ALGORITHMS")  # comma-separated
+    # Either a JWKS endpoint (rotating keys) or a static secret / PEM public key
+    jwks_url: Optional[str] = Field(None, alias="JWT_JWKS_URL")
+    key: Optional[str] = Field(None, alias="JWT_KEY")
+    issuer: Optional[str] = Field(None, alias="JWT_ISSUER")
+    audience: Optional[str] = Field(None, alias="JWT_AUDIENCE")
+    leeway: float = Field(30.0, alias="JWT_LEEWAY")  # seconds
+    jwks_refresh_interval: float = Field(300.0, alias="JWT_JWKS_REFRESH_INTERVAL")
+    # Minimum delay between refetches triggered by an unknown key id
+    jwks_min_refresh_interval: float = Field(
+        30.0, alias="JWT_JWKS_MIN_REFRESH_INTERVAL"
+    )
+    cache_size: int = Field(10_000, alias="JWT_CACHE_SIZE")  # verified tokens
+    revocation_enabled: bool = Field(True, alias="JWT_REVOCATION_ENABLED")
+    # Issuing (login): HMAC secret or PEM private key, first of JWT_ALGORITHMS
+    signing_key: Optional[str] = Field(None, alias="JWT_SIGNING_KEY")
+    signing_kid: Optional[str] = Field(None, alias="JWT_SIGNING_KID")
+    access_token_ttl: int = Field(900, alias="JWT_ACCESS_TOKEN_TTL")  # seconds
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class SessionSettings(BaseSettings):
+    """Login sessions and refresh tokens (``app.services.sessions``)."""
+
+    enabled: bool = Field(True, alias="SESSIONS_ENABLED")
+    # Refresh token lifetime; each rotation starts a new period
+    ttl: int = Field(30 * 24 * 3600, alias="SESSION_TTL")  # seconds
+    prefix: str = Field("ima:sess", alias="SESSION_KEY_PREFIX")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class PermissionSettings(BaseSettings):
+    """Per-user effective permission cache configuration."""
+
+    cache_ttl: int = Field(300, alias="PERMISSIONS_CACHE_TTL")  # Redis, seconds
+    local_ttl: float = Field(30.0, alias="PERMISSIONS_LOCAL_TTL")  # staleness bound
+    local_max_entries: int = Field(100_000, alias="PERMISSIONS_LOCAL_MAX_ENTRIES")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+
+class TracingSettings(BaseSettings):
+    """OpenTelemetry tracing configuration."""
+
+    # auto: export over OTLP when an endpoint is set, otherwise tracing is off
+    mode: Literal["auto", "otlp", "console", "off"] = Field(
+        "auto", alias="TRACING_MODE"
+    )
+    otlp_endpoint: Optional[str] = Field(None, alias="OTEL_EXPORTER_OTLP_ENDPOINT")
+    service_name: str = Field("ima-service", alias="OTEL_SERVICE_NAME")
+    # Head sampling ratio for new traces; upstream decisions are honoured
+    sample_ratio: float = Field(0.1, alias="TRACING_SAMPLE_RATIO")
+    # Also keep unsampled traces that end in an error or run this long
+    tail_sampling: bool = Field(True, alias="TRACING_TAIL_SAMPLING")
+    slow_threshold_ms: float = Field(500.0, alias="TRACING_SLOW_THRESHOLD_MS")
+    tail_max_traces: int = Field(2048, alias="TRACING_TAIL_MAX_TRACES")
+    excluded_urls: str = Field("/api/v1/health", alias="TRACING_EXCLUDED_URLS")
+    # Skip the per-message ASGI receive/send spans
+    exclude_asgi_io_spans: bool = Field(True, alias="TRACING_EXCLUDE_ASGI_IO_SPANS")
+    log_correlation: bool = Field(True, alias="TRACING_LOG_CORRELATION")
+    # BatchSpanProcessor tuning
+    max_queue_size: int = Field(2048, alias="TRACING_MAX_QUEUE_SIZE")
+    max_export_batch_size: int = Field(512, alias="TRACING_MAX_EXPORT_BATCH_SIZE")
+    schedule_delay_ms: int = Field(5000, alias="TRACING_SCHEDULE_DELAY_MS")
+    export_timeout_ms: int = Field(30000, alias="TRACING_EXPORT_TIMEOUT_MS")
+
+    model_config = SettingsConfigDict(env_file=".env", extra="allow")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a tracer provider is installed at all."""
+        if self.mode == "auto":
+            return bool(self.otlp_endpoint)
+        return self.mode != "off"
+
+
+class MetricsSettings(BaseSettings):
+    """Prometheus metrics configuration.
+
+    Multiprocess mode is enabled by the ``PROMETHEUS_MULTIPROC_DIR``
+    environment variable, which prometheus-client reads directly and which
+    must be set (to an empty directory) before the workers start.
+    """
+
+    enabled: bool = Field(True, alias="METRICS_ENABLED")
+    path: str = Field("/metrics", alias="METRICS_PATH")
 
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
@@ -55,6 +359,11 @@ class SentrySettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
 
+def _section(cls: Type[BaseSettings]) -> Any:
+    """Field building a settings section from the already-loaded environment."""
+    return Field(default_factory=lambda: cls(_env_file=None))  # type: ignore[call-arg]
+
+
 class Settings(BaseSettings):
     """Main application settings."""
 
@@ -64,14 +373,34 @@ class Settings(BaseSettings):
     debug: bool = Field(..., alias="DEBUG")
     port: int = Field(..., alias="PORT")
 
-    database: DatabaseSettings = DatabaseSettings()  # type: ignore[call-arg]
-    redis: RedisSettings = RedisSettings()  # type: ignore[call-arg]
-    # sentry: SentrySettings = SentrySettings()  # type: ignore[call-arg]
-    # jwt: JWTSettings = JWTSettings()  # Uncomment when JWTSettings is defined
-    # rate_limit: RateLimitSettings = RateLimitSettings()  # Uncomment if needed
+    database: DatabaseSettings = _section(DatabaseSettings)
+    redis: RedisSettings = _section(RedisSettings)
+    health: HealthCheckSettings = _section(HealthCheckSettings)
+    warmup: WarmupSettings = _section(WarmupSettings)
+    tenancy: TenantSettings = _section(TenantSettings)
+    server: ServerSettings = _section(ServerSettings)
+    # sentry: SentrySettings = _section(SentrySettings)
+    jwt: JWTSettings = _section(JWTSettings)
+    sessions: SessionSettings = _section(SessionSettings)
+    permissions: PermissionSettings = _section(PermissionSettings)
+    tracing: TracingSettings = _section(TracingSettings)
+    metrics: MetricsSettings = _section(MetricsSettings)
+    rate_limit: RateLimitSettings = _section(RateLimitSettings)
+    passwords: PasswordSettings = _section(PasswordSettings)
+    events: EventSettings = _section(EventSettings)
+    imports: ImportSettings = _section(ImportSettings)
+    exports: ExportSettings = _section(ExportSettings)
+    email_filter: EmailFilterSettings = _section(EmailFilterSettings)
 
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
 
-# Singleton instance (mypy cannot know env vars at type-check time)
-settings: Settings = Settings()  # type: ignore[call-arg]
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse ``.env`` once and build all settings from the environment."""
+    load_dotenv(ENV_FILE, override=False)
+    return Settings(_env_file=None)  # type: ignore[call-arg]
+
+
+# Singleton instance
+settings: Settings = get_settings()
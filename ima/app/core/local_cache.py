@@ -0,0 +1,114 @@
+"""
+In-process L1 cache for IMA service.
+
+A bounded LRU with per-entry TTL that sits in front of Redis (see
+``app.core.cache``). Entries are evicted least-recently-used first when
+either the entry count or the approximate memory budget is exceeded.
+Values are shared between callers and must be treated as read-only.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from opentelemetry import metrics
+
+
+class _Slot(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int
+
+
+class LocalCache:
+    """Bounded LRU/TTL cache with hit, miss and eviction counters."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: "OrderedDict[str, _Slot]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value); expired entries count as misses."""
+        slot = self._data.get(key)
+        if slot is None:
+            self.misses += 1
+            return False, None
+        if slot.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, slot.value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``size`` is its approximate footprint in bytes."""
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = _Slot(value, time.monotonic() + ttl, size)
+        self.bytes += size
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            _, slot = self._data.popitem(last=False)
+            self.bytes -= slot.size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Drop ``key`` if present."""
+        self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+        self.bytes = 0
+
+    def _remove(self, key: str) -> None:
+        slot = self._data.pop(key, None)
+        if slot is not None:
+            self.bytes -= slot.size
+
+    def stats(self) -> Dict[str, int]:
+        """Counters and current occupancy."""
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def register_metrics(cache: LocalCache, name: str) -> None:
+    """Export ``cache`` counters as OpenTelemetry observable instruments."""
+    meter = metrics.get_meter("app.core.local_cache")
+
+    def _observer(attr: str):
+        def callback(_options):
+            return [metrics.Observation(getattr(cache, attr), {"cache": name})]
+
+        return callback
+
+    for attr in ("hits", "misses", "evictions", "expirations"):
+        meter.create_observable_counter(
+            f"cache.l1.{attr}", callbacks=[_observer(attr)], unit="1"
+        )
+    meter.create_observable_gauge(
+        "cache.l1.entries",
+        callbacks=[lambda _options: [metrics.Observation(len(cache), {"cache": name})]],
+    )
+    meter.create_observable_gauge(
+        "cache.l1.bytes", callbacks=[_observer("bytes")], unit="By"
+    )
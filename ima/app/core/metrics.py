@@ -0,0 +1,218 @@
+"""
+Prometheus metrics for IMA service.
+
+``PrometheusMiddleware`` is a pure ASGI middleware recording, per route
+template (``/api/v1/users/{uid}``, never the raw path, so label cardinality
+stays bounded):
+
+* ``http_request_duration_seconds`` - latency histogram,
+* ``http_response_size_bytes`` - response body size histogram,
+* ``http_requests_in_progress`` - in-flight requests.
+
+Connection pools (``app.db.pool_stats``) and the Redis client
+(``app.core.redis_cache``) record into the ``db_pool_*`` and
+``redis_command_duration_seconds`` metrics defined here, and the event
+publisher and consumer (``app.services.events``) into ``events_*``, and
+the registered-email filter (``app.services.email_filter``) into
+``email_filter_*``.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set, every worker writes its samples
+to that directory and ``metrics_endpoint`` aggregates them, so a scrape
+returns service-wide numbers regardless of which worker answers it.
+"""
+
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS_S = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS_BYTES = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Label used for requests that matched no route (404s, scanners)
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS_S,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS_BYTES,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=LATENCY_BUCKETS_S,
+)
+DB_POOL_CONNECT = Histogram(
+    "db_pool_connect_seconds",
+    "Time to open a new database connection",
+    ["pool"],
+    buckets=LATENCY_BUCKETS_S,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency",
+    ["command"],
+    buckets=LATENCY_BUCKETS_S,
+)
+
+EVENTS_BUFFERED = Gauge(
+    "events_buffered",
+    "Events waiting in the in-process buffer to be published",
+    multiprocess_mode="livesum",
+)
+EVENTS_PUBLISHED = Counter(
+    "events_published_total", "Events written to the event stream"
+)
+EVENTS_DROPPED = Counter(
+    "events_dropped_total",
+    "Events dropped before reaching the event stream",
+    ["reason"],
+)
+EVENTS_FLUSH_DURATION = Histogram(
+    "events_flush_duration_seconds",
+    "Time to write one batch of events to the event stream",
+    buckets=LATENCY_BUCKETS_S,
+)
+EVENTS_CONSUMED = Counter(
+    "events_consumed_total",
+    "Stream entries handled by the event consumer",
+    ["outcome"],
+)
+
+
+EMAIL_FILTER_LOOKUPS = Counter(
+    "email_filter_lookups_total",
+    "Email filter lookups by answer (negative ones skip Postgres)",
+    ["result"],
+)
+EMAIL_FILTER_FALSE_POSITIVES = Counter(
+    "email_filter_false_positives_total",
+    "Positive email filter answers for emails Postgres did not have",
+)
+EMAIL_FILTER_ITEMS = Gauge(
+    "email_filter_items",
+    "Emails in the email filter (estimated from its fill)",
+    multiprocess_mode="livemax",
+)
+EMAIL_FILTER_FALSE_POSITIVE_RATE = Gauge(
+    "email_filter_false_positive_rate",
+    "Expected email filter false-positive rate at its current fill",
+    multiprocess_mode="livemax",
+)
+EMAIL_FILTER_MEMORY = Gauge(
+    "email_filter_memory_bytes",
+    "Memory held by email filter bit arrays",
+    multiprocess_mode="livesum",
+)
+
+
+def multiprocess_enabled() -> bool:
+    """Whether samples are shared across workers through the multiproc dir."""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges (call from the server's exit hook)."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+async def metrics_endpoint(_request: Request) -> Response:
+    """Expose metrics in the Prometheus text format."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording per-route HTTP metrics."""
+
+    def __init__(
+        self, app: Callable[..., Awaitable[None]], skip_paths: tuple = ()
+    ) -> None:
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            HTTP_REQUEST_DURATION.labels(method, template, str(status_code)).observe(
+                elapsed
+            )
+            HTTP_RESPONSE_SIZE.labels(method, template).observe(size)
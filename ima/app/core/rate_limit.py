@@ -0,0 +1,279 @@
+"""
+Distributed rate limiting for IMA service.
+
+Decisions are made by a single server-side Lua script implementing GCRA
+(generic cell rate algorithm): one key per client holding its theoretical
+arrival time, so each decision costs one Redis round trip and O(1) memory.
+
+In front of Redis, a per-worker token bucket sheds clients that are
+obviously abusive (far above any configured limit) without touching
+Redis at all. When Redis is unavailable requests are allowed
+(``RATE_LIMIT_FAIL_OPEN``) or rejected with 503.
+
+Two entry points share the limiter:
+
+* ``RateLimitMiddleware`` - pure ASGI middleware enforcing the service-wide
+  per-client limit (``RATE_LIMIT_GLOBAL_COUNT`` per ``RATE_LIMIT_WINDOW``),
+* ``rate_limit(...)`` - per-route dependency for sensitive endpoints such as
+  login (``RATE_LIMIT_COUNT`` per ``RATE_LIMIT_WINDOW`` by default).
+
+Clients are identified by the connection's peer address. Behind a proxy,
+list the proxy addresses in ``SERVER_FORWARDED_ALLOW_IPS``: uvicorn then
+replaces the peer with the rightmost ``X-Forwarded-For`` hop that is not a
+trusted proxy. The header is never read here, so a client cannot pick a
+fresh identity by sending its own.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.redis_cache import redis_client
+from app.core.response import encode_envelope
+from fastapi import HTTPException, Request, status
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket key; ARGV[1] = limit, ARGV[2] = period in ms.
+# Returns {allowed, remaining, retry_after_ms}.
+GCRA_LUA = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local interval = period / limit
+local t = redis.call("TIME")
+local now = t[1] * 1000 + t[2] / 1000
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, 0, math.ceil(allow_at - now)}
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), 0}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate-limit decision."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds
+
+
+class LocalTokenBucket:
+    """Per-client token buckets held in process, bounded LRU by client."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def allow(self, client: str) -> bool:
+        """Take one token for ``client``; False when its bucket is empty."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[client] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+class RateLimiter:
+    """GCRA limiter backed by one Lua script call per decision."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        prefilter: Optional[LocalTokenBucket] = None,
+        fail_open: bool = True,
+        prefix: str = "ima:rl",
+    ) -> None:
+        self.client = client
+        self.prefilter = prefilter
+        self.fail_open = fail_open
+        self.prefix = prefix
+        self._script = client.register_script(GCRA_LUA)
+
+    async def hit(
+        self,
+        scope: str,
+        identity: str,
+        limit: int,
+        window: float,
+        prefilter: bool = True,
+    ) -> RateLimitResult:
+        """Count one request of ``identity`` against ``limit`` per ``window`` s."""
+        if (
+            prefilter
+            and self.prefilter is not None
+            and not self.prefilter.allow(identity)
+        ):
+            return RateLimitResult(False, limit, 0, 1.0 / self.prefilter.rate)
+        try:
+            allowed, remaining, retry_ms = await self._script(
+                keys=[f"{self.prefix}:{scope}:{identity}"],
+                args=[limit, int(window * 1000)],
+            )
+        except redis.RedisError as exc:
+            logger.warning("Rate limiter unavailable: %s", exc)
+            if self.fail_open:
+                return RateLimitResult(True, limit, limit, 0.0)
+            raise
+        return RateLimitResult(bool(allowed), limit, int(remaining), retry_ms / 1000)
+
+
+def client_identity(client: Optional[Tuple[str, int]]) -> str:
+    """Client IP: the peer address, as resolved by the server's proxy handling."""
+    return client[0] if client else "unknown"
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    """Standard X-RateLimit-* / Retry-After headers for a decision."""
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(math.ceil(result.retry_after), 1))
+    return headers
+
+
+def _build_limiter() -> RateLimiter:
+    rl = settings.rate_limit
+    return RateLimiter(
+        redis_client,
+        prefilter=LocalTokenBucket(rl.local_rate, rl.local_burst, rl.local_max_clients),
+        fail_open=rl.fail_open,
+    )
+
+
+# Shared limiter instance
+limiter = _build_limiter()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware enforcing the service-wide per-client limit."""
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        rate_limiter: Optional[RateLimiter] = None,
+        limit: Optional[int] = None,
+        window: Optional[float] = None,
+    ) -> None:
+        self.app = app
+        self.limiter = rate_limiter or limiter
+        self.limit = limit or settings.rate_limit.global_count
+        self.window = window or settings.rate_limit.window
+        self.exempt = tuple(
+            path.strip()
+            for path in settings.rate_limit.exempt_paths.split(",")
+            if path.strip()
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        identity = client_identity(scope.get("client"))
+        try:
+            result = await self.limiter.hit("global", identity, self.limit, self.window)
+        except redis.RedisError:
+            await self._reject(send, status.HTTP_503_SERVICE_UNAVAILABLE, None)
+            return
+        if not result.allowed:
+            await self._reject(send, status.HTTP_429_TOO_MANY_REQUESTS, result)
+            return
+
+        extra = [
+            (key.lower().encode(), value.encode())
+            for key, value in rate_limit_headers(result).items()
+        ]
+
+        async def send_with_headers(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _reject(send: Any, code: int, result: Optional[RateLimitResult]) -> None:
+        body = encode_envelope(
+            code,
+            "error",
+            "Too many requests" if result else "Rate limiter unavailable",
+        )
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if result is not None:
+            headers += [
+                (key.lower().encode(), value.encode())
+                for key, value in rate_limit_headers(result).items()
+            ]
+        await send({"type": "http.response.start", "status": code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def rate_limit(
+    scope: str,
+    count: Optional[int] = None,
+    window: Optional[float] = None,
+) -> Callable[[Request], Awaitable[None]]:
+    """
+    Per-route rate-limit dependency.
+
+    Usage::
+
+        @router.post("/login", dependencies=[Depends(rate_limit("login"))])
+
+    Raises
+    ------
+    HTTPException
+        429 with Retry-After when the limit is exceeded, 503 when Redis is
+        down and ``RATE_LIMIT_FAIL_OPEN`` is false.
+    """
+
+    async def dependency(request: Request) -> None:
+        if not settings.rate_limit.enabled:
+            return
+        identity = client_identity(request.client)
+        try:
+            result = await limiter.hit(
+                scope,
+                identity,
+                count or settings.rate_limit.count,
+                window or settings.rate_limit.window,
+                # the middleware already ran this request through the pre-filter
+                prefilter=False,
+            )
+        except redis.RedisError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Rate limiter unavailable",
+            ) from exc
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers=rate_limit_headers(result),
+            )
+
+    return dependency
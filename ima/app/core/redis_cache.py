@@ -2,19 +2,88 @@
 Redis cache client for IMA service using asyncio Redis.
 
 Provides a singleton async Redis client instance with optional connection
-health check.
+health check. Every command's latency is recorded in the
+``redis_command_duration_seconds`` Prometheus histogram.
+
+``redis_client`` is a proxy: the underlying client (and its connection
+pool) is created on first use or by ``init_redis`` in the app lifespan,
+and released by ``close_redis``, so importing this module has no side
+effects.
 """
 
 from __future__ import annotations
 
+import time
+from typing import Any, Callable, Optional, cast
+
 import redis.asyncio as redis
+from redis.commands.core import AsyncScript
 from app.core.config import settings
+from app.core.metrics import REDIS_COMMAND_DURATION
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client timing each command, labelled by command name."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
+
+
+def _build_client() -> redis.Redis:
+    return InstrumentedRedis(
+        host=settings.redis.host,
+        port=settings.redis.port,
+        password=settings.redis.password,
+        db=settings.redis.db,
+        decode_responses=True,
+    )
+
+
+class LazyRedis:
+    """Forward attribute access to a client created on first use."""
+
+    def __init__(self, factory: Callable[[], redis.Redis]) -> None:
+        self._factory = factory
+        self._client: Optional[redis.Redis] = None
+
+    @property
+    def client(self) -> redis.Redis:
+        """The underlying client, created if needed."""
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def register_script(self, script: str) -> AsyncScript:
+        """Script bound to the proxy, so registering it creates no client."""
+        # Pre-encoded: AsyncScript would otherwise ask the pool for an encoder
+        return AsyncScript(cast(redis.Redis, self), script.encode("utf-8"))
+
+    async def aclose(self) -> None:
+        """Close the client's pool; the next use creates a new client."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
 
 # Singleton async Redis client
-redis_client: redis.Redis = redis.Redis(
-    host=settings.redis.host,
-    port=settings.redis.port,
-    password=settings.redis.password,
-    db=settings.redis.db,
-    decode_responses=True,
-)
+redis_client: redis.Redis = cast(redis.Redis, LazyRedis(_build_client))
+
+
+def init_redis() -> None:
+    """Create the client now rather than on the first request."""
+    if isinstance(redis_client, LazyRedis):
+        _ = redis_client.client
+
+
+async def close_redis() -> None:
+    """Release the client's connections (app shutdown)."""
+    await redis_client.aclose()
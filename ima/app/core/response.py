@@ -1,15 +1,28 @@
 """
 File: app/utils/response.py
 Standardized JSON response helpers and models for API endpoints.
+
+``ResponseModel`` documents the envelope in OpenAPI; responses themselves
+are encoded by ``EnvelopeResponse``, which writes the envelope directly
+(orjson when installed, stdlib json otherwise) from a cached per-status
+prefix instead of validating server-built payloads through pydantic.
 """
 
+import json
 from datetime import datetime
-from typing import Any, Literal, Optional
+from functools import lru_cache
+from typing import Any, Dict, Literal, Optional, Type
 
 from fastapi import status
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast backend
+    orjson = None  # type: ignore[assignment]
+
 
 class ResponseModel(BaseModel):
     """Schema for standardized API responses."""
@@ -25,6 +38,107 @@ class ResponseModel(BaseModel):
     details: Optional[Any] = Field(None, description="Additional error details, if any")
 
 
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON with the fastest available backend."""
+    if orjson is not None:
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=jsonable_encoder,
+    ).encode("utf-8")
+
+
+@lru_cache(maxsize=64)
+def _envelope_prefix(code: int, status_type: str) -> bytes:
+    """Pre-encoded '{"code":...,"status":...,"message":' for a code/status pair."""
+    return b'{"code":%d,"status":%s,"message":' % (code, dumps(status_type))
+
+
+_NULL_DETAILS_SUFFIX = b',"details":null}'
+_NULL = b"null"
+
+
+def encode_envelope(
+    code: int,
+    status_type: str,
+    message: str,
+    data: Optional[Any] = None,
+    details: Optional[Any] = None,
+    timestamp: Optional[str] = None,
+) -> bytes:
+    """
+    Encode a standard envelope without building a ResponseModel.
+
+    Produces the same JSON (keys and order) as ``ResponseModel.model_dump``.
+    """
+    if timestamp is None:
+        timestamp = datetime.utcnow().isoformat() + "Z"
+    return b"".join(
+        (
+            _envelope_prefix(code, status_type),
+            dumps(message),
+            b',"timestamp":',
+            dumps(timestamp),
+            b',"data":',
+            _NULL if data is None else dumps(data),
+            (
+                _NULL_DETAILS_SUFFIX
+                if details is None
+                else b',"details":' + dumps(details) + b"}"
+            ),
+        )
+    )
+
+
+def _is_envelope(content: Any) -> bool:
+    return isinstance(content, dict) and "code" in content and "status" in content
+
+
+class EnvelopeResponse(JSONResponse):
+    """
+    High-throughput JSON response for trusted, server-built payloads.
+
+    Accepts pre-encoded bytes, an envelope dict (missing ``timestamp``,
+    ``data`` or ``details`` are filled in as ResponseModel would), or any
+    other JSON-serialisable content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if _is_envelope(content):
+            return encode_envelope(
+                code=content["code"],
+                status_type=content["status"],
+                message=content.get("message", ""),
+                data=content.get("data"),
+                details=content.get("details"),
+                timestamp=content.get("timestamp"),
+            )
+        return dumps(content)
+
+
+def envelope_route(model: Type[BaseModel] = ResponseModel) -> Dict[str, Any]:
+    """
+    Route decorator kwargs opting an endpoint into the fast envelope path.
+
+    The endpoint's return value is encoded by ``EnvelopeResponse`` without
+    response-model validation; ``model`` is still used for OpenAPI docs::
+
+        @router.get("/x", **envelope_route(HealthCheckResponse), **X_DOCS)
+    """
+    return {
+        "response_class": EnvelopeResponse,
+        "response_model": None,
+        "responses": {status.HTTP_200_OK: {"model": model}},
+    }
+
+
 def _build_response(
     code: int,
     status_type: Literal["success", "error"],
@@ -35,25 +149,27 @@ def _build_response(
     """
     Internal helper to build a standardized JSON response.
     """
-    payload = ResponseModel(
-        code=code,
-        status=status_type,
-        message=message,
-        data=data,
-        details=details,
+    return EnvelopeResponse(
+        encode_envelope(code, status_type, message, data=data, details=details),
+        status_code=code,
     )
-    return JSONResponse(status_code=code, content=payload.model_dump())
 
 
-def success_response(data: Any = None, message: str = "Success") -> JSONResponse:
+def success_response(
+    data: Any = None,
+    message: str = "Success",
+    details: Optional[Any] = None,
+    code: int = status.HTTP_200_OK,
+) -> JSONResponse:
     """
     Return a standard success JSON response.
     """
     return _build_response(
-        code=status.HTTP_200_OK,
+        code=code,
         status_type="success",
         message=message,
         data=data,
+        details=details,
     )
 
 
@@ -0,0 +1,138 @@
+"""
+Production serving for IMA service (``python main.py``).
+
+Runs uvicorn with one worker process per available CPU, where "available"
+honours the container's cgroup CPU quota (v2 ``cpu.max`` or v1
+``cpu.cfs_quota_us``) and the process affinity mask rather than the host's
+core count. Workers use uvloop and httptools, a keep-alive longer than
+the load balancer's idle timeout, a listen backlog, and uvicorn's
+``limit_concurrency`` admission control (503 once a worker is full).
+
+On SIGTERM uvicorn stops accepting connections, gives in-flight requests
+``SERVER_GRACEFUL_TIMEOUT`` seconds, then runs the lifespan shutdown,
+which disposes of the database and Redis pools (``app.core.state``).
+
+``--reload`` keeps the single-process development server with a file
+watcher; it is never the default.
+"""
+
+import importlib.util
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import ServerSettings, settings
+from app.core.metrics import multiprocess_enabled
+
+logger = logging.getLogger(__name__)
+
+APP_IMPORT_PATH = "app.main:app"
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cgroup_cpu_quota(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """CPUs granted by the cgroup CPU quota, or None when unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    for v1 in (root / "cpu", root / "cpu,cpuacct"):
+        try:
+            quota_us = int((v1 / "cpu.cfs_quota_us").read_text())
+            period_us = int((v1 / "cpu.cfs_period_us").read_text())
+        except (OSError, ValueError):
+            continue
+        if quota_us > 0 and period_us > 0:
+            return quota_us / period_us
+        return None
+    return None
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """CPUs this process may use: affinity mask capped by the cgroup quota."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:  # pragma: no cover - macOS / Windows
+        cpus = float(os.cpu_count() or 1)
+    quota = cgroup_cpu_quota(root)
+    return min(cpus, quota) if quota else cpus
+
+
+def worker_count(cfg: ServerSettings, cpus: Optional[float] = None) -> int:
+    """
+    Workers to run: WEB_CONCURRENCY, or CPUs x SERVER_WORKERS_PER_CPU.
+
+    Fractional quotas round down (at least one worker): a worker more than
+    the quota allows gets CFS-throttled, which shows up as p99 latency.
+    """
+    if cfg.workers:
+        return cfg.workers
+    cpus = available_cpus() if cpus is None else cpus
+    return max(1, min(cfg.max_workers, math.floor(cpus * cfg.workers_per_cpu)))
+
+
+def _available(module: str, option: str) -> str:
+    # uvloop/httptools are optional (no Windows wheels): fall back to auto
+    if option in ("uvloop", "httptools") and importlib.util.find_spec(module) is None:
+        logger.warning("%s is not installed, using uvicorn's default", module)
+        return "auto"
+    return option
+
+
+def uvicorn_options(
+    cfg: ServerSettings,
+    port: int,
+    reload: bool = False,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Keyword arguments for ``uvicorn.run``."""
+    if reload:
+        return {"host": cfg.host, "port": port, "reload": True}
+    return {
+        "host": cfg.host,
+        "port": port,
+        "workers": workers or worker_count(cfg),
+        "loop": _available("uvloop", cfg.loop),
+        "http": _available("httptools", cfg.http),
+        "backlog": cfg.backlog,
+        "timeout_keep_alive": cfg.keep_alive,
+        "limit_concurrency": cfg.limit_concurrency,
+        "timeout_graceful_shutdown": cfg.graceful_timeout,
+        "forwarded_allow_ips": cfg.forwarded_allow_ips,
+        "access_log": cfg.access_log,
+        "lifespan": "on",
+    }
+
+
+def reset_multiprocess_dir() -> None:
+    """Remove a previous run's metric files before workers start writing."""
+    if not multiprocess_enabled():
+        return
+    directory = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+
+
+def serve(
+    reload: bool = False,
+    workers: Optional[int] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+) -> None:
+    """Run the service: production workers, or the dev reloader."""
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    cfg = settings.server
+    if host:
+        cfg = cfg.model_copy(update={"host": host})
+    options = uvicorn_options(cfg, port or settings.port, reload, workers)
+    if not reload:
+        reset_multiprocess_dir()
+        logger.info("Starting %d worker(s)", options["workers"])
+    uvicorn.run(APP_IMPORT_PATH, **options)
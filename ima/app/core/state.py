@@ -0,0 +1,131 @@
+"""
+Process resources owned by the application lifespan.
+
+``startup`` creates what used to be built at import time (database
+engines, the Redis client, tracing/metrics providers and their
+instrumentation) and returns them in an ``AppState`` stored on
+``app.state.resources``; ``shutdown`` releases them in reverse order.
+Heavy optional imports (the OpenTelemetry SDK and exporters) only happen
+here, and only when tracing or OTLP metrics are configured.
+
+Connection warm-up (``app.core.warmup``) runs in the background after
+startup; ``AppState.ready`` (the readiness probe) turns true once it has
+finished or ``WARMUP_TIMEOUT`` has passed.
+
+The auth event publisher's flush loop (``app.services.events``) runs for
+the lifetime of the app; at shutdown it gets ``EVENTS_SHUTDOWN_TIMEOUT``
+to publish what is still buffered, before Redis is closed.
+
+The registered-email filter (``app.services.email_filter``) starts
+listening for inserts and rebuilds from the ``users`` table in the
+background; until it is built, logins simply query Postgres.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from app.core import redis_cache
+from app.core.config import settings
+from app.core.metrics import mark_process_dead
+from app.core.warmup import warm_up
+from app.db import session as db_session
+from app.services.email_filter import email_filter
+from app.services.events import event_publisher
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@dataclass
+class AppState:
+    """Resources created at startup."""
+
+    engine: AsyncEngine
+    redis: Any
+    tracer_provider: Optional[Any] = None
+    meter_provider: Optional[Any] = None
+    ready: bool = False
+    warmup_report: Dict[str, Any] = field(default_factory=dict)
+    warmup_task: Optional["asyncio.Task[None]"] = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def _init_telemetry(app: FastAPI, state: AppState) -> None:
+    cfg = settings.tracing
+    if not cfg.enabled and not cfg.otlp_endpoint:
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from app.core.tracing import (
+        init_metrics,
+        init_tracing,
+        instrument_fastapi,
+        instrument_sqlalchemy,
+    )
+
+    state.tracer_provider = init_tracing(cfg.service_name, cfg.otlp_endpoint)
+    state.meter_provider = init_metrics(cfg.service_name, cfg.otlp_endpoint)
+    # Tracing off (TRACING_MODE=off, or no endpoint in auto mode): skip the
+    # instrumentation entirely so requests carry no tracing overhead
+    if state.tracer_provider is not None:
+        instrument_fastapi(app, state.tracer_provider)
+        instrument_sqlalchemy(state.engine, *db_session.replica_router.engines)
+        # The middleware stack was built before the lifespan ran; rebuild it
+        # so the instrumentation middleware is in the request path
+        app.middleware_stack = app.build_middleware_stack()
+
+
+async def _warm_up(state: AppState) -> None:
+    cfg = settings.warmup
+    try:
+        state.warmup_report = await asyncio.wait_for(
+            warm_up(
+                state.engine,
+                state.redis,
+                db_connections=cfg.db_connections or settings.database.pool_min,
+                redis_connections=cfg.redis_connections,
+            ),
+            cfg.timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up did not finish within %.0fs", cfg.timeout)
+        state.warmup_report = {"error": "timeout"}
+    finally:
+        state.ready = True
+
+
+async def startup(app: FastAPI) -> AppState:
+    """Create the process resources and start warming their connections."""
+    redis_cache.init_redis()
+    state = AppState(engine=db_session.init_db(), redis=redis_cache.redis_client)
+    _init_telemetry(app, state)
+    event_publisher.start()
+    email_filter.start()
+    if settings.warmup.enabled:
+        state.warmup_task = asyncio.create_task(_warm_up(state))
+    else:
+        state.ready = True
+    return state
+
+
+async def shutdown(state: AppState) -> None:
+    """Stop warm-up, flush events and telemetry, release connections."""
+    if state.warmup_task is not None and not state.warmup_task.done():
+        state.warmup_task.cancel()
+        try:
+            await state.warmup_task
+        except asyncio.CancelledError:
+            pass
+    await email_filter.stop()
+    await event_publisher.stop(settings.events.shutdown_timeout)
+    for provider in (state.tracer_provider, state.meter_provider):
+        if provider is not None:
+            provider.shutdown()
+    await redis_cache.close_redis()
+    await db_session.close_db()
+    # Drop this worker's live gauges from the multiprocess metrics
+    mark_process_dead(os.getpid())
@@ -1,39 +1,249 @@
 # core/tracing.py
-from opentelemetry import trace
+#
+# Tracing profile is driven by TracingSettings (TRACING_* variables):
+# - mode "off" (the default without an OTLP endpoint) installs nothing, so
+#   requests pay no tracing cost at all,
+# - new traces are head-sampled at TRACING_SAMPLE_RATIO; upstream sampling
+#   decisions are honoured (parent-based),
+# - with TRACING_TAIL_SAMPLING, unsampled traces are still recorded in memory
+#   and exported when they end in an error or exceed
+#   TRACING_SLOW_THRESHOLD_MS; the rest are dropped at the local root span,
+# - TRACING_EXCLUDED_URLS (health probes by default) are never traced.
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from app.core.config import TracingSettings, settings
+from opentelemetry import metrics, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import (
+    ALWAYS_OFF,
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
 
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
 
+# Spans buffered per unsampled trace before the rest are dropped
+MAX_SPANS_PER_TRACE = 512
+
+
+class RecordOnlySampler(Sampler):
+    """Record spans without sampling them (candidates for tail sampling)."""
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ) -> SamplingResult:
+        return SamplingResult(Decision.RECORD_ONLY, attributes, trace_state)
+
+    def get_description(self) -> str:
+        return "RecordOnlySampler"
+
+
+class TailAwareRatioSampler(TraceIdRatioBased):
+    """Ratio sampler that records, instead of dropping, unsampled traces."""
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ) -> SamplingResult:
+        result = super().should_sample(
+            parent_context, trace_id, name, kind, attributes, links, trace_state
+        )
+        if result.decision is Decision.DROP:
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return f"TailAwareRatioSampler{{{self.rate}}}"
+
+
+def build_sampler(ratio: float, tail_sampling: bool) -> Sampler:
+    if not tail_sampling:
+        return ParentBased(TraceIdRatioBased(ratio))
+    return ParentBased(
+        TailAwareRatioSampler(ratio),
+        # keep recording below a locally unsampled root; an upstream
+        # "not sampled" decision still drops the whole trace
+        local_parent_not_sampled=RecordOnlySampler(),
+        remote_parent_not_sampled=ALWAYS_OFF,
+    )
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy of ``span`` flagged as sampled, so exporters accept it."""
+    context = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            context.trace_id,
+            context.span_id,
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.SAMPLED),
+            trace_state=context.trace_state,
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Forward sampled spans; buffer unsampled ones until their local root ends
+    and forward the whole trace only if it errored or was slow.
+    """
+
+    def __init__(
+        self, delegate: SpanProcessor, slow_threshold_ms: float, max_traces: int
+    ) -> None:
+        self.delegate = delegate
+        self.slow_ns = int(slow_threshold_ms * 1_000_000)
+        self.max_traces = max_traces
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span, parent_context: Optional[Context] = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        context = span.context
+        if context.trace_flags.sampled:
+            self.delegate.on_end(span)
+            return
+
+        is_local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            if not is_local_root:
+                buffered = self._pending.setdefault(context.trace_id, [])
+                if len(buffered) < MAX_SPANS_PER_TRACE:
+                    buffered.append(span)
+                if len(self._pending) > self.max_traces:
+                    self._pending.popitem(last=False)
+                return
+            spans = self._pending.pop(context.trace_id, [])
+        spans.append(span)
+        if self._keep(span, spans):
+            for buffered_span in spans:
+                self.delegate.on_end(_as_sampled(buffered_span))
+
+    def _keep(self, root: ReadableSpan, spans: Sequence[ReadableSpan]) -> bool:
+        if (root.end_time or 0) - (root.start_time or 0) >= self.slow_ns:
+            return True
+        return any(s.status.status_code is StatusCode.ERROR for s in spans)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+def init_tracing(
+    service_name: str = "ima-service",
+    otlp_endpoint: str | None = None,
+    config: TracingSettings | None = None,
+):
+    cfg = config or settings.tracing
+    mode = cfg.mode
+    if mode == "auto":
+        mode = "otlp" if otlp_endpoint else "off"
+    if mode == "off":
+        # No provider, no instrumentation: zero per-request overhead
+        return None
 
-def init_tracing(service_name: str = "ima-service", otlp_endpoint: str | None = None):
     resource = Resource.create({"service.name": service_name})
-    provider = TracerProvider(resource=resource)
+    tail_sampling = cfg.tail_sampling and cfg.sample_ratio < 1.0
+    provider = TracerProvider(
+        resource=resource, sampler=build_sampler(cfg.sample_ratio, tail_sampling)
+    )
+
+    exporter = (
+        OTLPSpanExporter(endpoint=otlp_endpoint)
+        if mode == "otlp"
+        else ConsoleSpanExporter()
+    )
+    processor: SpanProcessor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=cfg.max_queue_size,
+        schedule_delay_millis=cfg.schedule_delay_ms,
+        max_export_batch_size=cfg.max_export_batch_size,
+        export_timeout_millis=cfg.export_timeout_ms,
+    )
+    if tail_sampling:
+        processor = TailSamplingSpanProcessor(
+            processor, cfg.slow_threshold_ms, cfg.tail_max_traces
+        )
+    provider.add_span_processor(processor)
     trace.set_tracer_provider(provider)
 
-    # Export to OTLP if endpoint is given, otherwise just log to console
-    if otlp_endpoint:
-        otlp_exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
-        provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
-    else:
-        console_exporter = ConsoleSpanExporter()
-        provider.add_span_processor(BatchSpanProcessor(console_exporter))
+    # Attach trace/span IDs to log records, leaving the log format alone
+    if cfg.log_correlation:
+        LoggingInstrumentor().instrument(set_logging_format=False)
+
+    return provider
+
 
-    # Attach trace/span IDs to logs
-    LoggingInstrumentor().instrument(set_logging_format=True)
+def init_metrics(service_name: str = "ima-service", otlp_endpoint: str | None = None):
+    # Without an endpoint the global no-op MeterProvider is kept; instruments
+    # such as the DB pool gauges then cost nothing.
+    if not otlp_endpoint:
+        return None
 
+    resource = Resource.create({"service.name": service_name})
+    # OTLPMetricExporter reads OTEL_EXPORTER_OTLP_ENDPOINT and appends /v1/metrics
+    reader = PeriodicExportingMetricReader(OTLPMetricExporter())
+    provider = MeterProvider(resource=resource, metric_readers=[reader])
+    metrics.set_meter_provider(provider)
     return provider
 
 
-def instrument_fastapi(app, tracer_provider=None):
-    FastAPIInstrumentor.instrument_app(app, tracer_provider=tracer_provider)
+def instrument_fastapi(
+    app, tracer_provider=None, config: TracingSettings | None = None
+):
+    cfg = config or settings.tracing
+    FastAPIInstrumentor.instrument_app(
+        app,
+        tracer_provider=tracer_provider,
+        excluded_urls=cfg.excluded_urls or None,
+        exclude_spans=["receive", "send"] if cfg.exclude_asgi_io_spans else None,
+    )
 
 
-def instrument_sqlalchemy(engine):
+def instrument_sqlalchemy(*engines):
     SQLAlchemyInstrumentor().instrument(
-        engine=engine if not hasattr(engine, "sync_engine") else engine.sync_engine
+        engines=[getattr(engine, "sync_engine", engine) for engine in engines]
     )
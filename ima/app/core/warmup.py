@@ -0,0 +1,116 @@
+"""
+Startup warm-up for database and Redis connections.
+
+Run by the lifespan (``app.core.state``) before readiness reports OK, so
+the first requests after a deploy do not pay for it:
+
+* ``warm_database`` opens ``WARMUP_DB_CONNECTIONS`` (default
+  ``DB_POOL_MIN``) pooled connections at once - TLS handshake and auth
+  included - and runs the known user lookups on each of them. That fills
+  SQLAlchemy's compiled-statement cache (shared by the engine) and
+  asyncpg's prepared-statement cache (per connection). The connections
+  then go back to the pool.
+* ``warm_redis`` opens ``WARMUP_REDIS_CONNECTIONS`` pooled Redis
+  connections with concurrent PINGs.
+
+Lookups use keys that match no row; only read statements are run.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from app.db.users import crud
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_NO_UID = uuid.UUID(int=0)
+_NO_EMAIL = "warmup@invalid"
+_NO_CURSOR = crud.encode_cursor(datetime(1970, 1, 1, tzinfo=timezone.utc), _NO_UID)
+
+# One call per distinct statement shape used on the request path
+WARMUP_QUERIES: Tuple[Callable[[AsyncSession], Awaitable[Any]], ...] = (
+    lambda db: crud.get_user_by_uid(db, _NO_UID),
+    lambda db: crud.get_user_by_email(db, _NO_EMAIL),
+    lambda db: crud.get_credentials_by_email(db, _NO_EMAIL),
+    lambda db: crud.list_users(db, limit=1),
+    lambda db: crud.list_users(db, limit=1, cursor=_NO_CURSOR),
+    lambda db: crud.list_users(db, limit=1, active_only=True),
+    lambda db: crud.list_users(db, limit=1, cursor=_NO_CURSOR, active_only=True),
+)
+
+
+async def _open(engine: AsyncEngine) -> AsyncConnection:
+    return await engine.connect().start()
+
+
+async def _prime(conn: AsyncConnection) -> None:
+    async with AsyncSession(bind=conn) as session:
+        for query in WARMUP_QUERIES:
+            await query(session)
+
+
+async def warm_database(engine: AsyncEngine, connections: int) -> Dict[str, Any]:
+    """Open ``connections`` connections together and prime their caches."""
+    start = time.perf_counter()
+    opened = await asyncio.gather(
+        *(_open(engine) for _ in range(connections)), return_exceptions=True
+    )
+    conns: List[AsyncConnection] = []
+    for result in opened:
+        if isinstance(result, BaseException):
+            logger.warning("Warm-up connection failed: %s", result)
+        else:
+            conns.append(result)
+    if connections and not conns:
+        raise next(r for r in opened if isinstance(r, BaseException))
+    try:
+        await asyncio.gather(*(_prime(conn) for conn in conns))
+    finally:
+        # Back to the pool, kept open up to DB_POOL_MIN
+        for conn in conns:
+            await conn.close()
+    return {
+        "connections": len(conns),
+        "statements": len(WARMUP_QUERIES),
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+async def warm_redis(client: Any, connections: int) -> Dict[str, Any]:
+    """Open ``connections`` Redis connections with concurrent PINGs."""
+    start = time.perf_counter()
+    # Each in-flight command holds its own pooled connection
+    await asyncio.gather(*(client.ping() for _ in range(connections)))
+    return {
+        "connections": connections,
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+async def warm_up(
+    engine: AsyncEngine,
+    redis: Any,
+    db_connections: int,
+    redis_connections: int,
+) -> Dict[str, Any]:
+    """Warm the database and Redis concurrently; failures are reported."""
+    names = ("database", "redis")
+    results = await asyncio.gather(
+        warm_database(engine, db_connections),
+        warm_redis(redis, redis_connections),
+        return_exceptions=True,
+    )
+    report: Dict[str, Any] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            logger.warning("Warm-up of %s failed: %s", name, result)
+            report[name] = {"error": str(result)}
+        else:
+            report[name] = result
+    logger.info("Warm-up finished: %s", report)
+    return report
@@ -0,0 +1,49 @@
+"""
+FILE : app/db/events/crud.py
+Async repository for the ``auth_events`` table.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Sequence
+
+from app.db.events.models import AuthEvent
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def event_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A table row from a published event (``app.services.events.make_event``).
+
+    Raises
+    ------
+    KeyError, TypeError, ValueError
+        If the event is malformed.
+    """
+    actor = event.get("actor")
+    return {
+        "id": uuid.UUID(event["id"]),
+        "type": str(event["type"]),
+        "occurred_at": datetime.fromisoformat(event["occurred_at"]),
+        "actor": uuid.UUID(actor) if actor else None,
+        "tenant": event.get("tenant"),
+        "data": dict(event.get("data") or {}),
+    }
+
+
+async def insert_events(db: AsyncSession, rows: Sequence[Dict[str, Any]]) -> int:
+    """
+    Insert event rows with multi-row INSERTs, skipping ids already stored.
+
+    Redelivered events are therefore stored once. Returns the number of
+    rows inserted. The caller commits.
+    """
+    if not rows:
+        return 0
+    stmt = (
+        pg_insert(AuthEvent)
+        .on_conflict_do_nothing(index_elements=[AuthEvent.id])
+        .returning(AuthEvent.id)
+    )
+    return len((await db.execute(stmt, list(rows))).all())
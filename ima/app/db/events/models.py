@@ -0,0 +1,54 @@
+"""
+FILE : app/db/events/models.py
+Auth and audit event log, written by the event consumer.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from app.db.base import Base
+from sqlalchemy import DateTime, Index, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class AuthEvent(Base):  # pylint: disable=too-few-public-methods
+    """One auth or audit event (see ``app.services.events``)."""
+
+    __tablename__ = "auth_events"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        primary_key=True,
+        doc="Event id assigned by the publisher (deduplicates redeliveries)",
+    )
+    type: Mapped[str] = mapped_column(String, nullable=False, doc="Event type")
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, doc="When the event happened"
+    )
+    actor: Mapped[uuid.UUID | None] = mapped_column(
+        PG_UUID(as_uuid=True), nullable=True, doc="User the event is about"
+    )
+    tenant: Mapped[str | None] = mapped_column(
+        String, nullable=True, doc="Tenant the event belongs to"
+    )
+    data: Mapped[Dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, default=dict, doc="Event-specific payload"
+    )
+    recorded_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        doc="When the consumer stored the event",
+    )
+
+    def __repr__(self) -> str:
+        """Return a human-readable representation of the event."""
+        return f"<AuthEvent {self.type} {self.id}>"
+
+
+# Audit queries: recent events, and a user's history
+Index("ix_auth_events_occurred_at", AuthEvent.occurred_at)
+Index("ix_auth_events_actor_occurred_at", AuthEvent.actor, AuthEvent.occurred_at)
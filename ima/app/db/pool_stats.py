@@ -0,0 +1,178 @@
+"""
+File : app / db / pool_stats.py
+Connection-pool instrumentation for the async SQLAlchemy engines.
+
+``InstrumentedAsyncQueuePool`` is a drop-in ``poolclass`` that times
+checkouts (how long a request waited for a connection) and new
+connections (TCP + TLS + startup). Live pool gauges and both histograms
+are exported as OpenTelemetry and Prometheus metrics and are available as
+a plain dict through ``pool_snapshot`` for the internal stats endpoint.
+
+The Prometheus connection gauges are updated on checkout and checkin, in
+the worker that owns the pool, so multiprocess scrapes can sum them.
+"""
+
+import bisect
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.core.metrics import DB_POOL_CONNECT, DB_POOL_CONNECTIONS, DB_POOL_WAIT
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    1,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the histogram as a JSON-serialisable dict."""
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PoolStats:
+    """Histograms collected for a single named pool."""
+
+    def __init__(self) -> None:
+        self.wait_ms = LatencyHistogram()
+        self.connect_ms = LatencyHistogram()
+
+
+# Pools and their stats, keyed by pool logging name ("primary", "replica1", ...)
+_POOLS: Dict[str, "InstrumentedAsyncQueuePool"] = {}
+_STATS: Dict[str, PoolStats] = {}
+
+_meter = metrics.get_meter("app.db.pool")
+_wait_histogram = _meter.create_histogram(
+    "db.pool.wait_time", unit="ms", description="Time spent waiting for a connection"
+)
+_connect_histogram = _meter.create_histogram(
+    "db.pool.connect_time", unit="ms", description="Time to open a new connection"
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait and connect latency."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool_name = self._orig_logging_name or "default"
+        self.stats = _STATS.setdefault(self.pool_name, PoolStats())
+        # recreate() (engine.dispose) builds a new pool under the same name
+        _POOLS[self.pool_name] = self
+
+        self._prom_wait = DB_POOL_WAIT.labels(self.pool_name)
+        self._prom_connect = DB_POOL_CONNECT.labels(self.pool_name)
+        self._prom_gauges = {
+            state: DB_POOL_CONNECTIONS.labels(self.pool_name, state)
+            for state in ("checked_in", "checked_out", "overflow")
+        }
+
+    def _publish_gauges(self) -> None:
+        self._prom_gauges["checked_in"].set(self.checkedin())
+        self._prom_gauges["checked_out"].set(self.checkedout())
+        self._prom_gauges["overflow"].set(max(self.overflow(), 0))
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.wait_ms.observe(elapsed * 1000)
+            _wait_histogram.record(elapsed * 1000, {"pool": self.pool_name})
+            self._prom_wait.observe(elapsed)
+            self._publish_gauges()
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._publish_gauges()
+
+    def _create_connection(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.connect_ms.observe(elapsed * 1000)
+            _connect_histogram.record(elapsed * 1000, {"pool": self.pool_name})
+            self._prom_connect.observe(elapsed)
+
+
+def _gauges(pool: InstrumentedAsyncQueuePool) -> Dict[str, int]:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,  # pylint: disable=protected-access
+    }
+
+
+def pool_snapshot() -> Dict[str, Any]:
+    """Return live gauges and latency histograms for every registered pool."""
+    return {
+        name: {
+            **_gauges(pool),
+            "wait_ms": pool.stats.wait_ms.snapshot(),
+            "connect_ms": pool.stats.connect_ms.snapshot(),
+        }
+        for name, pool in _POOLS.items()
+    }
+
+
+def _observe(key: str):
+    def callback(_options: CallbackOptions) -> Iterable[Observation]:
+        return [
+            Observation(_gauges(pool)[key], {"pool": name})
+            for name, pool in list(_POOLS.items())
+        ]
+
+    return callback
+
+
+for _key in ("size", "checked_in", "checked_out", "overflow"):
+    _meter.create_observable_gauge(
+        f"db.pool.{_key}",
+        callbacks=[_observe(_key)],
+        unit="connections",
+        description=f"Connection pool {_key.replace('_', ' ')}",
+    )
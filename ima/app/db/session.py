@@ -4,29 +4,279 @@ Async SQLAlchemy session for PostgreSQL using asyncpg.
 
 Provides an async engine, session factory, and a dependency generator
 with error handling for FastAPI endpoints.
+
+When ``DB_REPLICA1_HOST`` / ``DB_REPLICA2_HOST`` are configured, a pooled
+engine is created per read replica and ``get_read_db`` hands out sessions
+bound to a replica chosen round-robin. Replicas whose replication lag
+exceeds ``DB_REPLICA_MAX_LAG`` (or that cannot be reached) are skipped
+until they recover, falling back to the primary when none is usable.
+
+``get_tenant_db`` scopes a session to the requesting tenant's schema
+(see ``app.db.tenancy``).
+
+Nothing is created at import: ``init_db`` (called by the app lifespan, or
+on first use outside the app) builds the engines and ``close_db`` disposes
+of them.
 """
 
-from collections.abc import AsyncGenerator
+import asyncio
+import itertools
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 from app.core.config import settings
-from fastapi import HTTPException, status
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
-
-# Async engine for PostgreSQL/NeonDB
-engine = create_async_engine(
-    settings.database.uri,
-    echo=True,
-    connect_args={"ssl": "require"},
+from app.db.pool_stats import InstrumentedAsyncQueuePool
+from app.db.tenancy import (
+    InvalidTenant,
+    TenantDirectory,
+    UnknownTenant,
+    fetch_tenant_schemas,
+    reset_search_path,
+    search_path,
+    set_local_search_path,
+    set_search_path,
+)
+from fastapi import HTTPException, Request, status
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
 )
 
-# Async session factory with proper typing
-AsyncSessionLocal: async_sessionmaker[AsyncSession] = async_sessionmaker(
-    bind=engine,
-    expire_on_commit=False,
+# Replication lag in seconds; zero when the replica has replayed all WAL it
+# received (an idle primary would otherwise look like a lagging replica).
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+    "pg_last_xact_replay_timestamp()), 0) END"
 )
 
 
+def _create_engine(uri: str, name: str) -> AsyncEngine:
+    """
+    Create an async engine with the shared connection and pool options.
+
+    DB_POOL_MIN connections are kept open; up to DB_POOL_MAX in total are
+    allowed under load (the difference is SQLAlchemy's overflow). Compiled
+    statements (DB_QUERY_CACHE_SIZE, per engine) and asyncpg prepared
+    statements (DB_PREPARED_STATEMENT_CACHE_SIZE, per connection) are cached.
+    """
+    db = settings.database
+    return create_async_engine(
+        uri,
+        echo=db.echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_logging_name=name,
+        pool_size=db.pool_min,
+        max_overflow=max(db.pool_max - db.pool_min, 0),
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+        query_cache_size=db.query_cache_size,
+        connect_args={
+            "ssl": "require",
+            "prepared_statement_cache_size": db.prepared_statement_cache_size,
+        },
+    )
+
+
+def _replica_uri(host: str) -> str:
+    """Build a replica URI by swapping the host (and optional port) of DB_URI."""
+    url = make_url(settings.database.uri)
+    hostname, _, port = host.partition(":")
+    url = url.set(host=hostname)
+    if port:
+        url = url.set(port=int(port))
+    return url.render_as_string(hide_password=False)
+
+
+# Async engine for PostgreSQL/NeonDB and its session factory (see init_db)
+engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+@dataclass
+class ReplicaState:
+    """Routing state for a single read replica."""
+
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker[AsyncSession]
+    lag: float = 0.0
+    checked_at: float = float("-inf")
+    down_until: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ReplicaRouter:
+    """
+    Round-robin replica selection with lag-aware fallback to the primary.
+
+    Lag is sampled lazily: a replica is re-checked at most once per
+    ``lag_check_interval`` seconds, by a single caller, while concurrent
+    callers keep using the last known value.
+    """
+
+    def __init__(
+        self,
+        replicas: List[ReplicaState],
+        max_lag: float,
+        lag_check_interval: float,
+        retry_after: float,
+    ) -> None:
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.retry_after = retry_after
+        self._cycle = itertools.cycle(replicas) if replicas else None
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        """Engines of all configured replicas."""
+        return [replica.engine for replica in self.replicas]
+
+    def _usable(self, replica: ReplicaState, now: float) -> bool:
+        return now >= replica.down_until and replica.lag <= self.max_lag
+
+    async def _refresh_lag(self, replica: ReplicaState) -> None:
+        """Re-sample replication lag, marking the replica down on failure."""
+        if replica.lock.locked():
+            return
+        async with replica.lock:
+            now = time.monotonic()
+            if now - replica.checked_at < self.lag_check_interval:
+                return
+            replica.checked_at = now
+            try:
+                async with replica.engine.connect() as conn:
+                    lag = await asyncio.wait_for(
+                        conn.scalar(REPLICA_LAG_SQL), self.lag_check_interval
+                    )
+                replica.lag = float(lag or 0.0)
+            except Exception:  # pylint: disable=broad-except
+                replica.down_until = time.monotonic() + self.retry_after
+
+    async def pick(self) -> Optional[ReplicaState]:
+        """Return the next usable replica, or None to use the primary."""
+        if self._cycle is None:
+            return None
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            now = time.monotonic()
+            if now < replica.down_until:
+                continue
+            if now - replica.checked_at >= self.lag_check_interval:
+                await self._refresh_lag(replica)
+            if self._usable(replica, time.monotonic()):
+                return replica
+        return None
+
+    async def sessionmaker(self) -> async_sessionmaker[AsyncSession]:
+        """Session factory for the next read: a replica or the primary."""
+        replica = await self.pick()
+        return replica.sessionmaker if replica else get_sessionmaker()
+
+
+def _build_replica_router() -> ReplicaRouter:
+    db = settings.database
+    replicas: List[ReplicaState] = []
+    for name, host in (("replica1", db.replica1_host), ("replica2", db.replica2_host)):
+        if not host:
+            continue
+        replica_engine = _create_engine(_replica_uri(host), name)
+        replicas.append(
+            ReplicaState(
+                name=name,
+                engine=replica_engine,
+                sessionmaker=async_sessionmaker(
+                    bind=replica_engine, expire_on_commit=False
+                ),
+            )
+        )
+    return ReplicaRouter(
+        replicas,
+        max_lag=db.replica_max_lag,
+        lag_check_interval=db.replica_lag_check_interval,
+        retry_after=db.replica_retry_after,
+    )
+
+
+def _no_replicas() -> ReplicaRouter:
+    return ReplicaRouter([], max_lag=0.0, lag_check_interval=0.0, retry_after=0.0)
+
+
+# Read-replica router (no replicas configured -> every read uses the primary)
+replica_router = _no_replicas()
+
+
+def init_db() -> AsyncEngine:
+    """
+    Create the primary engine, session factory and replica engines.
+
+    Idempotent; a session factory installed beforehand (tests, the stand-in
+    server) is kept. Creating an engine does not connect.
+    """
+    global engine, AsyncSessionLocal, replica_router  # pylint: disable=global-statement
+    if engine is None:
+        engine = _create_engine(settings.database.uri, "primary")
+        replica_router = _build_replica_router()
+    if AsyncSessionLocal is None:
+        AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    return engine
+
+
+async def close_db() -> None:
+    """Dispose every engine's pool and forget them (app shutdown)."""
+    global engine, AsyncSessionLocal, replica_router  # pylint: disable=global-statement
+    if engine is None:
+        return
+    for pooled in (engine, *replica_router.engines):
+        await pooled.dispose()
+    engine = None
+    AsyncSessionLocal = None
+    replica_router = _no_replicas()
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Primary session factory, creating the engine on first use."""
+    if AsyncSessionLocal is None:
+        init_db()
+    return AsyncSessionLocal  # type: ignore[return-value]
+
+
+def _build_tenant_directory() -> TenantDirectory:
+    cfg = settings.tenancy
+    return TenantDirectory(
+        lambda: fetch_tenant_schemas(init_db(), cfg.schema_prefix),
+        refresh_interval=cfg.directory_refresh_interval,
+        min_refresh_interval=cfg.directory_min_refresh_interval,
+    )
+
+
+# Existing tenant schemas (only consulted when TENANCY_ENABLED)
+tenant_directory = _build_tenant_directory()
+
+
+async def _scope_session(session: AsyncSession, path: str) -> None:
+    if settings.tenancy.search_path_scope == "transaction":
+        set_local_search_path(session, path)
+    else:
+        await set_search_path(await session.connection(), path)
+
+
+def _unscope_session(session: AsyncSession) -> None:
+    """Put connections last used by a tenant back on the shared schema."""
+    cfg = settings.tenancy
+    if cfg.enabled and cfg.search_path_scope == "session":
+        reset_search_path(session, search_path(cfg.shared_schema))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Yield an async database session.
@@ -37,11 +287,94 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         If the database session could not be created.
     """
     try:
-        async with AsyncSessionLocal() as session:
+        async with get_sessionmaker()() as session:
+            _unscope_session(session)
             yield session
+    except HTTPException:
+        raise
     except Exception as exc:
         # Optional: add logging here
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database connection error: {exc}",
         ) from exc
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    A session for read-only queries, outside FastAPI's dependencies.
+
+    Bound to a healthy read replica when one is configured, otherwise to
+    the primary. Open it inside a streamed response body: dependency
+    sessions may be closed before the body is sent.
+    """
+    session_factory = await replica_router.sessionmaker()
+    async with session_factory() as session:
+        _unscope_session(session)
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield an async session for read-only queries (see ``read_session``).
+
+    Never use it for writes.
+
+    Raises
+    ------
+    HTTPException
+        If the database session could not be created.
+    """
+    try:
+        async with read_session() as session:
+            yield session
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database connection error: {exc}",
+        ) from exc
+
+
+async def get_tenant_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield an async session scoped to the requesting tenant's schema.
+
+    The tenant is read from the ``TENANT_HEADER`` header. Without
+    ``TENANCY_ENABLED`` this is a plain primary session.
+
+    Raises
+    ------
+    HTTPException
+        400 for a missing or malformed tenant id, 404 for an unknown
+        tenant, 500 if the database session could not be created.
+    """
+    cfg = settings.tenancy
+    try:
+        path = None
+        if cfg.enabled:
+            schema = await tenant_directory.resolve(
+                request.headers.get(cfg.header), cfg.schema_prefix
+            )
+            path = search_path(schema, cfg.shared_schema)
+        async with get_sessionmaker()() as session:
+            if path is not None:
+                await _scope_session(session, path)
+            yield session
+    except InvalidTenant as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+    except UnknownTenant as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)
+        ) from exc
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database connection error: {exc}",
+        ) from exc
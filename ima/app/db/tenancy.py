@@ -0,0 +1,203 @@
+"""
+Schema-per-tenant routing for IMA service.
+
+Each tenant lives in its own PostgreSQL schema (``TENANT_SCHEMA_PREFIX`` +
+tenant id, e.g. ``tenant_acme``). ``app.db.session.get_tenant_db`` reads
+the tenant from the ``TENANT_HEADER`` request header, checks that its
+schema exists (``TenantDirectory``, no query per request) and hands out a
+session whose ``search_path`` is the tenant's schema followed by
+``TENANT_SHARED_SCHEMA``.
+
+Setting the path is a round trip, so with ``TENANT_SEARCH_PATH_SCOPE=
+session`` each pooled connection is tagged, in its pool entry's ``info``,
+with the path it was last given: a checkout skips the ``SET`` when the
+connection is already on that tenant, and the tag is dropped with the
+connection. The ``SET`` goes straight to the driver before the session's
+first statement, outside any transaction, so a rollback cannot undo it
+behind the tag's back. When tenancy is enabled, ``get_db`` /
+``get_read_db`` put tagged connections back on the shared schema the
+same way, but only once the session takes a connection: sessions that
+never query (e.g. a permission check served from cache) check nothing
+out.
+
+Behind a transaction-pooling PgBouncer a session-level setting does not
+stay with the client connection; ``TENANT_SEARCH_PATH_SCOPE=transaction``
+issues ``SET LOCAL`` at the start of every transaction instead.
+
+Tenant schemas are created and migrated by ``alembic -x tenants=...``
+(see ``alembic/env.py``).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.util import await_only
+
+logger = logging.getLogger(__name__)
+
+# Key of the search_path tag in the pool entry's info dictionary
+SEARCH_PATH_KEY = "ima_search_path"
+
+# PostgreSQL truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+TENANT_SCHEMAS_SQL = text(
+    "SELECT nspname FROM pg_namespace WHERE starts_with(nspname, :prefix)"
+)
+
+_TENANT_ID = re.compile(r"[a-z0-9][a-z0-9_]*")
+
+
+class InvalidTenant(ValueError):
+    """Missing or malformed tenant id; map to HTTP 400."""
+
+
+class UnknownTenant(LookupError):
+    """No schema exists for the tenant; map to HTTP 404."""
+
+
+def schema_for(tenant_id: Optional[str], prefix: str) -> str:
+    """
+    Schema name for ``tenant_id``.
+
+    Only lowercase letters, digits and underscores are accepted, so the
+    result can be quoted into SQL as an identifier.
+
+    Raises
+    ------
+    InvalidTenant
+        If the id is missing, malformed or makes the name too long.
+    """
+    tenant = (tenant_id or "").strip().lower()
+    schema = f"{prefix}{tenant}"
+    if not _TENANT_ID.fullmatch(tenant) or len(schema) > MAX_IDENTIFIER_LENGTH:
+        raise InvalidTenant(f"Invalid tenant id {tenant_id!r}")
+    return schema
+
+
+def search_path(*schemas: str) -> str:
+    """``search_path`` value with each schema quoted as an identifier."""
+    return ", ".join('"{}"'.format(schema.replace('"', '""')) for schema in schemas)
+
+
+async def set_search_path(conn: AsyncConnection, path: str) -> bool:
+    """
+    Point a checked-out connection at ``path`` unless it is already there.
+
+    Must run before the connection's first statement in the session.
+    Returns whether a ``SET`` was sent.
+    """
+    info = conn.info
+    if info.get(SEARCH_PATH_KEY) == path:
+        return False
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    if driver.is_in_transaction():
+        # A transactional SET would revert on rollback and leave a stale tag
+        raise RuntimeError("search_path must be set before the first statement")
+    await driver.execute(f"SET search_path TO {path}")
+    info[SEARCH_PATH_KEY] = path
+    return True
+
+
+def set_local_search_path(session: AsyncSession, path: str) -> None:
+    """``SET LOCAL search_path`` at the start of each of the session's transactions."""
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def _set_local(_session, _transaction, connection):  # type: ignore[no-untyped-def]
+        connection.exec_driver_sql(f"SET LOCAL search_path TO {path}")
+
+
+def reset_search_path(session: AsyncSession, path: str) -> None:
+    """
+    Point each connection the session takes at ``path`` unless it is there.
+
+    Runs at the start of the session's transactions, before their first
+    statement, so no connection is checked out for it.
+    """
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def _reset(_session, _transaction, connection):  # type: ignore[no-untyped-def]
+        info = connection.info
+        if info.get(SEARCH_PATH_KEY) == path:
+            return
+        driver = connection.connection.driver_connection
+        if driver.is_in_transaction():
+            raise RuntimeError("search_path must be set before the first statement")
+        # Session events run in SQLAlchemy's greenlet, which can await the driver
+        await_only(driver.execute(f"SET search_path TO {path}"))
+        info[SEARCH_PATH_KEY] = path
+
+
+async def fetch_tenant_schemas(engine: AsyncEngine, prefix: str) -> List[str]:
+    """Names of the existing schemas starting with ``prefix``."""
+    async with engine.connect() as conn:
+        result = await conn.execute(TENANT_SCHEMAS_SQL, {"prefix": prefix})
+        return list(result.scalars())
+
+
+class TenantDirectory:
+    """
+    Tenant schemas known to exist, re-listed periodically and on a miss.
+
+    An unknown schema triggers a re-list at most once per
+    ``min_refresh_interval`` seconds, so a new tenant is found quickly
+    while requests for bogus tenants cannot hammer the catalog.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Iterable[str]]],
+        refresh_interval: float,
+        min_refresh_interval: float,
+    ) -> None:
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._schemas: FrozenSet[str] = frozenset()
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        """Re-list the tenant schemas (once for concurrent callers)."""
+        seen = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != seen:
+                return
+            try:
+                self._schemas = frozenset(await self._fetch())
+            except Exception as exc:  # pylint: disable=broad-except
+                if seen == float("-inf"):
+                    raise
+                # Keep the list we have; retried after min_refresh_interval
+                logger.warning("Tenant schema refresh failed: %s", exc)
+            self._fetched_at = time.monotonic()
+
+    async def exists(self, schema: str) -> bool:
+        """Whether ``schema`` exists, re-listing when stale or unknown."""
+        age = time.monotonic() - self._fetched_at
+        unknown = schema not in self._schemas and age > self.min_refresh_interval
+        if age > self.refresh_interval or unknown:
+            await self.refresh()
+        return schema in self._schemas
+
+    async def resolve(self, tenant_id: Optional[str], prefix: str) -> str:
+        """
+        Schema of an existing tenant.
+
+        Raises
+        ------
+        InvalidTenant
+            If the id is missing or malformed.
+        UnknownTenant
+            If no schema exists for it.
+        """
+        schema = schema_for(tenant_id, prefix)
+        if not await self.exists(schema):
+            raise UnknownTenant(f"Unknown tenant {tenant_id!r}")
+        return schema
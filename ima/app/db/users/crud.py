@@ -0,0 +1,443 @@
+"""
+FILE : app/db/users/crud.py
+Async repository for the ``users`` table.
+
+Designed for throughput:
+
+* lookups select only the needed columns and return plain pydantic
+  projections, skipping ORM hydration and the identity map,
+* bulk creation uses multi-row ``INSERT ... ON CONFLICT DO NOTHING``
+  (SQLAlchemy "insertmanyvalues" batching) or asyncpg ``COPY``, directly
+  or through a staging table merged in one statement (imports),
+* bulk updates send all uids as one array parameter,
+* listing uses keyset pagination on ``(created_at, uid)`` instead of OFFSET,
+* exports stream plain rows through a server-side cursor.
+
+Writers record the users they touch on the session; ``commit`` evicts
+their cached lookups once the transaction is durable. Callers add inserted
+emails to the registered-email filter (``app.services.email_filter``) and
+revoke deactivated users' sessions: this module does not depend on the
+service layer.
+
+Read functions take any ``AsyncSession``; pass one from ``get_read_db`` to
+serve them from a read replica.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.cache import cache
+from app.db.users.models import User, UserRole
+from app.db.users.schemas import UserCreate, UserCredentials, UserPage, UserRecord
+from sqlalchemy import Row, any_, bindparam, func, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Column projections
+USER_RECORD_COLUMNS = (
+    User.uid,
+    User.username,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.role,
+    User.is_active,
+    User.is_verified,
+    User.is_superuser,
+    User.created_at,
+)
+USER_CREDENTIAL_COLUMNS = (
+    User.uid,
+    User.email,
+    User.hashed_password,
+    User.role,
+    User.is_active,
+    User.is_superuser,
+)
+# Column order used for COPY
+COPY_COLUMNS = (
+    "uid",
+    "username",
+    "first_name",
+    "last_name",
+    "is_verified",
+    "email",
+    "hashed_password",
+    "role",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+)
+
+# Session-local staging table for imports: COPY_COLUMNS plus the source line
+IMPORT_TABLE = "users_import"
+IMPORT_COLUMNS = COPY_COLUMNS + ("line",)
+
+_UID_ARRAY = ARRAY(PG_UUID(as_uuid=True))
+# Matches the ux_users_email_lower unique index
+_EMAIL_KEY = func.lower(User.email)
+
+
+# --- Lookups ---
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[UserRecord]:
+    """Return the user with ``email`` (case-insensitive) or None."""
+    stmt = select(*USER_RECORD_COLUMNS).where(_EMAIL_KEY == email.lower())
+    row = (await db.execute(stmt)).mappings().first()
+    # Rows come straight from the database: skip re-validation
+    return UserRecord.model_construct(**row) if row else None
+
+
+async def get_user_by_uid(db: AsyncSession, uid: uuid.UUID) -> Optional[UserRecord]:
+    """Return the user with primary key ``uid`` or None."""
+    stmt = select(*USER_RECORD_COLUMNS).where(User.uid == uid)
+    row = (await db.execute(stmt)).mappings().first()
+    return UserRecord.model_construct(**row) if row else None
+
+
+async def get_credentials_by_email(
+    db: AsyncSession, email: str
+) -> Optional[UserCredentials]:
+    """Return the fields needed to authenticate ``email`` or None."""
+    stmt = select(*USER_CREDENTIAL_COLUMNS).where(_EMAIL_KEY == email.lower())
+    row = (await db.execute(stmt)).mappings().first()
+    return UserCredentials.model_construct(**row) if row else None
+
+
+# Read-through cached variants; entries are invalidated by ``commit`` after
+# the writers below. Credentials are deliberately never cached.
+_get_user_by_email_cached = cache.cached(model=UserRecord)(get_user_by_email)
+get_user_by_uid_cached = cache.cached(model=UserRecord)(get_user_by_uid)
+
+
+async def get_user_by_email_cached(
+    db: AsyncSession, email: str
+) -> Optional[UserRecord]:
+    """Cached ``get_user_by_email``; keyed on the lowercased email."""
+    return await _get_user_by_email_cached(db, email.lower())
+
+
+async def invalidate_users(rows: Iterable[Tuple[uuid.UUID, str]]) -> None:
+    """Evict cached lookups, including cached misses, for (uid, email) pairs."""
+    keys: List[str] = []
+    for uid, email in rows:
+        keys.append(cache.key_for_call(get_user_by_uid, (None, uid), {}))
+        keys.append(cache.key_for_call(get_user_by_email, (None, email.lower()), {}))
+    await cache.delete(*keys)
+
+
+# Session.info key of the (uid, email) pairs written in the open transaction
+_CHANGED_USERS = "changed_users"
+
+
+def _changed(db: AsyncSession, rows: Iterable[Tuple[uuid.UUID, str]]) -> None:
+    db.info.setdefault(_CHANGED_USERS, set()).update(rows)
+
+
+async def commit(db: AsyncSession) -> None:
+    """
+    Commit ``db``, then invalidate the cached lookups of the users it wrote.
+
+    Evicting only after the commit means a concurrent reader cannot
+    re-cache the pre-transaction row. Use this instead of ``db.commit()``
+    after any write in this module.
+    """
+    await db.commit()
+    changed = db.info.pop(_CHANGED_USERS, None)
+    if changed:
+        await invalidate_users(changed)
+
+
+# --- Bulk writes ---
+
+
+def _row(user: UserCreate, now: datetime) -> Dict[str, Any]:
+    return {
+        "uid": uuid.uuid4(),
+        **user.model_dump(),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def create_user(db: AsyncSession, user: UserCreate) -> Optional[UserRecord]:
+    """Insert one user; return None if the email is already registered."""
+    row = _row(user, datetime.utcnow())
+    stmt = (
+        pg_insert(User)
+        .values(row)
+        .on_conflict_do_nothing(index_elements=[_EMAIL_KEY])
+        .returning(*USER_RECORD_COLUMNS)
+    )
+    created = (await db.execute(stmt)).mappings().first()
+    if created is None:
+        return None
+    _changed(db, [(created["uid"], created["email"])])
+    return UserRecord.model_construct(**created)
+
+
+async def bulk_create_users(
+    db: AsyncSession, users: Sequence[UserCreate]
+) -> List[Tuple[uuid.UUID, str]]:
+    """
+    Insert users with multi-row INSERTs, skipping emails that already exist.
+
+    SQLAlchemy batches the rows into multi-VALUES statements (1000 rows per
+    statement by default). Returns (uid, email) of the rows inserted. The
+    caller commits with ``commit``.
+    """
+    if not users:
+        return []
+    now = datetime.utcnow()
+    stmt = (
+        pg_insert(User)
+        .on_conflict_do_nothing(index_elements=[_EMAIL_KEY])
+        .returning(User.uid, User.email)
+    )
+    result = await db.execute(stmt, [_row(user, now) for user in users])
+    created = [(uid, email) for uid, email in result.all()]
+    _changed(db, created)
+    return created
+
+
+async def _driver_connection(db: AsyncSession) -> Any:
+    """The asyncpg connection behind ``db``, inside the session's transaction."""
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    if not driver.is_in_transaction():
+        # asyncpg starts SQLAlchemy's transaction lazily on the first statement
+        await conn.execute(text("SELECT 1"))
+    return driver
+
+
+def copy_record(user: UserCreate, now: datetime) -> Tuple[Any, ...]:
+    """A users row as a COPY record in ``COPY_COLUMNS`` order."""
+    return (
+        uuid.uuid4(),
+        user.username,
+        user.first_name,
+        user.last_name,
+        user.is_verified,
+        str(user.email),
+        user.hashed_password,
+        user.role.name,  # the userrole enum stores member names
+        user.is_active,
+        user.is_superuser,
+        now,
+        now,
+    )
+
+
+async def copy_users(
+    db: AsyncSession,
+    records: Iterable[Tuple[Any, ...]],
+    table: str = "users",
+    columns: Sequence[str] = COPY_COLUMNS,
+) -> int:
+    """
+    Stream records (see ``copy_record``) into ``table`` with binary COPY.
+
+    COPY has no conflict handling: use it for fresh tenants or a staging
+    table, and ``bulk_create_users`` otherwise. Emails copied straight into
+    ``users`` are neither added to the email filter (``email_filter.add``
+    them or rebuild it) nor evicted from the lookup cache. Returns the
+    number of rows copied. The caller commits.
+    """
+    driver = await _driver_connection(db)
+    status = await driver.copy_records_to_table(
+        table, records=records, columns=list(columns)
+    )
+    return int(status.split()[-1])
+
+
+async def create_import_table(db: AsyncSession) -> None:
+    """
+    Create the ``IMPORT_TABLE`` staging table for this transaction.
+
+    A temporary table without indexes or constraints, shaped like
+    ``users`` plus the source ``line``; COPY into it with
+    ``IMPORT_COLUMNS`` and it is dropped at commit.
+    """
+    await db.execute(
+        text(
+            f"CREATE TEMP TABLE {IMPORT_TABLE} "
+            "(LIKE users, line integer NOT NULL) ON COMMIT DROP"
+        )
+    )
+
+
+async def merge_import_table(db: AsyncSession) -> List[Tuple[uuid.UUID, str]]:
+    """
+    Insert the staged rows into ``users`` in one statement.
+
+    Emails already registered are skipped, as are repeats within the
+    import (the first line wins). Returns (uid, email) of the users
+    inserted; see ``import_conflicts`` for the skipped lines. The caller commits with
+    ``commit``.
+    """
+    columns = ", ".join(COPY_COLUMNS)
+    # Temporary tables are never auto-analyzed; give the planner row counts
+    await db.execute(text(f"ANALYZE {IMPORT_TABLE}"))
+    result = await db.execute(
+        text(
+            f"INSERT INTO users ({columns}) "
+            f"SELECT DISTINCT ON (lower(email)) {columns} FROM {IMPORT_TABLE} "
+            "ORDER BY lower(email), line "
+            "ON CONFLICT DO NOTHING "
+            "RETURNING uid, email"
+        )
+    )
+    created = [(uid, email) for uid, email in result.all()]
+    _changed(db, created)
+    return created
+
+
+async def import_conflicts(db: AsyncSession, limit: int) -> List[int]:
+    """Lines of staged rows that ``merge_import_table`` skipped, first ``limit``."""
+    result = await db.execute(
+        text(
+            f"SELECT line FROM {IMPORT_TABLE} s "
+            "WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.uid = s.uid) "
+            "ORDER BY line LIMIT :limit"
+        ),
+        {"limit": limit},
+    )
+    return [line for (line,) in result.all()]
+
+
+async def bulk_update_users(
+    db: AsyncSession,
+    uids: Sequence[uuid.UUID],
+    *,
+    is_active: Optional[bool] = None,
+    role: Optional[UserRole] = None,
+) -> List[Tuple[uuid.UUID, str]]:
+    """
+    Set ``is_active`` and/or ``role`` for many users in one statement.
+
+    All uids travel as a single array parameter (``uid = ANY(:uids)``), so
+    the statement is cached once regardless of batch size. Returns (uid,
+    email) of the users updated. The caller commits with ``commit``, which
+    invalidates the cached lookups.
+    """
+    changes: Dict[str, Any] = {}
+    if is_active is not None:
+        changes["is_active"] = is_active
+    if role is not None:
+        changes["role"] = role
+    if not changes or not uids:
+        return []
+
+    stmt = (
+        update(User)
+        .where(User.uid == any_(bindparam("uids", list(uids), type_=_UID_ARRAY)))
+        .values(**changes, updated_at=datetime.utcnow())
+        .returning(User.uid, User.email)
+        .execution_options(synchronize_session=False)
+    )
+    updated = [(uid, email) for uid, email in (await db.execute(stmt)).all()]
+    _changed(db, updated)
+    return updated
+
+
+async def update_password_hash(
+    db: AsyncSession, uid: uuid.UUID, hashed_password: str
+) -> None:
+    """Replace a user's password hash (e.g. rehash on login). The caller commits."""
+    await db.execute(
+        update(User)
+        .where(User.uid == uid)
+        .values(hashed_password=hashed_password, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+# --- Keyset pagination ---
+
+
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    """Opaque cursor for the position after (created_at, uid)."""
+    raw = f"{created_at.isoformat()}|{uid}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, uid = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+    return datetime.fromisoformat(created_at), uuid.UUID(uid)
+
+
+async def list_users(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    active_only: bool = False,
+) -> UserPage:
+    """Page through users ordered by (created_at, uid)."""
+    stmt = select(*USER_RECORD_COLUMNS)
+    if active_only:
+        stmt = stmt.where(User.is_active.is_(True))
+    if cursor:
+        stmt = stmt.where(tuple_(User.created_at, User.uid) > decode_cursor(cursor))
+    stmt = stmt.order_by(User.created_at, User.uid).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).mappings().all()
+    items = [UserRecord.model_construct(**row) for row in rows[:limit]]
+    next_cursor = (
+        encode_cursor(items[-1].created_at, items[-1].uid)
+        if len(rows) > limit
+        else None
+    )
+    return UserPage(items=items, next_cursor=next_cursor)
+
+
+async def stream_users(
+    db: AsyncSession, fetch_size: int, active_only: bool = False
+) -> AsyncGenerator[Sequence[Row[Any]], None]:
+    """
+    Yield every user, ``fetch_size`` rows at a time, in ``(created_at, uid)``
+    order.
+
+    Rows are plain tuples of ``USER_RECORD_COLUMNS`` read through a
+    server-side cursor, so memory is bounded by one fetch whatever the
+    table size. The cursor is closed when the caller stops iterating.
+    """
+    stmt = (
+        select(*USER_RECORD_COLUMNS)
+        .order_by(User.created_at, User.uid)
+        .execution_options(yield_per=fetch_size)
+    )
+    if active_only:
+        stmt = stmt.where(User.is_active.is_(True))
+    result = await db.stream(stmt)
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
+
+
+async def stream_emails(
+    db: AsyncSession, fetch_size: int
+) -> AsyncGenerator[Sequence[str], None]:
+    """
+    Yield every registered email, lowercased, ``fetch_size`` at a time.
+
+    Read through a server-side cursor like ``stream_users``; the order is
+    unspecified. The cursor is closed when the caller stops iterating.
+    """
+    stmt = select(_EMAIL_KEY).execution_options(yield_per=fetch_size)
+    result = await db.stream_scalars(stmt)
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
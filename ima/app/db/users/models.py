@@ -11,7 +11,7 @@ import uuid
 from datetime import datetime
 
 from app.db.base import Base
-from sqlalchemy import Boolean, DateTime, Enum, String
+from sqlalchemy import Boolean, DateTime, Enum, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -32,12 +32,13 @@ class User(Base):  # pylint: disable=too-few-public-methods
     uid: Mapped[uuid.UUID] = mapped_column(
         PG_UUID(as_uuid=True),
         primary_key=True,
-        unique=True,
         nullable=False,
         default=uuid.uuid4,
         doc="Unique identifier for the user account",
     )
-    username: Mapped[str] = mapped_column(String, nullable=False, doc="Unique username")
+    username: Mapped[str] = mapped_column(
+        String, index=True, nullable=False, doc="Unique username"
+    )
     first_name: Mapped[str | None] = mapped_column(
         String, nullable=True, doc="First name of the user"
     )
@@ -76,3 +77,15 @@ class User(Base):  # pylint: disable=too-few-public-methods
     def __repr__(self) -> str:
         """Return a human-readable representation of the user."""
         return f"<User {self.username}>"
+
+
+# Case-insensitive email uniqueness and lookups
+Index("ux_users_email_lower", func.lower(User.email), unique=True)
+# Keyset listing, all users and active users only
+Index("ix_users_created_at_uid", User.created_at, User.uid)
+Index(
+    "ix_users_active_created_at_uid",
+    User.created_at,
+    User.uid,
+    postgresql_where=User.is_active,
+)
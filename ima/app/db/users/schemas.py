@@ -0,0 +1,65 @@
+"""
+FILE : app/db/users/schemas.py
+Data-layer schemas for the users repository.
+
+These are the shapes returned by ``app.db.users.crud``: column projections
+of the ``users`` table rather than hydrated ORM instances.
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from app.db.users.models import UserRole
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+
+
+class UserRecord(BaseModel):
+    """Public projection of a user (no credentials)."""
+
+    model_config = ConfigDict(frozen=True)
+
+    uid: uuid.UUID
+    username: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: UserRole
+    is_active: bool
+    is_verified: Optional[bool] = None
+    is_superuser: bool
+    created_at: datetime
+
+
+class UserCredentials(BaseModel):
+    """Projection used to authenticate a user."""
+
+    model_config = ConfigDict(frozen=True)
+
+    uid: uuid.UUID
+    email: str
+    hashed_password: str
+    role: UserRole
+    is_active: bool
+    is_superuser: bool
+
+
+class UserCreate(BaseModel):
+    """Row to insert; the password must already be hashed."""
+
+    username: str = Field(..., min_length=1)
+    email: EmailStr
+    hashed_password: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: UserRole = UserRole.USER
+    is_active: bool = True
+    is_verified: bool = False
+    is_superuser: bool = False
+
+
+class UserPage(BaseModel):
+    """A page of users from keyset pagination."""
+
+    items: List[UserRecord]
+    next_cursor: Optional[str] = None
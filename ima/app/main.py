@@ -1,29 +1,46 @@
 """
 FastAPI entrypoint for the IMA Service.
+
+Importing this module only builds the application object; engines, the
+Redis client and telemetry are created by the lifespan (``app.core.state``).
 """
 
-import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from app.api.v1 import api_v1_router
+from app.core.config import settings
+from app.core.metrics import PrometheusMiddleware, metrics_endpoint
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.state import shutdown, startup
 from fastapi import FastAPI
-from app.core.tracing import init_tracing, instrument_fastapi, instrument_sqlalchemy
-from app.db.session import engine
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    """Create process resources on startup and release them on shutdown."""
+    state = await startup(application)
+    application.state.resources = state
+    try:
+        yield
+    finally:
+        await shutdown(state)
 
 
 app = FastAPI(
     title="IMA Service",
     description="Permission-based auth service with role management.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Include API v1 routers
 app.include_router(api_v1_router, prefix="/api/v1")
 
+if settings.rate_limit.enabled:
+    app.add_middleware(RateLimitMiddleware)
 
-OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")  # optional
-SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ima-service")
-
-tracer_provider = init_tracing(service_name=SERVICE_NAME, otlp_endpoint=OTLP_ENDPOINT)
-
-instrument_fastapi(app, tracer_provider)
-instrument_sqlalchemy(engine)
+# Added last so it is outermost and also measures rate-limited requests
+if settings.metrics.enabled:
+    app.add_route(settings.metrics.path, metrics_endpoint, include_in_schema=False)
+    app.add_middleware(PrometheusMiddleware, skip_paths=(settings.metrics.path,))
@@ -0,0 +1,59 @@
+"""
+Authentication service for IMA service.
+
+Verifies credentials against the users table using the off-loop password
+service, upgrading outdated password hashes on successful login. Emails
+the registered-email filter knows are not registered skip the users table.
+"""
+
+from typing import Optional
+
+from app.db.users import crud
+from app.db.users.schemas import UserCredentials
+from app.services.email_filter import email_filter
+from app.services.passwords import password_service
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_dummy_hash: Optional[str] = None
+
+
+async def _get_dummy_hash() -> str:
+    """Hash compared against for unknown emails, so misses cost the same."""
+    global _dummy_hash  # pylint: disable=global-statement
+    if _dummy_hash is None:
+        _dummy_hash = await password_service.hash("not-a-real-password")
+    return _dummy_hash
+
+
+async def authenticate_user(
+    db: AsyncSession, email: str, password: str
+) -> Optional[UserCredentials]:
+    """
+    Return the user's credentials if ``password`` is valid, else None.
+
+    Raises
+    ------
+    PasswordHasherOverloaded
+        If the hashing pool is saturated (respond with 503).
+    """
+    registered = await email_filter.might_contain(email)
+    credentials = (
+        await crud.get_credentials_by_email(db, email)
+        if registered is not False
+        else None
+    )
+    if credentials is None:
+        if registered:
+            email_filter.record_false_positive()
+        await password_service.verify(await _get_dummy_hash(), password)
+        return None
+
+    valid, new_hash = await password_service.verify_and_update(
+        credentials.hashed_password, password
+    )
+    if not valid or not credentials.is_active:
+        return None
+    if new_hash is not None:
+        await crud.update_password_hash(db, credentials.uid, new_hash)
+        await db.commit()
+    return credentials
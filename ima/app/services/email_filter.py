@@ -0,0 +1,483 @@
+"""
+Registered-email filter for IMA service.
+
+A Bloom filter over every registered email, held in each worker's memory,
+so lookups of emails that were never registered (most failed logins, and
+nearly all credential-stuffing traffic) are answered without a Postgres
+round trip:
+
+* ``might_contain`` returns False only when the email is certainly not
+  registered; True means "ask Postgres" (registered, or a false positive
+  at about ``EMAIL_FILTER_ERROR_RATE``) and None that the filter cannot
+  tell,
+* the filter is rebuilt at startup from a streaming scan of ``users``
+  (``crud.stream_emails``) and answers None until the scan has finished,
+* whatever inserts users (signup, the bulk importer) calls ``add`` before
+  committing: the email goes into the local filter and is published on
+  ``{EMAIL_FILTER_KEY_PREFIX}:added`` so every other worker and pod adds
+  it too. While the listener is disconnected the filter answers None, and
+  it is rebuilt once it has reconnected (messages may have been missed),
+* with ``EMAIL_FILTER_REDIS_MIRROR`` the bits are also kept in a Redis
+  bitset, and a local negative is only trusted once the bitset agrees (one
+  script call). This closes the window between an insert on one worker and
+  its message reaching the others.
+
+Bloom filters cannot forget: deleted or renamed emails stay in until the
+next rebuild (``python -m app.services.email_filter rebuild``), which only
+costs false positives. Emails with non-ASCII characters are never answered
+(Postgres' ``lower`` and ``str.lower`` may disagree on them).
+
+Redis errors never fail a request: the filter answers None instead.
+
+The scan only sees the shared schema's ``users``, so with
+``TENANCY_ENABLED`` the filter is off (it would rule out every tenant
+user's email) and always answers None.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import math
+import time
+import uuid
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+from app.core import redis_cache
+from app.core.config import settings
+from app.core.metrics import (
+    EMAIL_FILTER_FALSE_POSITIVE_RATE,
+    EMAIL_FILTER_FALSE_POSITIVES,
+    EMAIL_FILTER_ITEMS,
+    EMAIL_FILTER_LOOKUPS,
+    EMAIL_FILTER_MEMORY,
+)
+from app.db import session as db_session
+from app.db.users import crud
+
+logger = logging.getLogger(__name__)
+
+# Set the bits only if the bitset exists: a partial bitset would confirm
+# negatives for emails it never saw
+MIRROR_ADD_LUA = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call("SETBIT", KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+# 1 if every bit is set, 0 if one is not, -1 if there is no bitset
+MIRROR_CHECK_LUA = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return -1
+end
+for i = 1, #ARGV do
+    if redis.call("GETBIT", KEYS[1], ARGV[i]) == 0 then
+        return 0
+    end
+end
+return 1
+"""
+
+# Inserts this recent are replayed into a rebuild, in case their commit
+# landed after the scan's snapshot (at most RECENT_MAX, for bulk imports)
+RECENT_SECONDS = 60.0
+RECENT_MAX = 100_000
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+
+    ``size`` bits and ``hashes`` positions per item, derived by double
+    hashing one 128-bit BLAKE2b digest. Bit ``n`` is the ``0x80 >> n % 8``
+    bit of byte ``n // 8``, the layout of Redis ``SETBIT``, so ``bits`` can
+    be stored as a Redis string as is.
+    """
+
+    def __init__(self, size: int, hashes: int) -> None:
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+        self.bits_set = 0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float) -> "BloomFilter":
+        """The smallest filter holding ``capacity`` items at ``error_rate``."""
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return cls(size, hashes)
+
+    def positions(self, item: str) -> List[int]:
+        """The bit positions of ``item``."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add_positions(self, positions: Iterable[int]) -> None:
+        """Set the bits at ``positions``."""
+        bits = self.bits
+        for position in positions:
+            mask = 0x80 >> (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                self.bits_set += 1
+
+    def has_positions(self, positions: Iterable[int]) -> bool:
+        """Whether every bit at ``positions`` is set."""
+        bits = self.bits
+        return all(bits[p >> 3] & (0x80 >> (p & 7)) for p in positions)
+
+    def add(self, item: str) -> None:
+        """Add ``item``."""
+        self.add_positions(self.positions(item))
+
+    def __contains__(self, item: str) -> bool:
+        return self.has_positions(self.positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array."""
+        return len(self.bits)
+
+    def estimated_items(self) -> int:
+        """Distinct items added, estimated from the share of bits set."""
+        if self.bits_set >= self.size:
+            return self.size
+        fill = self.bits_set / self.size
+        return round(-self.size / self.hashes * math.log1p(-fill))
+
+    def false_positive_rate(self) -> float:
+        """Probability that an item never added is reported present."""
+        return (self.bits_set / self.size) ** self.hashes
+
+
+def _key(email: str) -> Optional[str]:
+    """The filter key for ``email``; None for emails the filter cannot answer."""
+    key = email.strip().lower()
+    return key if key.isascii() else None
+
+
+class RedisBitset:
+    """The Redis copy of a ``BloomFilter``'s bits, kept under ``key``."""
+
+    def __init__(self, client: redis.Redis, key: str) -> None:
+        self.client = client
+        self.key = key
+        self._add = client.register_script(MIRROR_ADD_LUA)
+        self._check = client.register_script(MIRROR_CHECK_LUA)
+
+    async def add(self, positions: List[int]) -> bool:
+        """Set bits; False (and nothing set) if the bitset does not exist."""
+        return bool(await self._add(keys=[self.key], args=positions))
+
+    async def check(self, positions: List[int]) -> Optional[bool]:
+        """Whether every bit is set; None if the bitset does not exist."""
+        found = await self._check(keys=[self.key], args=positions)
+        return None if found < 0 else bool(found)
+
+    async def upload(self, bloom: BloomFilter, replace: bool) -> bool:
+        """Store ``bloom``'s bits (unless there already are some, or ``replace``)."""
+        # Per upload: workers starting together may all upload at once
+        staging = f"{self.key}:upload:{uuid.uuid4().hex}"
+        await self.client.set(staging, bytes(bloom.bits))
+        if replace:
+            await self.client.rename(staging, self.key)
+            return True
+        stored = bool(await self.client.renamenx(staging, self.key))
+        if not stored:
+            await self.client.delete(staging)
+        return stored
+
+
+class EmailFilter:
+    """Per-process registered-email filter kept in sync over Redis pub/sub."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        capacity: int,
+        error_rate: float,
+        prefix: str,
+        fetch_size: int,
+        enabled: bool = True,
+        mirror: bool = False,
+    ) -> None:
+        self.client = client
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.fetch_size = fetch_size
+        self.enabled = enabled
+        self.added_channel = f"{prefix}:added"
+        self.rebuild_channel = f"{prefix}:rebuild"
+        self.bloom = BloomFilter.for_capacity(capacity, error_rate)
+        # Processes sharing the bitset must agree on its shape
+        self.mirror = (
+            RedisBitset(client, f"{prefix}:bloom:{self.bloom.size}:{self.bloom.hashes}")
+            if mirror
+            else None
+        )
+        self.ready = False
+        self._building: Set[BloomFilter] = set()
+        self._recent: Deque[Tuple[float, str]] = deque(maxlen=RECENT_MAX)
+        self._generation = 0
+        self._rebuild_wanted = False
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._rebuilder: Optional["asyncio.Task[None]"] = None
+
+    # --- Lookups ---
+
+    async def might_contain(self, email: str) -> Optional[bool]:
+        """False if ``email`` is certainly not registered, None if unknown."""
+        key = _key(email) if self.enabled and self.ready else None
+        if key is None:
+            EMAIL_FILTER_LOOKUPS.labels("unavailable").inc()
+            return None
+        positions = self.bloom.positions(key)
+        if self.bloom.has_positions(positions):
+            EMAIL_FILTER_LOOKUPS.labels("positive").inc()
+            return True
+        if self.mirror is not None:
+            try:
+                confirmed = await self.mirror.check(positions)
+            except redis.RedisError as exc:
+                logger.warning("Email filter bitset unavailable: %s", exc)
+                confirmed = None
+            if confirmed is not False:
+                EMAIL_FILTER_LOOKUPS.labels("unavailable").inc()
+                return None
+        EMAIL_FILTER_LOOKUPS.labels("negative").inc()
+        return False
+
+    @staticmethod
+    def record_false_positive() -> None:
+        """Count a positive answer for an email Postgres did not have."""
+        EMAIL_FILTER_FALSE_POSITIVES.inc()
+
+    # --- Updates ---
+
+    def _insert(self, keys: Iterable[str]) -> None:
+        now = time.monotonic()
+        while self._recent and self._recent[0][0] < now - RECENT_SECONDS:
+            self._recent.popleft()
+        for key in keys:
+            self._recent.append((now, key))
+            positions = self.bloom.positions(key)
+            self.bloom.add_positions(positions)
+            for bloom in self._building:
+                bloom.add_positions(positions)
+        self._observe()
+
+    async def add(self, *emails: str) -> None:
+        """Add newly inserted emails here, in the bitset and in every worker."""
+        keys = [key for key in map(_key, emails) if key is not None]
+        if not self.enabled or not keys:
+            return
+        self._insert(keys)
+        try:
+            if self.mirror is not None:
+                await self.mirror.add(
+                    [p for key in keys for p in self.bloom.positions(key)]
+                )
+            # Emails cannot contain newlines
+            await self.client.publish(self.added_channel, "\n".join(keys))
+        except redis.RedisError as exc:
+            logger.warning("Could not share %d new emails: %s", len(keys), exc)
+
+    # --- Rebuilds ---
+
+    async def build(self) -> BloomFilter:
+        """A new filter over every registered email (read from the primary)."""
+        bloom = BloomFilter.for_capacity(self.capacity, self.error_rate)
+        # Emails added while scanning go in as well, as do recent ones whose
+        # commit may not be visible to the scan
+        self._building.add(bloom)
+        try:
+            for _, key in list(self._recent):
+                bloom.add(key)
+            async with db_session.get_sessionmaker()() as db:
+                async for emails in crud.stream_emails(db, self.fetch_size):
+                    for email in emails:
+                        normalized = _key(email)
+                        if normalized is not None:
+                            bloom.add(normalized)
+        finally:
+            self._building.discard(bloom)
+        return bloom
+
+    def _invalidate(self, rebuild: bool) -> None:
+        """Stop answering; ``rebuild`` with a scan that starts after this call."""
+        self.ready = False
+        self._generation += 1
+        self._rebuild_wanted = rebuild
+        if rebuild and (self._rebuilder is None or self._rebuilder.done()):
+            self._rebuilder = asyncio.get_running_loop().create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        backoff = 1.0
+        while self._rebuild_wanted:
+            generation = self._generation
+            started = time.monotonic()
+            try:
+                bloom = await self.build()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.warning("Email filter rebuild failed: %s", exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+            if generation != self._generation:
+                continue  # invalidated while scanning
+            self._rebuild_wanted = False
+            self.bloom = bloom
+            self.ready = True
+            self._observe()
+            await self._seed_mirror()
+            items = bloom.estimated_items()
+            logger.info(
+                "Email filter rebuilt in %.1fs: ~%d emails, %d KiB, fp rate %.4f",
+                time.monotonic() - started,
+                items,
+                bloom.memory_bytes // 1024,
+                bloom.false_positive_rate(),
+            )
+            if items > self.capacity:
+                logger.warning(
+                    "Email filter holds ~%d emails, over EMAIL_FILTER_CAPACITY=%d",
+                    items,
+                    self.capacity,
+                )
+
+    async def _seed_mirror(self) -> None:
+        """Create the bitset if no process has yet."""
+        if self.mirror is None:
+            return
+        try:
+            if await self.mirror.upload(self.bloom, replace=False):
+                # Inserts whose bits were skipped while there was no bitset
+                recent = [key for _, key in self._recent]
+                await self.mirror.add(
+                    [p for key in recent for p in self.bloom.positions(key)]
+                )
+        except redis.RedisError as exc:
+            logger.warning("Could not create the email filter bitset: %s", exc)
+
+    def _observe(self) -> None:
+        EMAIL_FILTER_ITEMS.set(self.bloom.estimated_items())
+        EMAIL_FILTER_FALSE_POSITIVE_RATE.set(self.bloom.false_positive_rate())
+        EMAIL_FILTER_MEMORY.set(self.bloom.memory_bytes)
+
+    # --- Lifecycle ---
+
+    async def _listen(self) -> None:
+        """Apply emails added by any worker; rebuild after every (re)connect."""
+        backoff = 0.1
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.added_channel, self.rebuild_channel)
+                # Subscribed before scanning, so no insert falls in between
+                self._invalidate(rebuild=True)
+                backoff = 0.1
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["channel"] == self.rebuild_channel:
+                        self._invalidate(rebuild=True)
+                    else:
+                        self._insert(message["data"].split("\n"))
+            except redis.RedisError as exc:
+                # Inserts published meanwhile are lost
+                self._invalidate(rebuild=False)
+                logger.warning("Email filter listener error: %s", exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        """Start listening and the initial rebuild (call on the running loop)."""
+        if self.enabled and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the listener and any rebuild in progress."""
+        self.ready = self._rebuild_wanted = False
+        for task in (self._listener, self._rebuilder):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, RuntimeError):
+                    pass
+        self._listener = self._rebuilder = None
+
+
+def _build_email_filter() -> EmailFilter:
+    cfg = settings.email_filter
+    return EmailFilter(
+        redis_cache.redis_client,  # type: ignore[arg-type]
+        capacity=cfg.capacity,
+        error_rate=cfg.error_rate,
+        prefix=cfg.key_prefix,
+        fetch_size=cfg.fetch_size,
+        # Tenant users live in their own schemas, which the scan never reads
+        enabled=cfg.enabled and not settings.tenancy.enabled,
+        mirror=cfg.redis_mirror,
+    )
+
+
+email_filter = _build_email_filter()
+
+
+async def rebuild_everywhere(emails: EmailFilter) -> BloomFilter:
+    """
+    Rebuild the bitset (if mirrored) and have every running worker rebuild.
+
+    Workers stop answering until their own scan has finished.
+    """
+    bloom = await emails.build()
+    if emails.mirror is not None:
+        await emails.mirror.upload(bloom, replace=True)
+    await emails.client.publish(emails.rebuild_channel, "")
+    return bloom
+
+
+async def _main() -> None:
+    db_session.init_db()
+    redis_cache.init_redis()
+    try:
+        bloom = await rebuild_everywhere(email_filter)
+    finally:
+        await redis_cache.close_redis()
+        await db_session.close_db()
+    logger.info(
+        "Rebuilt: ~%d emails, %d bits, %d hashes, %d KiB, fp rate %.4f",
+        bloom.estimated_items(),
+        bloom.size,
+        bloom.hashes,
+        bloom.memory_bytes // 1024,
+        bloom.false_positive_rate(),
+    )
+
+
+def main() -> None:
+    """CLI entrypoint."""
+    parser = argparse.ArgumentParser(description="Manage the registered-email filter.")
+    parser.add_argument(
+        "command",
+        choices=["rebuild"],
+        help="rebuild: rescan users and have every worker rebuild its filter",
+    )
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Auth event consumer for IMA service: Redis Stream to Postgres.
+
+Runs as its own process:
+
+    python -m app.services.event_consumer [--name NAME]
+
+Reads ``EVENTS_STREAM`` as a member of the ``EVENTS_CONSUMER_GROUP``
+consumer group, so any number of consumers share the stream. Each batch
+of up to ``EVENTS_CONSUMER_BATCH_SIZE`` entries is inserted into
+``auth_events`` in one transaction and then acknowledged with one
+``XACK``: an entry leaves the group's pending list only once it is stored.
+
+* Entries that cannot be decoded go straight to the dead-letter stream
+  (``EVENTS_DLQ_STREAM``), with the reason.
+* If a batch is rejected by the database (a bad row), its entries are
+  inserted one by one so the others still get through; the rejected ones
+  stay pending. Connection errors leave the whole batch pending.
+* Entries pending for more than ``EVENTS_CLAIM_IDLE`` seconds (rejected
+  rows, a consumer that died mid-batch) are claimed and retried; after
+  ``EVENTS_MAX_DELIVERIES`` deliveries they are dead-lettered instead.
+
+Inserts skip event ids already stored, so redelivery is harmless.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from app.core import redis_cache
+from app.core.config import settings
+from app.core.metrics import EVENTS_CONSUMED
+from app.db import session as db_session
+from app.db.events import crud
+from app.services.events import EVENT_FIELD
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, Optional[Dict[str, str]]]
+
+# Database errors caused by the rows themselves rather than the connection
+ROW_ERRORS = (IntegrityError, DataError)
+
+
+class EventConsumer:
+    """Consumer-group member storing events in batches."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        stream: str,
+        group: str,
+        name: str,
+        dlq_stream: str,
+        batch_size: int = 500,
+        block: float = 1.0,
+        claim_idle: float = 60.0,
+        max_deliveries: int = 5,
+        retry_interval: float = 1.0,
+    ) -> None:
+        self.client = client
+        self.sessionmaker = sessionmaker
+        self.stream = stream
+        self.group = group
+        self.name = name
+        self.dlq_stream = dlq_stream
+        self.batch_size = batch_size
+        self.block = block
+        self.claim_idle = claim_idle
+        self.max_deliveries = max_deliveries
+        self.retry_interval = retry_interval
+        self._claimed_at = float("-inf")
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group (and stream) unless it exists."""
+        try:
+            await self.client.xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    # --- storing ---
+
+    async def _insert(self, rows: Sequence[Dict[str, Any]]) -> None:
+        async with self.sessionmaker() as db:
+            await crud.insert_events(db, rows)
+            await db.commit()
+
+    async def _store(self, decoded: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Insert the rows; return the entry ids that were stored."""
+        try:
+            await self._insert([row for _, row in decoded])
+            return [entry_id for entry_id, _ in decoded]
+        except ROW_ERRORS as exc:
+            logger.warning("Event batch rejected, inserting one by one: %s", exc)
+        stored = []
+        for entry_id, row in decoded:
+            try:
+                await self._insert([row])
+                stored.append(entry_id)
+            except ROW_ERRORS as exc:
+                logger.warning("Event %s rejected: %s", entry_id, exc)
+        return stored
+
+    async def dead_letter(self, entries: Sequence[Entry], reason: str) -> None:
+        """Copy entries to the dead-letter stream and acknowledge them."""
+        if not entries:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            for entry_id, fields in entries:
+                pipe.xadd(
+                    self.dlq_stream,
+                    {**(fields or {}), "source_id": entry_id, "error": reason},
+                )
+            pipe.xack(self.stream, self.group, *[entry_id for entry_id, _ in entries])
+            await pipe.execute()
+        EVENTS_CONSUMED.labels("dead_lettered").inc(len(entries))
+        logger.warning("Dead-lettered %d event(s): %s", len(entries), reason)
+
+    async def handle(self, entries: Sequence[Entry]) -> int:
+        """Store and acknowledge a batch; return how many were acknowledged."""
+        decoded: List[Tuple[str, Dict[str, Any]]] = []
+        poison: List[Entry] = []
+        for entry_id, fields in entries:
+            try:
+                event = json.loads((fields or {})[EVENT_FIELD])
+                decoded.append((entry_id, crud.event_row(event)))
+            except (KeyError, TypeError, ValueError):
+                poison.append((entry_id, fields))
+        await self.dead_letter(poison, "undecodable")
+
+        stored = await self._store(decoded) if decoded else []
+        if stored:
+            await self.client.xack(self.stream, self.group, *stored)
+            EVENTS_CONSUMED.labels("stored").inc(len(stored))
+        if len(stored) < len(decoded):
+            EVENTS_CONSUMED.labels("failed").inc(len(decoded) - len(stored))
+        return len(stored) + len(poison)
+
+    # --- reading ---
+
+    async def claim_stale(self) -> int:
+        """Retry entries pending too long; dead-letter over-delivered ones."""
+        idle_ms = int(self.claim_idle * 1000)
+        pending = await self.client.xpending_range(
+            self.stream, self.group, "-", "+", self.batch_size, idle=idle_ms
+        )
+        if not pending:
+            return 0
+        exhausted = [
+            p["message_id"]
+            for p in pending
+            if p["times_delivered"] >= self.max_deliveries
+        ]
+        retry = [
+            p["message_id"]
+            for p in pending
+            if p["times_delivered"] < self.max_deliveries
+        ]
+        if exhausted:
+            entries = await self.client.xclaim(
+                self.stream, self.group, self.name, idle_ms, exhausted
+            )
+            await self.dead_letter(
+                entries, f"not stored after {self.max_deliveries} deliveries"
+            )
+        handled = 0
+        if retry:
+            entries = await self.client.xclaim(
+                self.stream, self.group, self.name, idle_ms, retry
+            )
+            handled = await self.handle(entries)
+        return len(exhausted) + handled
+
+    async def read(self) -> List[Entry]:
+        """New entries for this consumer, blocking up to ``block`` seconds."""
+        response = await self.client.xreadgroup(
+            self.group,
+            self.name,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=int(self.block * 1000),
+        )
+        if not response:
+            return []
+        return [entry for _, entries in response for entry in entries]
+
+    async def run_once(self) -> int:
+        """Claim stale entries (every ``claim_idle`` / 2), then read and store."""
+        handled = 0
+        now = time.monotonic()
+        if now - self._claimed_at >= self.claim_idle / 2:
+            self._claimed_at = now
+            handled += await self.claim_stale()
+        entries = await self.read()
+        if entries:
+            handled += await self.handle(entries)
+        return handled
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Consume until ``stop`` is set."""
+        await self.ensure_group()
+        logger.info("Consuming %s as %s/%s", self.stream, self.group, self.name)
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception as exc:  # pylint: disable=broad-except
+                # Redis or Postgres unavailable: entries stay pending
+                logger.warning("Event consumer error: %s", exc)
+                await asyncio.sleep(self.retry_interval)
+
+
+def build_consumer(name: str) -> EventConsumer:
+    """Consumer configured from ``settings.events``."""
+    cfg = settings.events
+    return EventConsumer(
+        redis_cache.redis_client,
+        db_session.get_sessionmaker(),
+        stream=cfg.stream,
+        group=cfg.consumer_group,
+        name=name,
+        dlq_stream=cfg.dlq_stream,
+        batch_size=cfg.consumer_batch_size,
+        block=cfg.consumer_block,
+        claim_idle=cfg.claim_idle,
+        max_deliveries=cfg.max_deliveries,
+        retry_interval=cfg.retry_interval,
+    )
+
+
+async def _main(name: str) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    db_session.init_db()
+    redis_cache.init_redis()
+    try:
+        await build_consumer(name).run(stop)
+    finally:
+        await redis_cache.close_redis()
+        await db_session.close_db()
+
+
+def main() -> None:
+    """CLI entrypoint."""
+    parser = argparse.ArgumentParser(description="Store auth events in Postgres.")
+    parser.add_argument(
+        "--name",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="consumer name, unique within the group (default: host-pid)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Auth and audit events for IMA service, published write-behind to a Redis
+Stream.
+
+``publish`` only appends to a bounded in-process buffer - no I/O, nothing
+awaited - so emitting an event from a request (login, signup) adds no
+round trip to it. A background task, started by the app lifespan, writes
+the buffer to ``EVENTS_STREAM`` in pipelined ``XADD`` batches of up to
+``EVENTS_BATCH_SIZE``: as soon as a batch is full, otherwise every
+``EVENTS_FLUSH_INTERVAL`` seconds.
+
+While Redis is unreachable a batch stays buffered and is retried every
+``EVENTS_RETRY_INTERVAL`` seconds. Once ``EVENTS_BUFFER_SIZE`` events are
+waiting, new ones are dropped rather than slowing requests down;
+``events_buffered`` shows how full the buffer is and
+``events_dropped_total`` what was lost.
+
+A retried batch may have been partly written, so an event can reach the
+stream twice; its ``id`` lets the consumer (``app.services.event_consumer``)
+store it once.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.metrics import (
+    EVENTS_BUFFERED,
+    EVENTS_DROPPED,
+    EVENTS_FLUSH_DURATION,
+    EVENTS_PUBLISHED,
+)
+from app.core.redis_cache import redis_client
+from app.core.response import dumps
+
+logger = logging.getLogger(__name__)
+
+# Stream entry field holding the JSON-encoded event
+EVENT_FIELD = "event"
+
+# Event types
+LOGIN_SUCCEEDED = "auth.login.succeeded"
+LOGIN_FAILED = "auth.login.failed"
+USER_CREATED = "auth.user.created"
+
+Event = Dict[str, Any]
+
+
+def make_event(
+    event_type: str,
+    actor: Optional[str] = None,
+    tenant: Optional[str] = None,
+    **data: Any,
+) -> Event:
+    """An event record: unique id, type, UTC time, actor, tenant and data."""
+    return {
+        "id": str(uuid.uuid4()),
+        "type": event_type,
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        "actor": actor,
+        "tenant": tenant,
+        "data": data,
+    }
+
+
+class EventPublisher:
+    """Buffer events in process and write them to a stream in batches."""
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str,
+        maxlen: int,
+        buffer_size: int,
+        batch_size: int,
+        flush_interval: float,
+        retry_interval: float,
+        enabled: bool = True,
+    ) -> None:
+        self.client = client
+        self.stream = stream
+        self.maxlen = maxlen
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.enabled = enabled
+        self._buffer: Deque[Event] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._full = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def publish(
+        self,
+        event_type: str,
+        actor: Optional[str] = None,
+        tenant: Optional[str] = None,
+        **data: Any,
+    ) -> bool:
+        """Queue an event; False when it was dropped (disabled or buffer full)."""
+        if not self.enabled:
+            return False
+        if len(self._buffer) >= self.buffer_size:
+            EVENTS_DROPPED.labels("buffer_full").inc()
+            if not self._full:
+                self._full = True
+                logger.warning("Event buffer full (%d), dropping", self.buffer_size)
+            return False
+        self._full = False
+        self._buffer.append(make_event(event_type, actor, tenant, **data))
+        EVENTS_BUFFERED.inc()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> int:
+        """
+        Write up to one batch to the stream; return how many were written.
+
+        On failure (or cancellation) the batch goes back to the front of the
+        buffer and the error propagates.
+        """
+        batch = [
+            self._buffer.popleft()
+            for _ in range(min(self.batch_size, len(self._buffer)))
+        ]
+        if not batch:
+            return 0
+        start = time.perf_counter()
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for event in batch:
+                    pipe.xadd(
+                        self.stream,
+                        {EVENT_FIELD: dumps(event)},
+                        maxlen=self.maxlen,
+                        approximate=True,
+                    )
+                await pipe.execute()
+        except BaseException:
+            self._buffer.extendleft(reversed(batch))
+            raise
+        EVENTS_FLUSH_DURATION.observe(time.perf_counter() - start)
+        EVENTS_BUFFERED.dec(len(batch))
+        EVENTS_PUBLISHED.inc(len(batch))
+        return len(batch)
+
+    async def drain(self) -> None:
+        """Flush batch after batch until the buffer is empty."""
+        while await self.flush():
+            pass
+
+    async def run(self) -> None:
+        """Flush loop: on a full batch or every ``flush_interval``."""
+        while True:
+            if len(self._buffer) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except (redis.RedisError, OSError) as exc:
+                logger.warning(
+                    "Event flush failed (%d buffered): %s", len(self._buffer), exc
+                )
+                await asyncio.sleep(self.retry_interval)
+
+    def start(self) -> None:
+        """Start the flush loop (app startup)."""
+        if self.enabled and self._task is None:
+            # Bound to the running loop on first wait: one per run
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float) -> None:
+        """Stop the flush loop and publish what is left within ``timeout``."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not self._buffer:
+            return
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except (asyncio.TimeoutError, redis.RedisError, OSError) as exc:
+            lost = len(self._buffer)
+            logger.warning("Dropping %d unpublished events: %s", lost, exc)
+            self._buffer.clear()
+            EVENTS_BUFFERED.dec(lost)
+            EVENTS_DROPPED.labels("shutdown").inc(lost)
+
+
+def _build_publisher() -> EventPublisher:
+    cfg = settings.events
+    return EventPublisher(
+        redis_client,
+        stream=cfg.stream,
+        maxlen=cfg.stream_maxlen,
+        buffer_size=cfg.buffer_size,
+        batch_size=cfg.batch_size,
+        flush_interval=cfg.flush_interval,
+        retry_interval=cfg.retry_interval,
+        enabled=cfg.enabled,
+    )
+
+
+# Singleton publisher; its flush loop is started by the app lifespan
+event_publisher = _build_publisher()
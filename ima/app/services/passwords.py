@@ -0,0 +1,167 @@
+"""
+Password hashing service for IMA service.
+
+argon2id hashing and verification are CPU-bound (tens of milliseconds by
+design) and must never run on the event loop. ``PasswordService`` runs them
+in a bounded thread pool (argon2 releases the GIL while hashing, so threads
+scale across cores) and sheds load once more than
+``PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE`` jobs are pending, so a
+login burst degrades to fast 503s instead of an ever-growing queue.
+Bulk imports (``hash_many``) get their own, smaller pool
+(``PASSWORD_HASH_IMPORT_WORKERS``), so logins never queue behind an
+import's batches; the OS scheduler shares the cores between the two.
+
+Cost parameters come from settings; hashes produced with older parameters
+are transparently upgraded by ``verify_and_update`` on successful login.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when the hashing queue is full; map to HTTP 503."""
+
+
+class _Pool:
+    """A thread pool that rejects jobs once ``max_pending`` are pending."""
+
+    def __init__(self, workers: int, max_queue: int, name: str) -> None:
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _job_done(self, _: Future) -> None:
+        # Runs when the pool job ends (or is dropped from the queue), not when
+        # the awaiting caller is cancelled: the thread may still be hashing
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, func, *args):
+        """Run ``func(*args)`` in the pool, or raise if too many are pending."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherOverloaded(
+                    f"{self.pending} password hashing jobs pending"
+                )
+            self.pending += 1
+        job = self.executor.submit(func, *args)
+        job.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(job)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and counters."""
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class PasswordService:
+    """Hash and verify passwords off the event loop with load shedding."""
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        time_cost: int,
+        memory_cost: int,
+        parallelism: int,
+        import_workers: int = 1,
+    ) -> None:
+        self.hasher = PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+        )
+        self.workers = workers
+        self.import_workers = import_workers
+        self._pool = _Pool(workers, max_queue, "password-hash")
+        self._imports = _Pool(import_workers, max_queue, "password-import")
+
+    # --- blocking implementations (run in the pool) ---
+
+    def _verify(self, hashed: str, password: str) -> bool:
+        try:
+            return self.hasher.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def _verify_and_update(
+        self, hashed: str, password: str
+    ) -> Tuple[bool, Optional[str]]:
+        if not self._verify(hashed, password):
+            return False, None
+        if self.hasher.check_needs_rehash(hashed):
+            return True, self.hasher.hash(password)
+        return True, None
+
+    def _hash_many(self, passwords: Sequence[str]) -> List[str]:
+        return [self.hasher.hash(password) for password in passwords]
+
+    # --- async API ---
+
+    async def hash(self, password: str) -> str:
+        """Return the argon2id hash of ``password``."""
+        return await self._pool.run(self.hasher.hash, password)
+
+    async def verify(self, hashed: str, password: str) -> bool:
+        """Check ``password`` against ``hashed``."""
+        return await self._pool.run(self._verify, hashed, password)
+
+    async def verify_and_update(
+        self, hashed: str, password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify ``password`` and, when ``hashed`` uses outdated cost
+        parameters, return a fresh hash to store: ``(valid, new_hash)``.
+        """
+        return await self._pool.run(self._verify_and_update, hashed, password)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch in one job of the import pool; order is preserved.
+
+        Split large batches into ``import_workers`` parts to use every
+        import worker.
+        """
+        return await self._imports.run(self._hash_many, list(passwords))
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and counters; the import pool's are ``import_*``."""
+        imports = {f"import_{name}": n for name, n in self._imports.stats().items()}
+        return {**self._pool.stats(), **imports}
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (waits for running jobs)."""
+        self._pool.executor.shutdown(wait=True)
+        self._imports.executor.shutdown(wait=True)
+
+
+def _build_password_service() -> PasswordService:
+    cfg = settings.passwords
+    return PasswordService(
+        workers=cfg.workers,
+        max_queue=cfg.max_queue,
+        time_cost=cfg.time_cost,
+        memory_cost=cfg.memory_cost,
+        parallelism=cfg.parallelism,
+        import_workers=cfg.import_workers,
+    )
+
+
+# Shared password service
+password_service = _build_password_service()
@@ -0,0 +1,282 @@
+"""
+Role/permission engine for IMA service.
+
+Roles and their grants are compiled once, at import, into integer bitsets:
+every ``(resource, action)`` pair owns one bit and every ``(role,
+is_superuser)`` combination maps to a precomputed mask. A decision is then
+one dictionary lookup and one ``&`` - no query, no policy walk.
+
+Each user's effective mask is cached in process and in Redis through a
+``RedisCache`` whose namespace embeds the compiled policy version, so a
+policy change on deploy invalidates every cached entry at once. Role and
+activation changes must go through ``update_user_access``, which evicts the
+affected users in Redis and in every worker's in-process tier.
+
+Grants are ``"resource:action"`` strings; ``*`` matches any resource or
+action. Roles inherit their parents' grants (USER < MODERATOR < ADMIN).
+"""
+
+import enum
+import hashlib
+import json
+import uuid
+from itertools import product
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from app.core.cache import RedisCache
+from app.core.config import settings
+from app.core.local_cache import LocalCache, register_metrics
+from app.core.redis_cache import redis_client
+from app.db.session import get_db
+from app.db.users import crud
+from app.db.users.models import UserRole
+from app.services.sessions import session_store
+from app.services.tokens import Claims, get_token_claims
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class Action(str, enum.Enum):
+    """Actions a permission can grant."""
+
+    READ = "read"
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+# "internal": operational statistics (``/internal``), admins only
+RESOURCES: Tuple[str, ...] = ("users", "roles", "sessions", "tokens", "internal")
+
+DEFAULT_POLICIES: Dict[UserRole, Tuple[str, ...]] = {
+    UserRole.USER: ("users:read", "sessions:read", "sessions:delete"),
+    UserRole.MODERATOR: ("users:update", "sessions:*", "tokens:read"),
+    UserRole.ADMIN: ("*:*",),
+}
+
+ROLE_PARENTS: Dict[UserRole, Tuple[UserRole, ...]] = {
+    UserRole.MODERATOR: (UserRole.USER,),
+    UserRole.ADMIN: (UserRole.MODERATOR,),
+}
+
+
+class PermissionEngine:
+    """Compiled decision table: O(1) ``has_permission``."""
+
+    def __init__(
+        self,
+        resources: Sequence[str] = RESOURCES,
+        policies: Mapping[UserRole, Iterable[str]] = DEFAULT_POLICIES,
+        parents: Mapping[UserRole, Iterable[UserRole]] = ROLE_PARENTS,
+    ) -> None:
+        self.resources = tuple(resources)
+        self.actions = tuple(action.value for action in Action)
+        self._bits: Dict[Tuple[str, Any], int] = {}
+        for index, (resource, action) in enumerate(
+            product(self.resources, self.actions)
+        ):
+            self._bits[(resource, action)] = 1 << index
+            # Action members hash by name, so index them explicitly too
+            self._bits[(resource, Action(action))] = 1 << index
+        self.all_mask = (1 << (len(self.resources) * len(self.actions))) - 1
+
+        grants = {role: self._compile(policies.get(role, ())) for role in UserRole}
+        role_masks = {
+            role: self._inherit(role, grants, parents, ()) for role in UserRole
+        }
+        self._masks: Dict[Tuple[UserRole, bool], int] = {}
+        for role, mask in role_masks.items():
+            self._masks[(role, False)] = mask
+            self._masks[(role, True)] = self.all_mask
+
+        layout = {
+            "bits": [f"{r}:{a}" for r, a in product(self.resources, self.actions)],
+            "roles": {role.value: mask for role, mask in role_masks.items()},
+        }
+        self.version = hashlib.blake2b(
+            json.dumps(layout, sort_keys=True).encode(), digest_size=6
+        ).hexdigest()
+
+    def _compile(self, grants: Iterable[str]) -> int:
+        """Mask for ``"resource:action"`` grants; unknown names fail fast."""
+        mask = 0
+        for grant in grants:
+            resource, _, action = grant.partition(":")
+            resources = self.resources if resource == "*" else (resource,)
+            actions = self.actions if action == "*" else (action,)
+            for pair in product(resources, actions):
+                if pair not in self._bits:
+                    raise ValueError(f"Unknown permission {grant!r}")
+                mask |= self._bits[pair]
+        return mask
+
+    def _inherit(
+        self,
+        role: UserRole,
+        grants: Mapping[UserRole, int],
+        parents: Mapping[UserRole, Iterable[UserRole]],
+        seen: Tuple[UserRole, ...],
+    ) -> int:
+        if role in seen:
+            raise ValueError(f"Role inheritance cycle through {role.value}")
+        mask = grants[role]
+        for parent in parents.get(role, ()):
+            mask |= self._inherit(parent, grants, parents, seen + (role,))
+        return mask
+
+    def mask_for(
+        self, role: UserRole, is_superuser: bool = False, is_active: bool = True
+    ) -> int:
+        """Effective mask of a user with ``role``."""
+        return self._masks[(role, is_superuser)] if is_active else 0
+
+    def allows(self, mask: int, action: Any, resource: str) -> bool:
+        """Whether ``mask`` grants ``action`` on ``resource``."""
+        bit = self._bits.get((resource, action), 0)
+        return bool(mask & bit)
+
+    def has_permission(self, user: Any, action: Any, resource: str) -> bool:
+        """Decide for any object with ``role``, ``is_superuser``, ``is_active``."""
+        mask = self.mask_for(
+            user.role, user.is_superuser, getattr(user, "is_active", True)
+        )
+        return self.allows(mask, action, resource)
+
+    def knows(self, action: Any, resource: str) -> bool:
+        """Whether ``resource:action`` is a compiled permission."""
+        return (resource, action) in self._bits
+
+    def describe(self, mask: int) -> List[str]:
+        """The ``"resource:action"`` grants in ``mask`` (for debugging/claims)."""
+        return [
+            f"{resource}:{action}"
+            for resource, action in product(self.resources, self.actions)
+            if mask & self._bits[(resource, action)]
+        ]
+
+
+class PermissionCache:
+    """Per-user effective masks, cached in process and in Redis."""
+
+    def __init__(self, engine: PermissionEngine, cache: RedisCache) -> None:
+        self.engine = engine
+        self.cache = cache
+
+    def key(self, uid: uuid.UUID) -> str:
+        """Cache key of a user's mask."""
+        return self.cache.key(str(uid))
+
+    async def effective_mask(self, db: AsyncSession, uid: uuid.UUID) -> Optional[int]:
+        """The user's mask, or None for an unknown user."""
+
+        async def load() -> Optional[int]:
+            user = await crud.get_user_by_uid(db, uid)
+            if user is None:
+                return None
+            return self.engine.mask_for(user.role, user.is_superuser, user.is_active)
+
+        return await self.cache.get_or_load(self.key(uid), load)
+
+    async def invalidate(self, *uids: uuid.UUID) -> None:
+        """Evict users everywhere (call after their role or status changed)."""
+        await self.cache.delete(*(self.key(uid) for uid in uids))
+
+
+def _build_permission_cache(engine: PermissionEngine) -> PermissionCache:
+    cfg = settings.permissions
+    local = LocalCache(
+        max_entries=cfg.local_max_entries,
+        max_bytes=cfg.local_max_entries * 256,
+        ttl=cfg.local_ttl,
+    )
+    register_metrics(local, "permissions")
+    return PermissionCache(
+        engine,
+        RedisCache(
+            redis_client,
+            namespace=f"ima:perm:{engine.version}",
+            ttl=cfg.cache_ttl,
+            local=local,
+        ),
+    )
+
+
+# Compiled once at startup
+permission_engine = PermissionEngine()
+permission_cache = _build_permission_cache(permission_engine)
+
+
+async def update_user_access(
+    db: AsyncSession,
+    uids: Sequence[uuid.UUID],
+    *,
+    is_active: Optional[bool] = None,
+    role: Optional[UserRole] = None,
+) -> int:
+    """
+    Change users' role and/or status, commit, and evict their cached masks.
+
+    Deactivated users' login sessions are revoked (one pipelined ``INCR``
+    each). Returns the number of users updated.
+    """
+    updated = await crud.bulk_update_users(db, uids, is_active=is_active, role=role)
+    await crud.commit(db)
+    await permission_cache.invalidate(*uids)
+    if is_active is False:
+        await session_store.revoke_all([str(uid) for uid, _ in updated])
+    return len(updated)
+
+
+def require_permission(
+    action: Action, resource: str
+) -> Callable[..., Awaitable[Claims]]:
+    """
+    Route dependency allowing the bearer only if they may ``action`` ``resource``.
+
+    Usage::
+
+        @router.delete("/{uid}", dependencies=[Depends(
+            require_permission(Action.DELETE, "users"))])
+
+    Raises
+    ------
+    HTTPException
+        401 if the token subject is not a known user, 403 if the permission
+        is not granted.
+    """
+    if not permission_engine.knows(action, resource):
+        raise ValueError(f"Unknown permission {resource}:{action}")
+
+    async def dependency(
+        claims: Claims = Depends(get_token_claims),
+        db: AsyncSession = Depends(get_db),
+    ) -> Claims:
+        try:
+            mask = await permission_cache.effective_mask(db, uuid.UUID(claims["sub"]))
+        except (KeyError, ValueError):
+            mask = None
+        if mask is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Unknown user",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if not permission_engine.allows(mask, action, resource):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission {resource}:{action.value}",
+            )
+        return claims
+
+    return dependency
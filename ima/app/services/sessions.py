@@ -0,0 +1,225 @@
+"""
+Login sessions and refresh tokens for IMA service, stored in Redis.
+
+A refresh token is ``<uid>.<generation>.<sid>.<secret>``. Redis holds two
+kinds of keys, both expiring through TTLs (there is no sweeper job):
+
+* ``<prefix>:<sid>`` - the session: a compact ``<uid>:<digest>`` string,
+  the digest being a 128-bit BLAKE2b hash of the secret (the secret
+  itself is never stored), followed by ``:<previous digest>`` once the
+  session has been rotated. It expires ``SESSION_TTL`` seconds after the
+  session was created or last rotated.
+* ``<prefix>:gen:<uid>`` - the user's session generation (missing means
+  0), kept alive as long as the user's newest session.
+
+Validating a token is one ``MGET`` of both keys: the session must exist
+with the token's digest and the token's generation must be the user's
+current one. "Log out everywhere" and deactivating a user are therefore a
+single ``INCR`` - no key scan, no per-session delete; the orphaned
+sessions simply expire.
+
+Creating a session is one pipelined ``MULTI`` (the generation embedded in
+the token is read in the same transaction that writes the session).
+Rotating one is a compare-and-swap in a Lua script: the new secret is
+stored only if the presented one matches the current digest and
+generation. Presenting the secret the session was last rotated away from
+- a replayed, possibly stolen token - revokes the session; any other
+mismatch is just rejected, so a forged token carrying a victim's ``sid``
+changes nothing.
+
+Access tokens issued for a session carry ``sid`` and ``gen`` claims;
+``TokenVerifier`` checks them with the same ``MGET``.
+"""
+
+import hashlib
+import hmac
+import secrets
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.redis_cache import redis_client
+
+# Longer tokens are rejected before any work is done
+MAX_TOKEN_LENGTH = 160
+
+# KEYS[1] = session key, KEYS[2] = generation key; ARGV[1] = uid,
+# ARGV[2] = token generation, ARGV[3] = presented digest, ARGV[4] = new
+# digest, ARGV[5] = ttl. Returns 1 when rotated, -1 when a replay ended the
+# session, 0 otherwise. Digests are hashes of random secrets, so comparing
+# them in variable time leaks nothing useful.
+ROTATE_LUA = """
+local value = redis.call("GET", KEYS[1])
+if not value then
+    return 0
+end
+local uid, digest, previous = string.match(value, "^([^:]*):([^:]*):?([^:]*)$")
+if uid ~= ARGV[1] then
+    return 0
+end
+if digest == ARGV[3] then
+    if tonumber(redis.call("GET", KEYS[2]) or "0") ~= tonumber(ARGV[2]) then
+        return 0
+    end
+    local rotated = uid .. ":" .. ARGV[4] .. ":" .. digest
+    redis.call("SET", KEYS[1], rotated, "EX", ARGV[5])
+    redis.call("EXPIRE", KEYS[2], ARGV[5])
+    return 1
+end
+if previous == ARGV[3] then
+    redis.call("DEL", KEYS[1])
+    return -1
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class Session:
+    """A live login session."""
+
+    uid: str
+    sid: str
+    generation: int
+
+
+def _parse(token: str) -> Optional[Tuple[str, int, str, str]]:
+    """(uid, generation, sid, secret) of a well-formed refresh token."""
+    if len(token) > MAX_TOKEN_LENGTH:
+        return None
+    parts = token.split(".")
+    if len(parts) != 4 or not parts[1].isdigit():
+        return None
+    return parts[0], int(parts[1]), parts[2], parts[3]
+
+
+class SessionStore:
+    """Sessions with per-user generations for O(1) bulk revocation."""
+
+    def __init__(self, client: redis.Redis, ttl: int, prefix: str) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._rotate = client.register_script(ROTATE_LUA)
+
+    def session_key(self, sid: str) -> str:
+        """Redis key of session ``sid``."""
+        return f"{self.prefix}:{sid}"
+
+    def generation_key(self, uid: str) -> str:
+        """Redis key of the user's session generation."""
+        return f"{self.prefix}:gen:{uid}"
+
+    @staticmethod
+    def _digest(secret: str) -> str:
+        return hashlib.blake2b(secret.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _token(session: Session, secret: str) -> str:
+        return f"{session.uid}.{session.generation}.{session.sid}.{secret}"
+
+    async def create(self, uid: str) -> Tuple[Session, str]:
+        """Start a session for ``uid``; return it and its refresh token."""
+        sid, secret = secrets.token_urlsafe(12), secrets.token_urlsafe(32)
+        generation_key = self.generation_key(uid)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(generation_key)
+            pipe.set(
+                self.session_key(sid), f"{uid}:{self._digest(secret)}", ex=self.ttl
+            )
+            # Outlive the newest session, so an old generation cannot return
+            pipe.expire(generation_key, self.ttl)
+            generation, _, _ = await pipe.execute()
+        session = Session(uid, sid, int(generation or 0))
+        return session, self._token(session, secret)
+
+    async def validate(self, token: str) -> Optional[Session]:
+        """The session of a refresh token, or None if it is not valid."""
+        parsed = _parse(token)
+        if parsed is None:
+            return None
+        uid, generation, sid, secret = parsed
+        current, value = await self.client.mget(
+            self.generation_key(uid), self.session_key(sid)
+        )
+        if value is None or int(current or 0) != generation:
+            return None
+        owner, digest = value.split(":")[:2]
+        if owner != uid or not hmac.compare_digest(digest, self._digest(secret)):
+            return None
+        return Session(uid, sid, generation)
+
+    async def is_live(
+        self, uid: str, sid: str, generation: int, *keys: str
+    ) -> Tuple[bool, List[Any]]:
+        """
+        Whether an access token's session is still live.
+
+        ``keys`` are fetched in the same ``MGET`` (e.g. a revocation flag);
+        their values are returned alongside.
+        """
+        current, value, *extra = await self.client.mget(
+            self.generation_key(uid), self.session_key(sid), *keys
+        )
+        live = (
+            value is not None
+            and value.startswith(f"{uid}:")
+            and int(current or 0) == generation
+        )
+        return live, extra
+
+    async def rotate(self, token: str) -> Optional[Tuple[Session, str]]:
+        """
+        Exchange a refresh token for a new one in the same session.
+
+        Returns None if the token is not valid; replaying the token the
+        session was last rotated from also ends the session.
+        """
+        parsed = _parse(token)
+        if parsed is None:
+            return None
+        uid, generation, sid, secret = parsed
+        new_secret = secrets.token_urlsafe(32)
+        rotated = await self._rotate(
+            keys=[self.session_key(sid), self.generation_key(uid)],
+            args=[
+                uid,
+                generation,
+                self._digest(secret),
+                self._digest(new_secret),
+                self.ttl,
+            ],
+        )
+        if int(rotated) != 1:
+            return None
+        session = Session(uid, sid, generation)
+        return session, self._token(session, new_secret)
+
+    async def revoke(self, token: str) -> bool:
+        """End the session of a refresh token (log out); False if not valid."""
+        session = await self.validate(token)
+        if session is None:
+            return False
+        await self.client.delete(self.session_key(session.sid))
+        return True
+
+    async def revoke_all(self, uids: Sequence[str]) -> None:
+        """End every session of each user: one ``INCR`` per user, pipelined."""
+        if not uids:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for uid in uids:
+                generation_key = self.generation_key(uid)
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, self.ttl)
+            await pipe.execute()
+
+
+def _build_store() -> SessionStore:
+    cfg = settings.sessions
+    return SessionStore(redis_client, ttl=cfg.ttl, prefix=cfg.prefix)
+
+
+# Shared session store
+session_store = _build_store()
@@ -0,0 +1,393 @@
+"""
+Bearer token (JWT) verification for IMA service.
+
+Per-request cost is kept to a hash and a dictionary lookup:
+
+* signing keys are parsed into key objects once (static key from
+  ``JWT_KEY`` or a JWKS endpoint from ``JWT_JWKS_URL``); JWKS keys are
+  refreshed periodically and on an unknown ``kid`` (key rotation), with
+  refetches throttled by ``JWT_JWKS_MIN_REFRESH_INTERVAL``,
+* tokens that passed verification are kept in a bounded LRU keyed by
+  their SHA-256 digest until their ``exp``, so repeat requests skip
+  decoding and the signature check,
+* revocation costs one Redis ``EXISTS`` on the token's ``jti``; tokens
+  issued for a login session (``sid``/``gen`` claims, see
+  ``app.services.sessions``) are checked against the session and the
+  ``jti`` in a single ``MGET`` instead.
+
+``TokenIssuer`` signs the access tokens handed out at login.
+
+Failed verifications are never cached.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import jwt
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.redis_cache import redis_client
+from app.services.sessions import SessionStore, session_store
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+logger = logging.getLogger(__name__)
+
+Claims = Dict[str, Any]
+
+
+class InvalidToken(Exception):
+    """Raised when a bearer token fails verification; map to HTTP 401."""
+
+
+class TokenRevoked(InvalidToken):
+    """Raised when a valid token has been revoked."""
+
+
+class JwksUnavailable(Exception):
+    """The JWKS endpoint could not be fetched."""
+
+
+class StaticKeySet:
+    """A single key (HMAC secret or PEM public key), prepared once."""
+
+    def __init__(self, key: str, algorithm: str) -> None:
+        self.algorithm = algorithm
+        self.key = jwt.get_algorithm_by_name(algorithm).prepare_key(key)
+
+    async def get(self, kid: Optional[str]) -> Tuple[Any, str]:
+        """Key object and algorithm for ``kid`` (ignored)."""
+        return self.key, self.algorithm
+
+
+async def _http_fetch(url: str) -> Dict[str, Any]:
+    # Deferred: only JWKS deployments pay for importing httpx
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.json()
+    except httpx.HTTPError as exc:
+        raise JwksUnavailable(str(exc)) from exc
+
+
+class JwksKeySet:
+    """
+    Keys from a JWKS endpoint, cached by ``kid`` and refreshed on rotation.
+
+    Concurrent misses share one fetch, and after an unknown ``kid`` or a
+    failed fetch the endpoint is not asked again for ``min_refresh_interval``
+    seconds, so bogus kids or an outage cannot queue fetches behind the lock.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float,
+        min_refresh_interval: float,
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]] = _http_fetch,
+    ) -> None:
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._keys: Dict[Optional[str], jwt.PyJWK] = {}
+        self._fetched_at = float("-inf")
+        self._retry_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        """Fetch the JWKS and replace the keys (once for concurrent callers)."""
+        seen = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != seen or time.monotonic() < self._retry_at:
+                return
+            try:
+                data = await self._fetch(self.url)
+                keys = jwt.PyJWKSet.from_dict(data).keys
+            finally:
+                self._retry_at = time.monotonic() + self.min_refresh_interval
+            self._keys = {key.key_id: key for key in keys}
+            self._fetched_at = time.monotonic()
+            logger.info("Loaded %d signing keys from %s", len(keys), self.url)
+
+    async def get(self, kid: Optional[str]) -> Tuple[Any, str]:
+        """Key object and algorithm for ``kid``, refetching when unknown."""
+        now = time.monotonic()
+        stale = now - self._fetched_at > self.refresh_interval
+        unknown = kid not in self._keys
+        if (stale or unknown) and now >= self._retry_at:
+            try:
+                await self.refresh()
+            except (JwksUnavailable, ValueError, jwt.PyJWTError) as exc:
+                # Keep serving the keys we have; a rotation will be retried
+                logger.warning("JWKS refresh failed: %s", exc)
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidToken(f"Unknown signing key {kid!r}")
+        return key.key, key.algorithm_name
+
+
+class RevocationList:
+    """Revoked token ids in Redis, each kept until the token would expire."""
+
+    def __init__(self, client: redis.Redis, prefix: str = "ima:jwt:revoked") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def key(self, jti: str) -> str:
+        """Redis key flagging ``jti`` as revoked."""
+        return f"{self.prefix}:{jti}"
+
+    async def is_revoked(self, jti: str) -> bool:
+        """One ``EXISTS`` round trip."""
+        return bool(await self.client.exists(self.key(jti)))
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        """Revoke ``jti`` until ``exp`` (unix time)."""
+        ttl = max(int(exp - time.time()) + 1, 1)
+        await self.client.set(self.key(jti), 1, ex=ttl)
+
+
+class TokenVerifier:
+    """Verify JWTs, caching successful verifications until expiry."""
+
+    def __init__(
+        self,
+        keys: Any,
+        algorithms: List[str],
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None,
+        leeway: float = 0.0,
+        cache_size: int = 10_000,
+        revocations: Optional[RevocationList] = None,
+        sessions: Optional[SessionStore] = None,
+    ) -> None:
+        self.keys = keys
+        self.algorithms = algorithms
+        self.issuer = issuer
+        self.audience = audience
+        self.leeway = leeway
+        self.cache_size = cache_size
+        self.revocations = revocations
+        self.sessions = sessions
+        self._cache: "OrderedDict[bytes, Tuple[Claims, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, digest: bytes) -> Optional[Claims]:
+        entry = self._cache.get(digest)
+        if entry is None:
+            return None
+        claims, expires = entry
+        if time.time() >= expires:
+            del self._cache[digest]
+            return None
+        self._cache.move_to_end(digest)
+        return claims
+
+    async def _decode(self, token: str) -> Claims:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key, algorithm = await self.keys.get(kid)
+            if algorithm not in self.algorithms:
+                raise InvalidToken(f"Algorithm {algorithm} is not allowed")
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                issuer=self.issuer,
+                audience=self.audience,
+                leeway=self.leeway,
+                options={"require": ["exp"], "verify_aud": self.audience is not None},
+            )
+        except jwt.InvalidTokenError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+    async def verify(self, token: str) -> Claims:
+        """
+        Return the claims of ``token``.
+
+        Raises
+        ------
+        InvalidToken
+            If the token is malformed, badly signed, expired or revoked,
+            or its login session has ended.
+        redis.RedisError
+            If the revocation list or session store cannot be reached.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self._cached(digest)
+        if claims is None:
+            self.misses += 1
+            claims = await self._decode(token)
+            self._cache[digest] = (claims, float(claims["exp"]) + self.leeway)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+
+        jti = claims.get("jti")
+        sid = claims.get("sid")
+        if self.sessions is not None and sid is not None:
+            await self._check_session(self.sessions, claims, sid, jti)
+        elif self.revocations is not None and jti is not None:
+            if await self.revocations.is_revoked(jti):
+                raise TokenRevoked(f"Token {jti} has been revoked")
+        return claims
+
+    async def _check_session(
+        self, sessions: SessionStore, claims: Claims, sid: str, jti: Optional[str]
+    ) -> None:
+        """Session liveness and ``jti`` revocation in one ``MGET``."""
+        keys = [self.revocations.key(jti)] if self.revocations and jti else []
+        live, revoked = await sessions.is_live(
+            claims["sub"], sid, int(claims.get("gen", 0)), *keys
+        )
+        if not live:
+            raise TokenRevoked(f"Session {sid} has ended")
+        if any(flag is not None for flag in revoked):
+            raise TokenRevoked(f"Token {jti} has been revoked")
+
+    def forget(self, token: str) -> None:
+        """Drop ``token`` from the verification cache."""
+        self._cache.pop(hashlib.sha256(token.encode()).digest(), None)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters."""
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class TokenIssuer:
+    """Sign access tokens with a key prepared once."""
+
+    def __init__(
+        self,
+        key: str,
+        algorithm: str,
+        ttl: int,
+        kid: Optional[str] = None,
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None,
+    ) -> None:
+        self.algorithm = algorithm
+        self.key = jwt.get_algorithm_by_name(algorithm).prepare_key(key)
+        self.ttl = ttl
+        self.headers = {"kid": kid} if kid else None
+        self.issuer = issuer
+        self.audience = audience
+
+    def issue(self, subject: str, **claims: Any) -> str:
+        """Signed access token for ``subject`` with a unique ``jti``."""
+        now = int(time.time())
+        payload: Claims = {
+            "sub": subject,
+            "iat": now,
+            "exp": now + self.ttl,
+            "jti": uuid.uuid4().hex,
+            **claims,
+        }
+        if self.issuer:
+            payload["iss"] = self.issuer
+        if self.audience:
+            payload["aud"] = self.audience
+        return jwt.encode(payload, self.key, self.algorithm, headers=self.headers)
+
+
+def _build_issuer() -> Optional[TokenIssuer]:
+    cfg = settings.jwt
+    algorithm = cfg.algorithms.split(",")[0].strip()
+    key = cfg.signing_key or (cfg.key if algorithm.startswith("HS") else None)
+    if not key:
+        return None
+    return TokenIssuer(
+        key,
+        algorithm,
+        cfg.access_token_ttl,
+        kid=cfg.signing_kid,
+        issuer=cfg.issuer,
+        audience=cfg.audience,
+    )
+
+
+# Shared issuer; None until JWT_SIGNING_KEY (or an HMAC JWT_KEY) is configured
+token_issuer = _build_issuer()
+
+
+def _build_verifier() -> TokenVerifier:
+    cfg = settings.jwt
+    algorithms = [alg.strip() for alg in cfg.algorithms.split(",") if alg.strip()]
+    keys: Any = None
+    if cfg.jwks_url:
+        keys = JwksKeySet(
+            cfg.jwks_url, cfg.jwks_refresh_interval, cfg.jwks_min_refresh_interval
+        )
+    elif cfg.key:
+        keys = StaticKeySet(cfg.key, algorithms[0])
+    return TokenVerifier(
+        keys,
+        algorithms,
+        issuer=cfg.issuer,
+        audience=cfg.audience,
+        leeway=cfg.leeway,
+        cache_size=cfg.cache_size,
+        revocations=RevocationList(redis_client) if cfg.revocation_enabled else None,
+        sessions=session_store if settings.sessions.enabled else None,
+    )
+
+
+# Shared verifier; keys are None until JWT_KEY or JWT_JWKS_URL is configured
+token_verifier = _build_verifier()
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def get_token_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Claims:
+    """
+    FastAPI dependency returning the verified claims of the bearer token.
+
+    Raises
+    ------
+    HTTPException
+        401 for a missing or invalid token, 503 if token verification is
+        not configured or the revocation list (or session store) is
+        unreachable.
+    """
+    if token_verifier.keys is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token verification is not configured",
+        )
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing bearer token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return await token_verifier.verify(credentials.credentials)
+    except InvalidToken as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from exc
+    except redis.RedisError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation list unavailable",
+        ) from exc
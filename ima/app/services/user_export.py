@@ -0,0 +1,77 @@
+"""
+User export for IMA service (``GET /users/export``).
+
+Streams the ``users`` table as NDJSON or CSV without loading it: rows come
+from ``crud.stream_users`` (a server-side cursor, ``EXPORT_FETCH_SIZE`` rows
+per fetch, plain tuples of the public columns - never credentials) and
+each fetch is encoded into one response chunk, so memory stays at one
+fetch whatever the tenant size.
+
+Between fetches the client connection is checked; once the client has
+gone, the export stops and the cursor is closed instead of reading the
+rest of the table.
+"""
+
+import csv
+import enum
+import io
+import logging
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, List, Sequence
+
+from app.core.response import dumps
+from app.db.users import crud
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+FIELDS: List[str] = [column.key for column in crud.USER_RECORD_COLUMNS]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def encode_ndjson(rows: Sequence[Sequence[Any]]) -> bytes:
+    """One JSON object per row, newline-terminated."""
+    return b"".join(dumps(dict(zip(FIELDS, row))) + b"\n" for row in rows)
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def encode_csv(rows: Sequence[Sequence[Any]], header: bool = False) -> bytes:
+    """CSV records for ``rows``, preceded by the header row if asked."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows([_cell(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_users(
+    db: AsyncSession,
+    fmt: str,
+    fetch_size: int,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    active_only: bool = False,
+) -> AsyncGenerator[bytes, None]:
+    """Response body chunks, one per fetch, in ``fmt`` (``ndjson`` or ``csv``)."""
+    exported = 0
+    if fmt == "csv":
+        yield encode_csv((), header=True)
+    async with aclosing(
+        crud.stream_users(db, fetch_size, active_only=active_only)
+    ) as partitions:
+        async for rows in partitions:
+            if await is_disconnected():
+                logger.info("User export cancelled after %d rows", exported)
+                return
+            yield encode_csv(rows) if fmt == "csv" else encode_ndjson(rows)
+            exported += len(rows)
+    logger.info("Exported %d users", exported)
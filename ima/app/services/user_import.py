@@ -0,0 +1,478 @@
+"""
+Bulk user import for IMA service (``POST /users/import``).
+
+Loads a staff directory streamed as NDJSON (one JSON object per line) or
+CSV (header row, then one user per record) without holding the file in
+memory:
+
+1. the request body is split into records as it arrives,
+2. every ``IMPORT_BATCH_SIZE`` records are validated (``ImportRow``, in
+   a worker thread) and their initial passwords hashed in the password
+   service's import pool, spread over its workers (logins hash in a
+   separate pool and never queue behind an import),
+3. each batch is written with binary ``COPY`` into a temporary staging
+   table (``crud.IMPORT_TABLE``),
+4. once the body is consumed, one ``INSERT ... SELECT`` merges the staging
+   table into ``users``, skipping registered and repeated emails, and the
+   transaction commits: an import lands completely or not at all.
+
+Parsing and hashing run in a producer task at most ``IMPORT_QUEUE_DEPTH``
+batches ahead of ``COPY``; when the database falls behind, the body stops
+being read and TCP flow control slows the client down. Memory stays flat
+at a few batches whatever the file size.
+
+Rows are reported by line number: invalid ones as they are parsed, skipped
+ones after the merge (the first ``IMPORT_MAX_ERRORS`` are listed, all are
+counted). Progress is kept in Redis under the import id for
+``IMPORT_PROGRESS_TTL`` seconds (``GET /users/imports/{id}``).
+
+Rows may carry a ``password`` (hashed here, at argon2 cost: the pool, not
+the database, bounds throughput then), an argon2 ``hashed_password``
+carried over from another system, or neither: the account then has no
+usable password until one is set.
+
+Throughput (``bench_user_import``, one core): a row without a password
+costs about 80 us before COPY, some 8 s of CPU per 100k rows. A
+``password`` adds one argon2 hash, about 21 ms at the default cost, so
+100k rows with passwords take roughly 35 minutes per import worker
+(``PASSWORD_HASH_IMPORT_WORKERS``). Directories meant to load in well
+under a minute must carry ``hashed_password`` or no password.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.redis_cache import redis_client
+from app.core.response import dumps
+from app.db.users import crud
+from app.db.users.models import UserRole
+from app.db.users.schemas import UserCreate
+from app.services.email_filter import email_filter
+from app.services.passwords import PasswordService, password_service
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    ValidationError,
+    model_validator,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Stored for users imported without a password; never verifies
+UNUSABLE_PASSWORD = "!"
+
+# A parsed record: the fields, or why the line could not be read
+Record = Tuple[int, Union[Dict[str, Any], str]]
+
+FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "text/csv": "csv",
+}
+
+
+class ImportFailed(Exception):
+    """The body cannot be imported at all (e.g. an over-long line); map to 400."""
+
+
+class ImportRow(BaseModel):
+    """One user of an import file."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    username: str = Field(..., min_length=1, max_length=64)
+    email: EmailStr
+    first_name: Optional[str] = Field(default=None, max_length=64)
+    last_name: Optional[str] = Field(default=None, max_length=64)
+    role: UserRole = UserRole.USER
+    is_active: bool = True
+    is_verified: bool = False
+    password: Optional[str] = Field(default=None, min_length=8, max_length=128)
+    hashed_password: Optional[str] = Field(
+        default=None, max_length=512, pattern=r"^\$argon2(id|i|d)\$"
+    )
+
+    @model_validator(mode="after")
+    def _one_password(self) -> "ImportRow":
+        if self.password is not None and self.hashed_password is not None:
+            raise ValueError("give either password or hashed_password, not both")
+        return self
+
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    """``"ndjson"`` or ``"csv"`` for a Content-Type header, else None."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return FORMATS.get(media_type)
+
+
+# --- parsing ---
+
+
+async def _lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """Numbered lines of a streamed body (without the line terminator)."""
+    number, pending = 0, b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            number += 1
+            if len(line) > max_line_bytes:
+                raise ImportFailed(f"Line {number} exceeds {max_line_bytes} bytes")
+            yield number, line.rstrip(b"\r")
+        if len(pending) > max_line_bytes:
+            raise ImportFailed(f"Line {number + 1} exceeds {max_line_bytes} bytes")
+    if pending:
+        yield number + 1, pending.rstrip(b"\r")
+
+
+async def ndjson_records(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Record]:
+    """One record per non-blank line."""
+    async for number, line in _lines(chunks, max_line_bytes):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as exc:  # includes UnicodeDecodeError
+            yield number, f"invalid JSON: {exc}"
+            continue
+        if isinstance(fields, dict):
+            yield number, fields
+        else:
+            yield number, "expected a JSON object"
+
+
+async def csv_records(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Record]:
+    """
+    One record per CSV row, keyed by the header row; empty cells are omitted.
+
+    Quoted fields may span lines; a record is numbered by its first line.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+    async for number, line in _lines(chunks, max_line_bytes):
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            pending = []
+            yield number, f"invalid UTF-8: {exc}"
+            continue
+        if not pending:
+            start = number
+        pending.append(text)
+        record = "\n".join(pending)
+        if record.count('"') % 2:  # inside a quoted field
+            if len(record) > max_line_bytes:
+                raise ImportFailed(
+                    f"Record at line {start} exceeds {max_line_bytes} bytes"
+                )
+            continue
+        pending = []
+        if not record.strip():
+            continue
+        try:
+            fields = next(csv.reader([record]))
+        except csv.Error as exc:
+            yield start, f"invalid CSV: {exc}"
+            continue
+        if header is None:
+            header = [name.strip().lstrip("\ufeff") for name in fields]
+        elif len(fields) != len(header):
+            yield start, f"expected {len(header)} fields, got {len(fields)}"
+        else:
+            yield start, {k: v for k, v in zip(header, fields) if v != ""}
+    if pending:
+        yield start, "unterminated quoted field"
+
+
+def parse_records(
+    chunks: AsyncIterator[bytes], fmt: str, max_line_bytes: int
+) -> AsyncIterator[Record]:
+    """Records of a body in ``fmt`` (see ``import_format``)."""
+    parse = csv_records if fmt == "csv" else ndjson_records
+    return parse(chunks, max_line_bytes)
+
+
+# --- progress ---
+
+
+@dataclass
+class ImportReport:
+    """Progress and outcome of one import."""
+
+    id: str
+    status: str = "running"  # running | done | failed
+    rows: int = 0  # records read
+    invalid: int = 0  # records rejected by validation
+    staged: int = 0  # valid rows copied to the staging table
+    imported: int = 0  # users created
+    skipped: int = 0  # email already registered or repeated in the file
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    message: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def error(self, line: int, message: str, limit: int) -> None:
+        """Record a row error (listed while fewer than ``limit``)."""
+        if len(self.errors) < limit:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self, errors: bool = True) -> Dict[str, Any]:
+        """JSON-ready report; ``errors=False`` leaves the list out."""
+        data = asdict(self)
+        if not errors:
+            del data["errors"]
+        return data
+
+
+class ImportProgress:
+    """Import reports in Redis, expiring after ``ttl`` seconds."""
+
+    def __init__(self, client: redis.Redis, prefix: str, ttl: int) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def key(self, import_id: str) -> str:
+        """Redis key of import ``import_id``."""
+        return f"{self.prefix}:{import_id}"
+
+    async def save(self, report: ImportReport, errors: bool = False) -> None:
+        """Store ``report``; progress is best effort, failures are logged."""
+        try:
+            await self.client.set(
+                self.key(report.id), dumps(report.as_dict(errors)), ex=self.ttl
+            )
+        except (redis.RedisError, OSError) as exc:
+            logger.warning("Import %s progress not saved: %s", report.id, exc)
+
+    async def load(self, import_id: str) -> Optional[Dict[str, Any]]:
+        """The last saved report, or None."""
+        raw = await self.client.get(self.key(import_id))
+        return json.loads(raw) if raw is not None else None
+
+
+# --- importing ---
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in exc.errors(include_url=False)
+    )
+
+
+def validate_batch(
+    batch: Sequence[Record],
+) -> Tuple[List[Tuple[int, ImportRow]], List[Tuple[int, str]]]:
+    """Split a batch into valid rows and (line, error) pairs."""
+    valid: List[Tuple[int, ImportRow]] = []
+    invalid: List[Tuple[int, str]] = []
+    for line, fields in batch:
+        if isinstance(fields, str):
+            invalid.append((line, fields))
+            continue
+        try:
+            valid.append((line, ImportRow.model_validate(fields)))
+        except ValidationError as exc:
+            invalid.append((line, _describe(exc)))
+    return valid, invalid
+
+
+class UserImporter:
+    """Validate, hash and COPY batches of records, then merge them."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        report: ImportReport,
+        progress: ImportProgress,
+        passwords: PasswordService,
+        batch_size: int,
+        queue_depth: int,
+        max_errors: int,
+    ) -> None:
+        self.db = db
+        self.report = report
+        self.progress = progress
+        self.passwords = passwords
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self.max_errors = max_errors
+
+    async def _hash(self, passwords: Sequence[str]) -> List[str]:
+        """Hash in one import-pool job per worker, preserving order."""
+        if not passwords:
+            return []
+        size = -(-len(passwords) // self.passwords.import_workers)
+        parts = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+        hashed = await asyncio.gather(*(self.passwords.hash_many(p) for p in parts))
+        return [h for part in hashed for h in part]
+
+    async def prepare(self, batch: Sequence[Record]) -> List[Tuple[Any, ...]]:
+        """Staging-table records (``crud.IMPORT_COLUMNS``) of a batch's valid rows."""
+        # CPU-bound (mostly email syntax checks): keep it off the event loop
+        valid, invalid = await asyncio.to_thread(validate_batch, batch)
+        for line, message in invalid:
+            self.report.invalid += 1
+            self.report.error(line, message, self.max_errors)
+
+        hashed = iter(
+            await self._hash([row.password for _, row in valid if row.password])
+        )
+        now = datetime.utcnow()
+        records = []
+        for line, row in valid:
+            if row.password:
+                hashed_password = next(hashed)
+            else:
+                hashed_password = row.hashed_password or UNUSABLE_PASSWORD
+            user = UserCreate.model_construct(
+                **row.model_dump(exclude={"password", "hashed_password"}),
+                hashed_password=hashed_password,
+                is_superuser=False,
+            )
+            records.append(crud.copy_record(user, now) + (line,))
+        return records
+
+    async def _produce(
+        self,
+        records: AsyncIterator[Record],
+        queue: "asyncio.Queue[Optional[List[Tuple[Any, ...]]]]",
+    ) -> None:
+        try:
+            batch: List[Record] = []
+            async for record in records:
+                self.report.rows += 1
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    await queue.put(await self.prepare(batch))
+                    batch = []
+            if batch:
+                await queue.put(await self.prepare(batch))
+        except Exception:
+            await queue.put(None)  # the consumer then re-raises via the task
+            raise
+        await queue.put(None)
+
+    async def _stage(self, records: AsyncIterator[Record]) -> None:
+        """Copy prepared batches while the producer reads ahead."""
+        queue: "asyncio.Queue[Optional[List[Tuple[Any, ...]]]]" = asyncio.Queue(
+            maxsize=self.queue_depth
+        )
+        producer = asyncio.create_task(self._produce(records, queue))
+        try:
+            while (prepared := await queue.get()) is not None:
+                if prepared:
+                    self.report.staged += await crud.copy_users(
+                        self.db,
+                        prepared,
+                        table=crud.IMPORT_TABLE,
+                        columns=crud.IMPORT_COLUMNS,
+                    )
+                await self.progress.save(self.report)
+            await producer  # re-raise what stopped the producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    async def run(self, records: AsyncIterator[Record]) -> ImportReport:
+        """
+        Import ``records`` in one transaction and commit.
+
+        Raises
+        ------
+        ImportFailed
+            If the body is malformed beyond single rows.
+        PasswordHasherOverloaded
+            If the import password pool is saturated (respond with 503).
+
+        Nothing is imported when an error propagates; the report is saved
+        as failed.
+        """
+        report = self.report
+        try:
+            await crud.create_import_table(self.db)
+            await self._stage(records)
+            created = await crud.merge_import_table(self.db)
+            report.imported = len(created)
+            await email_filter.add(*(email for _, email in created))
+            report.skipped = report.staged - report.imported
+            if report.skipped and len(report.errors) < self.max_errors:
+                lines = await crud.import_conflicts(
+                    self.db, self.max_errors - len(report.errors)
+                )
+                for line in lines:
+                    report.error(
+                        line, "email already registered or repeated", self.max_errors
+                    )
+                report.errors.sort(key=lambda error: error["line"])
+            await crud.commit(self.db)
+        except BaseException as exc:
+            report.status = "failed"
+            report.message = str(exc) or type(exc).__name__
+            report.imported = 0
+            report.finished_at = time.time()
+            await asyncio.shield(self.progress.save(report, errors=True))
+            raise
+        report.status = "done"
+        report.finished_at = time.time()
+        await self.progress.save(report, errors=True)
+        logger.info(
+            "Import %s: %d rows, %d imported, %d skipped, %d invalid",
+            report.id,
+            report.rows,
+            report.imported,
+            report.skipped,
+            report.invalid,
+        )
+        return report
+
+
+def _build_progress() -> ImportProgress:
+    cfg = settings.imports
+    return ImportProgress(redis_client, cfg.progress_prefix, cfg.progress_ttl)
+
+
+# Shared progress store
+import_progress = _build_progress()
+
+
+def build_importer(db: AsyncSession, import_id: str) -> UserImporter:
+    """Importer for one request, configured from ``settings.imports``."""
+    cfg = settings.imports
+    return UserImporter(
+        db,
+        ImportReport(import_id),
+        import_progress,
+        password_service,
+        batch_size=cfg.batch_size,
+        queue_depth=cfg.queue_depth,
+        max_errors=cfg.max_errors,
+    )
@@ -0,0 +1,23 @@
+"""
+Microbenchmarks for the request hot path.
+
+Benchmarks live in ``bench_*.py`` modules (not collected by pytest) and are
+run with::
+
+    python -m app.tests.benchmarks run [--filter asgi] [--json out.json]
+    python -m app.tests.benchmarks compare app/tests/benchmarks/baseline.json out.json
+    python -m app.tests.benchmarks run --compare app/tests/benchmarks/baseline.json
+
+``compare`` exits 1 when any benchmark regressed significantly; see
+``harness`` for the statistics.
+"""
+
+import importlib
+import pkgutil
+
+
+def load_benchmarks() -> None:
+    """Import every ``bench_*`` module so its benchmarks register."""
+    for module in pkgutil.iter_modules(__path__):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"{__name__}.{module.name}")
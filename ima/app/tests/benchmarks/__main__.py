@@ -0,0 +1,99 @@
+"""
+Command line for the benchmark suite (see ``app.tests.benchmarks``).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import load_benchmarks
+from .harness import REGISTRY, Results, compare, format_time, run_all
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _print_entry(name: str, entry: Dict[str, Any]) -> None:
+    print(
+        f"{name:<40} {format_time(entry['median_s']):>10} "
+        f"± {format_time(entry['stdev_s']):>10}  "
+        f"{1 / entry['median_s']:>12,.0f} ops/s  (x{entry['number']})",
+        flush=True,
+    )
+
+
+def _report(rows: List[Dict[str, Any]]) -> bool:
+    """Print a comparison table; return whether anything regressed."""
+    for row in rows:
+        print(
+            f"{row['name']:<40} {format_time(row['baseline_s']):>10} -> "
+            f"{format_time(row['current_s']):>10}  {row['ratio']:>6.2f}x  "
+            f"p={row['p_value']:.4f}  {row['verdict']}"
+        )
+    regressions = [row["name"] for row in rows if row["verdict"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return True
+    print("\nNo significant regressions")
+    return False
+
+
+def _load(path: Path) -> Results:
+    return json.loads(path.read_text())
+
+
+def main() -> int:
+    """CLI entrypoint; returns the process exit code."""
+    parser = argparse.ArgumentParser(prog="python -m app.tests.benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run benchmarks")
+    run.add_argument("--filter", action="append", default=[], help="name substring")
+    run.add_argument("--rounds", type=int, default=25)
+    run.add_argument("--min-round-time", type=float, default=0.02, help="seconds")
+    run.add_argument("--json", type=Path, help="write results here")
+    run.add_argument("--compare", type=Path, help="baseline to compare against")
+
+    cmp = sub.add_parser("compare", help="compare two result files")
+    cmp.add_argument("baseline", type=Path, nargs="?", default=DEFAULT_BASELINE)
+    cmp.add_argument("current", type=Path)
+
+    for command in (run, cmp):
+        command.add_argument("--alpha", type=float, default=0.01)
+        command.add_argument(
+            "--threshold", type=float, default=0.10, help="min relative slowdown"
+        )
+
+    sub.add_parser("list", help="list benchmark names")
+    args = parser.parse_args()
+
+    load_benchmarks()
+    if args.command == "list":
+        print("\n".join(sorted(REGISTRY)))
+        return 0
+
+    if args.command == "compare":
+        rows = compare(
+            _load(args.baseline), _load(args.current), args.alpha, args.threshold
+        )
+        return 1 if _report(rows) else 0
+
+    results = run_all(
+        args.filter,
+        rounds=args.rounds,
+        min_round_time=args.min_round_time,
+        progress=_print_entry,
+    )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=1) + "\n")
+        print(f"\nResults written to {args.json}")
+    if args.compare:
+        print()
+        rows = compare(_load(args.compare), results, args.alpha, args.threshold)
+        return 1 if _report(rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Full ASGI round trips for the health routes.
+
+Requests go through the real app (middleware, routing, dependencies,
+encoding) over httpx's in-process ASGI transport; only the database
+session and the Redis PING are replaced, so the numbers are the service's
+own per-request overhead.
+"""
+
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+from unittest.mock import patch
+
+import httpx
+from app.api.v1.health.router import full_health_cache
+from app.core.redis_cache import redis_client
+from app.main import app
+from app.tests.fakes import FakeSession
+
+from .harness import benchmark
+
+client = httpx.AsyncClient(
+    transport=httpx.ASGITransport(app=app), base_url="http://bench"
+)
+
+
+async def _pong() -> bool:
+    return True
+
+
+@contextmanager
+def mocked_backends() -> Iterator[None]:
+    """Patch the session factory and Redis PING for the whole benchmark."""
+    with ExitStack() as stack:
+        stack.enter_context(patch("app.db.session.AsyncSessionLocal", new=FakeSession))
+        stack.enter_context(patch.object(redis_client, "ping", new=_pong))
+        full_health_cache.clear()
+        yield
+        full_health_cache.clear()
+
+
+async def _get(path: str) -> None:
+    response = await client.get(path)
+    assert response.status_code == 200, response.text
+
+
+@benchmark("asgi.health.server", setup=mocked_backends)
+async def health_server():
+    await _get("/api/v1/health/server")
+
+
+@benchmark("asgi.health.database", setup=mocked_backends)
+async def health_database():
+    await _get("/api/v1/health/database")
+
+
+@benchmark("asgi.health.redis", setup=mocked_backends)
+async def health_redis():
+    await _get("/api/v1/health/redis")
+
+
+@benchmark("asgi.health.full.cached", setup=mocked_backends)
+async def health_full_cached():
+    await _get("/api/v1/health/")
+
+
+@benchmark("asgi.health.full.uncached", setup=mocked_backends)
+async def health_full_uncached():
+    full_health_cache.clear()
+    await _get("/api/v1/health/")
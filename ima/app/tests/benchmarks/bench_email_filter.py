@@ -0,0 +1,39 @@
+"""
+Benchmarks for the registered-email filter in ``app.services.email_filter``.
+
+The filter is sized like production (``EMAIL_FILTER_CAPACITY`` 1M at 1%)
+and half full. A negative lookup is what a login for an unregistered email
+costs instead of a Postgres query; ``add`` includes the publish to the
+in-process ``FakeRedis``.
+"""
+
+from app.services.email_filter import EmailFilter
+from app.tests.fakes import FakeRedis
+
+from .harness import benchmark
+
+_filter = EmailFilter(
+    FakeRedis(),  # type: ignore[arg-type]
+    capacity=1_000_000,
+    error_rate=0.01,
+    prefix="bench:emails",
+    fetch_size=10000,
+)
+for _n in range(500_000):
+    _filter.bloom.add(f"user{_n}@example.com")
+_filter.ready = True
+
+
+@benchmark("email_filter.might_contain.negative")
+async def might_contain_negative():
+    await _filter.might_contain("nobody@example.com")
+
+
+@benchmark("email_filter.might_contain.positive")
+async def might_contain_positive():
+    await _filter.might_contain("user123@example.com")
+
+
+@benchmark("email_filter.add")
+async def add():
+    await _filter.add("new@example.com")
@@ -0,0 +1,48 @@
+"""
+Benchmarks for the health check helpers and response schema.
+"""
+
+from app.api.v1.health.schemas import HealthCheckResponse
+from app.api.v1.health.utils import check_health
+
+from .harness import benchmark
+
+
+async def _ok() -> bool:
+    return True
+
+
+async def _boom() -> bool:
+    raise ConnectionError("connection refused")
+
+
+@benchmark("health.check_health.ok")
+async def check_health_ok():
+    await check_health("Server", _ok, details_key="server")
+
+
+@benchmark("health.check_health.error")
+async def check_health_error():
+    await check_health("Redis", _boom, details_key="redis")
+
+
+@benchmark("health.schema.default_timestamp")
+def schema_default_timestamp():
+    # Exercises the __import__("datetime") default factory
+    HealthCheckResponse(
+        code=200,
+        status="success",
+        message="Server health check passed",
+        data={"status": "ok", "details": {"server": "ok"}},
+    )
+
+
+@benchmark("health.schema.explicit_timestamp")
+def schema_explicit_timestamp():
+    HealthCheckResponse(
+        code=200,
+        status="success",
+        message="Server health check passed",
+        timestamp="2026-01-01T00:00:00Z",
+        data={"status": "ok", "details": {"server": "ok"}},
+    )
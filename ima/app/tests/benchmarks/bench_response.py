@@ -0,0 +1,38 @@
+"""
+Benchmarks for the response envelope helpers in ``app.core.response``.
+"""
+
+from app.core.response import _build_response, error_response, success_response
+
+from .harness import benchmark
+
+USER = {
+    "uid": "6f1c2b9e-3d7a-4c55-9a3e-0f4b8c1d2e3f",
+    "username": "alice",
+    "email": "alice@example.com",
+    "first_name": "Alice",
+    "last_name": "Liddell",
+    "role": "user",
+    "is_active": True,
+}
+USER_PAGE = {"items": [USER] * 50, "next_cursor": "MjAyNi0xMC0xOA"}
+
+
+@benchmark("response.build_response.no_data")
+def build_response_no_data():
+    _build_response(200, "success", "Server health check passed")
+
+
+@benchmark("response.success_response.user")
+def success_response_user():
+    success_response(data=USER, message="Current user")
+
+
+@benchmark("response.success_response.page_50")
+def success_response_page():
+    success_response(data=USER_PAGE, message="Users")
+
+
+@benchmark("response.error_response.details")
+def error_response_details():
+    error_response("Invalid input", details={"field": "email", "error": "invalid"})
@@ -0,0 +1,35 @@
+"""
+Benchmarks for the session store in ``app.services.sessions``.
+
+Redis is the in-process ``FakeRedis``, so these time the store's own work
+per operation (token parsing, hashing, the constant-time compare) without
+the network round trip; ops/sec is printed alongside.
+"""
+
+import asyncio
+
+from app.services.sessions import SessionStore
+from app.tests.fakes import FakeRedis
+
+from .harness import benchmark
+
+UID = "6f1c2b9e-3d7a-4c55-9a3e-0f4b8c1d2e3f"
+
+_store = SessionStore(FakeRedis(), ttl=3600, prefix="bench:sess")  # type: ignore[arg-type]
+_session, _token = asyncio.run(_store.create(UID))
+_forged = _token[:-4] + "AAAA"
+
+
+@benchmark("sessions.validate")
+async def validate():
+    await _store.validate(_token)
+
+
+@benchmark("sessions.validate.forged")
+async def validate_forged():
+    await _store.validate(_forged)
+
+
+@benchmark("sessions.is_live")
+async def is_live():
+    await _store.is_live(UID, _session.sid, _session.generation)
@@ -0,0 +1,17 @@
+"""
+Benchmarks for loading settings from the environment and ``.env``.
+"""
+
+from app.core.config import RedisSettings, Settings
+
+from .harness import benchmark
+
+
+@benchmark("settings.load.all")
+def load_settings():
+    Settings()  # type: ignore[call-arg]
+
+
+@benchmark("settings.load.redis")
+def load_redis_settings():
+    RedisSettings()  # type: ignore[call-arg]
@@ -0,0 +1,77 @@
+"""
+Benchmarks for the bulk user import in ``app.services.user_import``.
+
+Time the per-row work done before COPY - splitting the body, parsing and
+validating rows, building staging records - for a 1000-row batch without
+passwords to hash, and for a small batch whose rows carry passwords,
+hashed at the configured argon2 cost in the import pool (the database
+side is not included).
+"""
+
+import json
+
+from app.services.user_import import (
+    ImportProgress,
+    ImportReport,
+    UserImporter,
+    csv_records,
+    ndjson_records,
+)
+from app.services.passwords import password_service
+from app.tests.fakes import FakeRedis
+
+from .harness import benchmark
+
+ROWS = [
+    {
+        "username": f"user{n}",
+        "email": f"user{n}@example.com",
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "role": "user",
+    }
+    for n in range(1000)
+]
+NDJSON = "\n".join(json.dumps(row) for row in ROWS).encode()
+PASSWORDS = "\n".join(
+    json.dumps({**row, "password": f"initial secret {n}"})
+    for n, row in enumerate(ROWS[:32])
+).encode()
+CSV = (
+    "username,email,first_name,last_name,role\n"
+    + "\n".join(",".join(row.values()) for row in ROWS)
+).encode()
+CHUNK = 64 * 1024
+
+_importer = UserImporter(
+    None,  # type: ignore[arg-type]
+    ImportReport("bench"),
+    ImportProgress(FakeRedis(), "bench:import", 60),  # type: ignore[arg-type]
+    password_service,
+    batch_size=len(ROWS),
+    queue_depth=1,
+    max_errors=0,
+)
+
+
+async def _chunks(body: bytes):
+    for start in range(0, len(body), CHUNK):
+        yield body[start : start + CHUNK]
+
+
+@benchmark("user_import.prepare.ndjson_1000")
+async def prepare_ndjson():
+    records = [r async for r in ndjson_records(_chunks(NDJSON), CHUNK)]
+    await _importer.prepare(records)
+
+
+@benchmark("user_import.prepare.csv_1000")
+async def prepare_csv():
+    records = [r async for r in csv_records(_chunks(CSV), CHUNK)]
+    await _importer.prepare(records)
+
+
+@benchmark("user_import.prepare.ndjson_passwords_32")
+async def prepare_passwords():
+    records = [r async for r in ndjson_records(_chunks(PASSWORDS), CHUNK)]
+    await _importer.prepare(records)
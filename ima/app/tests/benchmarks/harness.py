@@ -0,0 +1,261 @@
+"""
+Benchmark registry, runner and regression statistics.
+
+Each benchmark is a sync or async callable timed in ``rounds`` independent
+rounds of ``number`` calls (``number`` is calibrated so a round lasts at
+least ``min_round_time``). A round yields one sample: the mean time per
+call. Keeping every sample in the results file lets ``compare`` test
+whether two runs differ, instead of eyeballing two means.
+
+A benchmark regresses when its samples are significantly slower than the
+baseline's (two-sided Mann-Whitney U, ``p < alpha``) *and* the median
+slowed by more than ``threshold``: the first rejects noise, the second
+ignores differences too small to matter.
+"""
+
+import asyncio
+import gc
+import inspect
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import ExitStack, nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Sequence
+
+Results = Dict[str, Any]
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark."""
+
+    name: str
+    fn: Callable[[], Any]
+    setup: Optional[Callable[[], ContextManager[Any]]] = None
+
+    @property
+    def is_async(self) -> bool:
+        """Whether ``fn`` must be awaited."""
+        return inspect.iscoroutinefunction(self.fn)
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str, setup: Optional[Callable[[], ContextManager[Any]]] = None
+) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """
+    Register ``fn`` as benchmark ``name``.
+
+    ``setup`` is a context manager factory entered around all rounds (for
+    patches that must not be timed).
+    """
+
+    def decorator(fn: Callable[[], Any]) -> Callable[[], Any]:
+        if name in REGISTRY:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        REGISTRY[name] = Benchmark(name, fn, setup)
+        return fn
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+
+def _time_sync(fn: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+async def _time_async(fn: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return time.perf_counter() - start
+
+
+def _timed_round(
+    bench: Benchmark, number: int, loop: Optional[asyncio.AbstractEventLoop]
+) -> float:
+    """Seconds for ``number`` calls, with the cyclic GC off as in timeit."""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if loop is not None:
+            return loop.run_until_complete(_time_async(bench.fn, number))
+        return _time_sync(bench.fn, number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def run_benchmark(
+    bench: Benchmark,
+    rounds: int = 25,
+    min_round_time: float = 0.02,
+    warmup: int = 2,
+) -> Dict[str, Any]:
+    """Calibrate, warm up and time one benchmark; return its result entry."""
+    loop = asyncio.new_event_loop() if bench.is_async else None
+    setup = bench.setup() if bench.setup else nullcontext()
+    try:
+        with ExitStack() as stack:
+            if loop is not None:
+                asyncio.set_event_loop(loop)
+            stack.enter_context(setup)
+
+            number = 1
+            while _timed_round(bench, number, loop) < min_round_time:
+                number *= 2
+            for _ in range(warmup):
+                _timed_round(bench, number, loop)
+            samples = [
+                _timed_round(bench, number, loop) / number for _ in range(rounds)
+            ]
+    finally:
+        if loop is not None:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    return {
+        "number": number,
+        "rounds": rounds,
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min_s": min(samples),
+        "samples_s": samples,
+    }
+
+
+def run_all(
+    names: Optional[Sequence[str]] = None,
+    rounds: int = 25,
+    min_round_time: float = 0.02,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Results:
+    """Run the selected (default: all) benchmarks."""
+    selected = [
+        bench
+        for name, bench in sorted(REGISTRY.items())
+        if not names or any(pattern in name for pattern in names)
+    ]
+    results: Results = {"meta": environment(), "benchmarks": {}}
+    for bench in selected:
+        entry = run_benchmark(bench, rounds=rounds, min_round_time=min_round_time)
+        results["benchmarks"][bench.name] = entry
+        if progress is not None:
+            progress(bench.name, entry)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from; only comparable on a similar machine."""
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparing
+# ---------------------------------------------------------------------------
+
+
+def _ranks(values: Sequence[float]) -> List[float]:
+    """1-based ranks, ties sharing their average rank."""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def mann_whitney_p(a: Sequence[float], b: Sequence[float]) -> float:
+    """
+    Two-sided Mann-Whitney U p-value (normal approximation, tie corrected).
+
+    Accurate enough from ~10 samples per side, which every benchmark has.
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    combined = list(a) + list(b)
+    ranks = _ranks(combined)
+    u1 = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    ties: Dict[float, int] = {}
+    for value in combined:
+        ties[value] = ties.get(value, 0) + 1
+    tie_term = sum(t**3 - t for t in ties.values()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    z = (abs(u1 - n1 * n2 / 2) - 0.5) / sigma
+    return math.erfc(max(z, 0.0) / math.sqrt(2))
+
+
+def compare(
+    baseline: Results,
+    current: Results,
+    alpha: float = 0.01,
+    threshold: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """
+    Per-benchmark verdicts for the benchmarks present in both runs.
+
+    ``verdict`` is "regression", "improvement" or "same".
+    """
+    rows = []
+    for name, base in sorted(baseline["benchmarks"].items()):
+        run = current["benchmarks"].get(name)
+        if run is None:
+            continue
+        ratio = run["median_s"] / base["median_s"]
+        p_value = mann_whitney_p(base["samples_s"], run["samples_s"])
+        verdict = "same"
+        if p_value < alpha and ratio > 1 + threshold:
+            verdict = "regression"
+        elif p_value < alpha and ratio < 1 - threshold:
+            verdict = "improvement"
+        rows.append(
+            {
+                "name": name,
+                "baseline_s": base["median_s"],
+                "current_s": run["median_s"],
+                "ratio": ratio,
+                "p_value": p_value,
+                "verdict": verdict,
+            }
+        )
+    return rows
+
+
+def format_time(seconds: float) -> str:
+    """Human-readable duration (ns/us/ms/s)."""
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
@@ -0,0 +1,512 @@
+"""
+In-memory stand-ins for infrastructure used by unit tests and the
+load-test stand-in server (``scripts/standin_server.py``).
+
+``FakeRedis`` implements the subset of the ``redis.asyncio.Redis`` API the
+service uses, including streams with consumer groups and pipelines. Lua
+scripts cannot run here, so ``register_script`` looks up a Python
+implementation registered for the script source with
+``FakeRedis.script_handlers``.
+
+``FakeSession`` and ``FakeUserStore`` replace Postgres: the session accepts
+any statement and the store implements the users repository functions.
+"""
+
+import asyncio
+import fnmatch
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from redis.exceptions import ResponseError
+
+ScriptHandler = Callable[["FakeRedis", List[str], List[Any]], Awaitable[Any]]
+
+
+class FakeScript:
+    """Callable returned by FakeRedis.register_script."""
+
+    def __init__(self, client: "FakeRedis", source: str) -> None:
+        self.client = client
+        self.source = source
+
+    async def __call__(
+        self, keys: Optional[List[str]] = None, args: Optional[List[Any]] = None
+    ) -> Any:
+        if self.source not in FakeRedis.script_handlers:
+            # Registered lazily so importing this module does not import the
+            # app modules (and their Redis client) as a side effect
+            register_default_scripts()
+        handler = FakeRedis.script_handlers[self.source]
+        return await handler(self.client, list(keys or []), list(args or []))
+
+
+class FakePubSub:
+    """Pub/sub subscription delivering messages published on a FakeRedis."""
+
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.channels: List[str] = []
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self.client.subscribers.setdefault(channel, []).append(self.queue)
+            self.channels.append(channel)
+
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self) -> None:
+        for channel in self.channels:
+            self.client.subscribers[channel].remove(self.queue)
+        self.channels.clear()
+
+
+class FakePipeline:
+    """Queues FakeRedis commands and runs them in order on ``execute``."""
+
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.queued: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.queued.clear()
+
+    def __getattr__(self, name: str) -> Callable[..., "FakePipeline"]:
+        def queue(*args: Any, **kwargs: Any) -> "FakePipeline":
+            self.queued.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> List[Any]:
+        self.client.calls.append("EXEC")
+        queued, self.queued = self.queued, []
+        return [
+            await getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in queued
+        ]
+
+
+class FakeGroup:
+    """Consumer group state: delivery position and pending entries."""
+
+    def __init__(self, position: int) -> None:
+        self.position = position
+        # entry id -> [consumer, delivered at (monotonic), times delivered]
+        self.pending: Dict[str, List[Any]] = {}
+
+
+class FakeRedis:
+    """Minimal async, single-process Redis replacement (strings and streams)."""
+
+    script_handlers: Dict[str, ScriptHandler] = {}
+
+    def __init__(self) -> None:
+        self.store: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self.calls: List[str] = []
+        self.subscribers: Dict[str, List["asyncio.Queue[Dict[str, Any]]"]] = {}
+        self.streams: Dict[str, List[Tuple[str, Dict[str, str]]]] = {}
+        self.groups: Dict[Tuple[str, str], FakeGroup] = {}
+        self._next_id = 0
+
+    # --- helpers ---
+
+    def _alive(self, key: str) -> bool:
+        item = self.store.get(key)
+        if item is None:
+            return False
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self.store[key]
+            return False
+        return True
+
+    def _expiry(self, ex: Optional[float], px: Optional[int]) -> Optional[float]:
+        if px is not None:
+            return time.monotonic() + px / 1000
+        if ex is not None:
+            return time.monotonic() + ex
+        return None
+
+    # --- commands ---
+
+    async def ping(self) -> bool:
+        self.calls.append("PING")
+        return True
+
+    async def get(self, key: str) -> Any:
+        self.calls.append("GET")
+        return self.store[key][0] if self._alive(key) else None
+
+    async def mget(self, *keys: str) -> List[Any]:
+        self.calls.append("MGET")
+        flat = keys[0] if len(keys) == 1 and isinstance(keys[0], list) else keys
+        return [self.store[k][0] if self._alive(k) else None for k in flat]
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ex: Optional[float] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        xx: bool = False,
+        get: bool = False,
+    ) -> Any:
+        self.calls.append("SET")
+        alive = self._alive(key)
+        previous = self.store[key][0] if alive else None
+        if (nx and alive) or (xx and not alive):
+            return previous if get else None
+        self.store[key] = (value, self._expiry(ex, px))
+        return previous if get else True
+
+    async def expire(self, key: str, seconds: float) -> bool:
+        self.calls.append("EXPIRE")
+        if not self._alive(key):
+            return False
+        self.store[key] = (self.store[key][0], time.monotonic() + seconds)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        self.calls.append("DEL")
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.store[key]
+                removed += 1
+        return removed
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        self.calls.append("INCR")
+        value = int(self.store[key][0]) + amount if self._alive(key) else amount
+        expiry = self.store[key][1] if key in self.store else None
+        self.store[key] = (str(value), expiry)
+        return value
+
+    async def rename(self, src: str, dst: str) -> bool:
+        self.calls.append("RENAME")
+        if not self._alive(src):
+            raise ResponseError("no such key")
+        self.store[dst] = self.store.pop(src)
+        return True
+
+    async def renamenx(self, src: str, dst: str) -> bool:
+        self.calls.append("RENAMENX")
+        if not self._alive(src):
+            raise ResponseError("no such key")
+        if self._alive(dst):
+            return False
+        self.store[dst] = self.store.pop(src)
+        return True
+
+    async def exists(self, *keys: str) -> int:
+        self.calls.append("EXISTS")
+        return sum(1 for key in keys if self._alive(key))
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        return [
+            k
+            for k in list(self.store)
+            if self._alive(k) and fnmatch.fnmatch(k, pattern)
+        ]
+
+    async def publish(self, channel: str, message: Any) -> int:
+        self.calls.append("PUBLISH")
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(queues)
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    def register_script(self, source: str) -> FakeScript:
+        return FakeScript(self, source)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    # --- streams ---
+
+    def _entry(self, name: str, entry_id: str) -> Optional[Dict[str, str]]:
+        return next((f for i, f in self.streams.get(name, []) if i == entry_id), None)
+
+    async def xadd(
+        self,
+        name: str,
+        fields: Dict[str, Any],
+        maxlen: Optional[int] = None,
+        approximate: bool = True,
+    ) -> str:
+        self.calls.append("XADD")
+        self._next_id += 1
+        entry_id = f"{self._next_id}-0"
+        decoded = {
+            k: v.decode() if isinstance(v, bytes) else str(v) for k, v in fields.items()
+        }
+        entries = self.streams.setdefault(name, [])
+        entries.append((entry_id, decoded))
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[: len(entries) - maxlen]
+        return entry_id
+
+    async def xlen(self, name: str) -> int:
+        return len(self.streams.get(name, []))
+
+    async def xrange(self, name: str) -> List[Tuple[str, Dict[str, str]]]:
+        return list(self.streams.get(name, []))
+
+    async def xgroup_create(
+        self, name: str, groupname: str, id: str = "$", mkstream: bool = False
+    ) -> bool:
+        self.calls.append("XGROUP")
+        if (name, groupname) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        if name not in self.streams and not mkstream:
+            raise ResponseError("ERR no such key")
+        entries = self.streams.setdefault(name, [])
+        self.groups[(name, groupname)] = FakeGroup(0 if id == "0" else len(entries))
+        return True
+
+    async def xreadgroup(
+        self,
+        groupname: str,
+        consumername: str,
+        streams: Dict[str, str],
+        count: Optional[int] = None,
+        block: Optional[int] = None,
+    ) -> List[Any]:
+        self.calls.append("XREADGROUP")
+        response = []
+        for name in streams:
+            group = self.groups[(name, groupname)]
+            entries = self.streams.get(name, [])[group.position :][:count]
+            group.position += len(entries)
+            for entry_id, _ in entries:
+                group.pending[entry_id] = [consumername, time.monotonic(), 1]
+            if entries:
+                response.append([name, list(entries)])
+        return response
+
+    async def xack(self, name: str, groupname: str, *ids: str) -> int:
+        self.calls.append("XACK")
+        pending = self.groups[(name, groupname)].pending
+        return sum(1 for entry_id in ids if pending.pop(entry_id, None))
+
+    async def xpending_range(
+        self,
+        name: str,
+        groupname: str,
+        min: str,  # pylint: disable=redefined-builtin
+        max: str,  # pylint: disable=redefined-builtin
+        count: int,
+        idle: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        self.calls.append("XPENDING")
+        now = time.monotonic()
+        rows = [
+            {
+                "message_id": entry_id,
+                "consumer": consumer,
+                "time_since_delivered": int((now - delivered) * 1000),
+                "times_delivered": times,
+            }
+            for entry_id, (consumer, delivered, times) in self.groups[
+                (name, groupname)
+            ].pending.items()
+        ]
+        return [r for r in rows if r["time_since_delivered"] >= (idle or 0)][:count]
+
+    async def xclaim(
+        self,
+        name: str,
+        groupname: str,
+        consumername: str,
+        min_idle_time: int,
+        message_ids: List[str],
+    ) -> List[Tuple[str, Optional[Dict[str, str]]]]:
+        self.calls.append("XCLAIM")
+        pending = self.groups[(name, groupname)].pending
+        claimed = []
+        for entry_id in message_ids:
+            if entry_id in pending:
+                pending[entry_id] = [
+                    consumername,
+                    time.monotonic(),
+                    pending[entry_id][2] + 1,
+                ]
+                claimed.append((entry_id, self._entry(name, entry_id)))
+        return claimed
+
+
+async def _release_lock(client: FakeRedis, keys: List[str], args: List[Any]) -> int:
+    if await client.get(keys[0]) == args[0]:
+        return await client.delete(keys[0])
+    return 0
+
+
+async def _gcra(client: FakeRedis, keys: List[str], args: List[Any]) -> List[int]:
+    limit, period = int(args[0]), int(args[1])
+    interval = period / limit
+    now = time.monotonic() * 1000
+    stored = await client.get(keys[0])
+    tat = max(float(stored), now) if stored is not None else now
+    allow_at = tat + interval - period
+    if allow_at > now:
+        return [0, 0, int(allow_at - now) + 1]
+    await client.set(keys[0], str(tat + interval), px=int(tat + interval - now) + 1)
+    return [1, int((now - allow_at) // interval), 0]
+
+
+def _bits(client: FakeRedis, key: str) -> Optional[bytearray]:
+    if not client._alive(key):  # pylint: disable=protected-access
+        return None
+    value = client.store[key][0]
+    return value if isinstance(value, bytearray) else bytearray(value)
+
+
+async def _mirror_add(client: FakeRedis, keys: List[str], args: List[Any]) -> int:
+    bits = _bits(client, keys[0])
+    if bits is None:
+        return 0
+    for offset in map(int, args):
+        bits.extend(bytes(max(0, offset // 8 + 1 - len(bits))))
+        bits[offset // 8] |= 0x80 >> (offset % 8)
+    client.store[keys[0]] = (bits, client.store[keys[0]][1])
+    return 1
+
+
+async def _mirror_check(client: FakeRedis, keys: List[str], args: List[Any]) -> int:
+    bits = _bits(client, keys[0])
+    if bits is None:
+        return -1
+    for offset in map(int, args):
+        if offset // 8 >= len(bits) or not bits[offset // 8] & (0x80 >> (offset % 8)):
+            return 0
+    return 1
+
+
+async def _rotate_session(client: FakeRedis, keys: List[str], args: List[Any]) -> int:
+    value = await client.get(keys[0])
+    if value is None:
+        return 0
+    uid, digest, *previous = value.split(":")
+    if uid != args[0]:
+        return 0
+    if digest == args[2]:
+        if int(await client.get(keys[1]) or 0) != int(args[1]):
+            return 0
+        await client.set(keys[0], f"{uid}:{args[3]}:{digest}", ex=int(args[4]))
+        await client.expire(keys[1], int(args[4]))
+        return 1
+    if previous == [args[2]]:
+        await client.delete(keys[0])
+        return -1
+    return 0
+
+
+def register_default_scripts() -> None:
+    """Register Python equivalents of the service's Lua scripts."""
+    # pylint: disable=import-outside-toplevel
+    from app.core import cache, rate_limit
+    from app.services import email_filter
+    from app.services import sessions
+
+    FakeRedis.script_handlers[cache.RELEASE_LOCK_LUA] = _release_lock
+    FakeRedis.script_handlers[rate_limit.GCRA_LUA] = _gcra
+    FakeRedis.script_handlers[email_filter.MIRROR_ADD_LUA] = _mirror_add
+    FakeRedis.script_handlers[email_filter.MIRROR_CHECK_LUA] = _mirror_check
+    FakeRedis.script_handlers[sessions.ROTATE_LUA] = _rotate_session
+
+
+class FakeSession:
+    """AsyncSession stand-in: statements succeed and return nothing."""
+
+    def __init__(self) -> None:
+        self.info: Dict[str, Any] = {}
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def execute(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+    async def commit(self) -> None:
+        return None
+
+    async def rollback(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class FakeUserStore:
+    """In-memory implementation of the ``app.db.users.crud`` functions."""
+
+    def __init__(self) -> None:
+        self.users: Dict[Any, Dict[str, Any]] = {}
+        self.by_email: Dict[str, Any] = {}
+
+    async def create_user(self, db: Any, user: Any) -> Any:
+        # pylint: disable=import-outside-toplevel
+        import uuid
+        from datetime import datetime
+
+        from app.db.users.schemas import UserRecord
+
+        email = str(user.email).lower()
+        if email in self.by_email:
+            return None
+        row = {
+            "uid": uuid.uuid4(),
+            **user.model_dump(),
+            "email": str(user.email),
+            "created_at": datetime.utcnow(),
+        }
+        self.users[row["uid"]] = row
+        self.by_email[email] = row["uid"]
+        return UserRecord.model_validate(row)
+
+    def _record(self, uid: Any) -> Any:
+        # pylint: disable=import-outside-toplevel
+        from app.db.users.schemas import UserRecord
+
+        row = self.users.get(uid)
+        return UserRecord.model_validate(row) if row else None
+
+    async def get_user_by_uid(self, db: Any, uid: Any) -> Any:
+        return self._record(uid)
+
+    async def get_user_by_email(self, db: Any, email: str) -> Any:
+        return self._record(self.by_email.get(email.lower()))
+
+    async def get_credentials_by_email(self, db: Any, email: str) -> Any:
+        # pylint: disable=import-outside-toplevel
+        from app.db.users.schemas import UserCredentials
+
+        row = self.users.get(self.by_email.get(email.lower()))
+        return UserCredentials.model_validate(row) if row else None
+
+    async def update_password_hash(
+        self, db: Any, uid: Any, hashed_password: str
+    ) -> None:
+        if uid in self.users:
+            self.users[uid]["hashed_password"] = hashed_password
@@ -0,0 +1,154 @@
+"""
+Integration tests for the /auth endpoints of the API.
+Postgres is replaced by the in-memory user store from ``app.tests.fakes``.
+"""
+
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import jwt
+from app.main import app
+from app.services.events import EventPublisher
+from app.services.sessions import SessionStore
+from app.services.tokens import TokenIssuer
+from app.tests.fakes import FakeRedis, FakeSession, FakeUserStore
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+SECRET = "integration-test-secret-with-enough-bytes"
+SIGNUP = {
+    "username": "alice",
+    "email": "Alice@example.com",
+    "password": "correct horse battery",
+}
+
+
+@contextmanager
+def _auth_app():
+    store = FakeUserStore()
+    issuer = TokenIssuer(SECRET, "HS256", ttl=60)
+    sessions = SessionStore(FakeRedis(), ttl=3600, prefix="sess")  # type: ignore[arg-type]
+    with (
+        patch("app.db.session.AsyncSessionLocal", new=FakeSession),
+        patch("app.db.users.crud.create_user", new=store.create_user),
+        patch(
+            "app.db.users.crud.get_credentials_by_email",
+            new=store.get_credentials_by_email,
+        ),
+        patch("app.db.users.crud.update_password_hash", new=store.update_password_hash),
+        patch("app.db.users.crud.get_user_by_uid_cached", new=store.get_user_by_uid),
+        patch("app.api.v1.auth.router.token_issuer", new=issuer),
+        patch("app.api.v1.auth.router.session_store", new=sessions),
+    ):
+        yield store
+
+
+def test_signup_then_duplicate_email_conflicts():
+    """Signup creates the user once; the same email (any case) is a 409."""
+    with _auth_app() as store:
+        first = client.post("/api/v1/auth/signup", json=SIGNUP)
+        again = client.post(
+            "/api/v1/auth/signup", json={**SIGNUP, "email": "alice@EXAMPLE.com"}
+        )
+
+    assert first.status_code == 201
+    assert first.json()["data"]["email"] == "Alice@example.com"
+    assert again.status_code == 409
+    assert len(store.users) == 1
+
+
+def test_login_issues_token_for_valid_credentials():
+    """Valid credentials return a bearer token for the user's uid."""
+    with _auth_app():
+        uid = client.post("/api/v1/auth/signup", json=SIGNUP).json()["data"]["uid"]
+        response = client.post(
+            "/api/v1/auth/login",
+            json={"email": SIGNUP["email"], "password": SIGNUP["password"]},
+        )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["token_type"] == "bearer"
+    assert data["expires_in"] == 60
+    claims = jwt.decode(data["access_token"], SECRET, algorithms=["HS256"])
+    assert claims["sub"] == uid
+    assert data["refresh_token"].startswith(f"{uid}.0.{claims['sid']}.")
+
+
+def test_login_rejects_wrong_password_and_unknown_email():
+    """Bad credentials are a 401 without revealing which part was wrong."""
+    with _auth_app():
+        client.post("/api/v1/auth/signup", json=SIGNUP)
+        wrong = client.post(
+            "/api/v1/auth/login",
+            json={"email": SIGNUP["email"], "password": "not the password"},
+        )
+        unknown = client.post(
+            "/api/v1/auth/login",
+            json={"email": "bob@example.com", "password": SIGNUP["password"]},
+        )
+
+    assert wrong.status_code == 401
+    assert unknown.status_code == 401
+    assert wrong.json()["message"] == unknown.json()["message"]
+
+
+def test_login_attempts_are_recorded_as_events():
+    """Successful and failed logins are buffered as auth events, not sent."""
+    redis_client = FakeRedis()
+    publisher = EventPublisher(
+        redis_client,
+        stream="events",
+        maxlen=100,
+        buffer_size=100,
+        batch_size=100,
+        flush_interval=60,
+        retry_interval=1,
+    )
+    with _auth_app(), patch("app.api.v1.auth.router.event_publisher", new=publisher):
+        uid = client.post("/api/v1/auth/signup", json=SIGNUP).json()["data"]["uid"]
+        for password in (SIGNUP["password"], "not the password"):
+            client.post(
+                "/api/v1/auth/login",
+                json={"email": SIGNUP["email"], "password": password},
+            )
+
+    events = list(publisher._buffer)
+    assert [e["type"] for e in events] == [
+        "auth.user.created",
+        "auth.login.succeeded",
+        "auth.login.failed",
+    ]
+    assert events[1]["actor"] == uid
+    assert events[2]["data"]["email"] == "alice@example.com"
+    assert redis_client.calls == []
+
+
+def test_refresh_rotates_tokens_and_replay_ends_session():
+    """Each refresh token works once; reusing one ends the session."""
+    with _auth_app():
+        client.post("/api/v1/auth/signup", json=SIGNUP)
+        login = client.post(
+            "/api/v1/auth/login",
+            json={"email": SIGNUP["email"], "password": SIGNUP["password"]},
+        ).json()["data"]
+        first = client.post(
+            "/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]}
+        )
+        token = first.json()["data"]["refresh_token"]
+        replay = client.post(
+            "/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]}
+        )
+        after_replay = client.post(
+            "/api/v1/auth/refresh", json={"refresh_token": token}
+        )
+
+    assert first.status_code == 200
+    claims = jwt.decode(
+        first.json()["data"]["access_token"], SECRET, algorithms=["HS256"]
+    )
+    assert claims["role"] == "user"
+    assert replay.status_code == 401
+    # Replaying a rotated token ended the whole session
+    assert after_replay.status_code == 401
@@ -3,16 +3,28 @@ Integration test for the /health endpoint of the API.
 Ensures server, database, and Redis are reported as OK.
 """
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.api.v1.health.router import full_health_cache
+from app.core.state import AppState
 from app.main import app
 from fastapi.testclient import TestClient
 
 client = TestClient(app)
 
 
+def _mock_session_local() -> MagicMock:
+    mock_session = AsyncMock()
+    mock_session.__aenter__.return_value.execute = AsyncMock(return_value=None)
+    mock_session.__aexit__.return_value = AsyncMock(return_value=None)
+    return MagicMock(return_value=mock_session)
+
+
 def test_health_all_ok():
     """Test that /health endpoint returns OK for server, database, and Redis."""
+    full_health_cache.clear()
 
     # Mock AsyncSessionLocal as async context manager
     mock_session = AsyncMock()
@@ -40,3 +52,58 @@ def test_health_all_ok():
     assert details.get("server") == "ok"
     assert details.get("database") == "ok"
     assert details.get("redis") == "ok"
+    assert set(body["details"]["latency_ms"]) == {"database", "redis"}
+
+
+def test_health_slow_dependency_hits_deadline():
+    """A hanging dependency is reported as failed within the probe deadline."""
+    full_health_cache.clear()
+
+    async def hang() -> bool:
+        await asyncio.sleep(30)
+        return True
+
+    with (
+        patch("app.db.session.AsyncSessionLocal", new=_mock_session_local()),
+        patch("app.core.redis_cache.redis_client.ping", new=hang),
+        patch("app.core.config.settings.health.check_timeout", 0.2),
+    ):
+        start = time.perf_counter()
+        response = client.get("/api/v1/health/")
+        elapsed = time.perf_counter() - start
+
+    details = response.json()["data"]["details"]
+    assert elapsed < 2
+    assert details["database"] == "ok"
+    assert details["redis"] == "fail"
+
+
+def test_health_results_are_cached():
+    """Back-to-back probes share one round trip per dependency."""
+    full_health_cache.clear()
+    ping = AsyncMock(return_value=True)
+
+    with (
+        patch("app.db.session.AsyncSessionLocal", new=_mock_session_local()),
+        patch("app.core.redis_cache.redis_client.ping", new=ping),
+    ):
+        first = client.get("/api/v1/health/").json()
+        second = client.get("/api/v1/health/").json()
+
+    assert ping.await_count == 1
+    assert first["details"]["cached"] is False
+    assert second["details"]["cached"] is True
+
+
+def test_readiness_waits_for_warm_up():
+    """/ready is 503 until the lifespan's warm-up has finished."""
+    resources = AppState(engine=MagicMock(), redis=MagicMock())
+    with patch.object(app.state, "resources", resources, create=True):
+        pending = client.get("/api/v1/health/ready")
+        resources.ready = True
+        resources.warmup_report = {"database": {"connections": 10}}
+        ready = client.get("/api/v1/health/ready")
+
+    assert pending.status_code == 503
+    assert ready.status_code == 200
+    assert ready.json()["details"]["warmup"]["database"]["connections"] == 10
@@ -0,0 +1,65 @@
+"""
+Unit tests for the benchmark harness statistics and runner.
+"""
+
+import random
+
+from app.tests.benchmarks.harness import (
+    Benchmark,
+    compare,
+    mann_whitney_p,
+    run_benchmark,
+)
+
+
+def _results(name: str, samples):
+    samples = list(samples)
+    return {
+        "benchmarks": {
+            name: {"median_s": sorted(samples)[len(samples) // 2], "samples_s": samples}
+        }
+    }
+
+
+def test_mann_whitney_separates_shifted_samples():
+    """Clearly shifted samples are significant; identical draws are not."""
+    rng = random.Random(7)
+    base = [1.0 + rng.gauss(0, 0.02) for _ in range(25)]
+    same = [1.0 + rng.gauss(0, 0.02) for _ in range(25)]
+    slower = [1.2 + rng.gauss(0, 0.02) for _ in range(25)]
+
+    assert mann_whitney_p(base, slower) < 1e-6
+    assert mann_whitney_p(base, same) > 0.01
+    assert mann_whitney_p([1.0] * 10, [1.0] * 10) == 1.0
+
+
+def test_compare_requires_significance_and_size():
+    """Small or noisy differences are "same"; large significant ones flag."""
+    rng = random.Random(11)
+    base = _results("x", (1.0 + rng.gauss(0, 0.01) for _ in range(25)))
+    slower = _results("x", (1.3 + rng.gauss(0, 0.01) for _ in range(25)))
+    faster = _results("x", (0.7 + rng.gauss(0, 0.01) for _ in range(25)))
+    # Significant but below the threshold
+    slightly = _results("x", (1.03 + rng.gauss(0, 0.005) for _ in range(25)))
+
+    assert compare(base, slower)[0]["verdict"] == "regression"
+    assert compare(base, faster)[0]["verdict"] == "improvement"
+    assert compare(base, slightly)[0]["verdict"] == "same"
+    assert not compare(base, {"benchmarks": {}})
+
+
+def test_run_benchmark_times_async_functions():
+    """Async benchmarks are awaited and calibrated like sync ones."""
+    calls = 0
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+
+    entry = run_benchmark(
+        Benchmark("async", fn), rounds=5, min_round_time=0.001, warmup=1
+    )
+
+    assert len(entry["samples_s"]) == 5
+    assert entry["number"] >= 1
+    assert calls >= entry["number"] * 6
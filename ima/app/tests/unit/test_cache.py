@@ -0,0 +1,79 @@
+"""
+Unit tests for the read-through cache in app.core.cache.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import redis.asyncio as redis
+from app.core.cache import RedisCache
+from app.tests.fakes import FakeRedis
+
+
+def _cache(client=None) -> RedisCache:
+    return RedisCache(client or FakeRedis(), ttl=60, beta=0)
+
+
+def test_concurrent_misses_load_once():
+    """A burst of callers on a cold key triggers a single load."""
+    cache = _cache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"role": "admin"}
+
+    async def burst():
+        return await asyncio.gather(
+            *(cache.get_or_load("k", loader) for _ in range(20))
+        )
+
+    results = asyncio.run(burst())
+
+    assert calls == 1
+    assert all(result == {"role": "admin"} for result in results)
+
+
+def test_none_is_cached_negatively():
+    """A missing row is cached so repeated lookups do not hit the loader."""
+    cache = _cache()
+    loader = AsyncMock(return_value=None)
+
+    async def run():
+        await cache.get_or_load("missing", loader)
+        return await cache.get_or_load("missing", loader)
+
+    assert asyncio.run(run()) is None
+    assert loader.await_count == 1
+
+
+def test_decorator_ignores_session_and_invalidates():
+    """Keys ignore the db session; invalidate() evicts the entry."""
+    cache = _cache()
+    calls = []
+
+    @cache.cached()
+    async def get_role(db, email):
+        calls.append((db, email))
+        return "moderator"
+
+    async def run():
+        await get_role(object(), "a@example.com")
+        await get_role(object(), "a@example.com")
+        await get_role.invalidate(None, "a@example.com")
+        await get_role(object(), "a@example.com")
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+
+
+def test_redis_errors_fall_back_to_loader():
+    """The cache fails open when Redis is unavailable."""
+    client = FakeRedis()
+    client.get = AsyncMock(side_effect=redis.ConnectionError("down"))
+    cache = _cache(client)
+
+    assert asyncio.run(cache.get_or_load("k", AsyncMock(return_value=7))) == 7
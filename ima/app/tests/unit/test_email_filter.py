@@ -0,0 +1,189 @@
+"""
+Unit tests for the registered-email filter (app.services.email_filter).
+"""
+
+import asyncio
+import uuid
+from typing import Any, List, Sequence, Tuple
+from unittest.mock import AsyncMock, patch
+
+from app.services import auth
+from app.core.config import settings
+from app.db.users.models import UserRole
+from app.db.users.schemas import UserCredentials
+from app.services.email_filter import BloomFilter, EmailFilter, _build_email_filter
+from app.tests.fakes import FakeRedis, FakeSession
+
+REGISTERED = [f"user{n}@example.com" for n in range(200)]
+
+
+def _filter(client: FakeRedis, mirror: bool = False) -> EmailFilter:
+    return EmailFilter(
+        client,  # type: ignore[arg-type]
+        capacity=1000,
+        error_rate=0.01,
+        prefix="emails",
+        fetch_size=64,
+        mirror=mirror,
+    )
+
+
+def _scan(emails: Sequence[str]) -> Any:
+    async def stream_emails(db: Any, fetch_size: int):
+        for start in range(0, len(emails), fetch_size):
+            yield [email.upper() for email in emails[start : start + fetch_size]]
+
+    return (
+        patch("app.db.users.crud.stream_emails", stream_emails),
+        patch("app.db.session.AsyncSessionLocal", FakeSession),
+    )
+
+
+async def _wait_ready(*filters: EmailFilter) -> None:
+    for _ in range(100):
+        if all(f.ready for f in filters):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("filter never became ready")
+
+
+def test_bloom_filter_has_no_false_negatives_and_meets_its_error_rate():
+    """Every added item is found; unknown items match at about the target rate."""
+    bloom = BloomFilter.for_capacity(5000, 0.01)
+    members = [f"member{n}@example.com" for n in range(5000)]
+    for item in members:
+        bloom.add(item)
+
+    assert all(item in bloom for item in members)
+    matches = sum(f"other{n}@example.com" in bloom for n in range(20000))
+    assert matches / 20000 < 0.02
+    assert 0.005 < bloom.false_positive_rate() < 0.015
+    assert abs(bloom.estimated_items() - 5000) < 250
+    assert bloom.memory_bytes == (bloom.size + 7) // 8 < 6 * 1024
+
+
+def test_filter_answers_only_once_built():
+    """None before the scan; False for unknown emails afterwards."""
+    emails = _filter(FakeRedis())
+    stream, session = _scan(REGISTERED)
+
+    async def scenario() -> List[Any]:
+        before = await emails.might_contain(REGISTERED[0])
+        with stream, session:
+            emails.start()
+            await _wait_ready(emails)
+        answers = [
+            before,
+            await emails.might_contain("User7@Example.com"),
+            await emails.might_contain("nobody@example.com"),
+            await emails.might_contain("nobödy@example.com"),
+        ]
+        await emails.stop()
+        return answers
+
+    assert asyncio.run(scenario()) == [None, True, False, None]
+
+
+def test_added_emails_reach_every_worker_and_rebuilds():
+    """An insert on one worker is seen by another, even mid-rebuild."""
+    client = FakeRedis()
+    first, second = _filter(client), _filter(client)
+    stream, session = _scan(REGISTERED)
+
+    async def scenario() -> Tuple[Any, Any, Any]:
+        with stream, session:
+            first.start()
+            second.start()
+            await _wait_ready(first, second)
+            await first.add("New@Example.com")
+            await asyncio.sleep(0.01)
+            seen = await second.might_contain("new@example.com")
+
+            await client.publish(second.rebuild_channel, "")
+            while second.ready:
+                await asyncio.sleep(0)
+            during = await second.might_contain("new@example.com")
+            await _wait_ready(second)
+            after = await second.might_contain("new@example.com")
+        await first.stop()
+        await second.stop()
+        return seen, during, after
+
+    # The rebuild's scan does not see the uncommitted insert: it is replayed
+    assert asyncio.run(scenario()) == (True, None, True)
+
+
+def test_mirror_overrules_local_negatives_it_cannot_confirm():
+    """A local miss is trusted only if the Redis bitset agrees."""
+    client = FakeRedis()
+    writer, reader = _filter(client, mirror=True), _filter(client, mirror=True)
+    stream, session = _scan(REGISTERED)
+
+    async def scenario() -> List[Any]:
+        with stream, session:
+            reader.bloom = await reader.build()
+        reader.ready = True
+        missing = await reader.might_contain("nobody@example.com")
+        await reader.mirror.upload(reader.bloom, replace=False)  # type: ignore
+        # Published before the reader listens: only the bitset has it
+        await writer.add("late@example.com")
+        return [
+            missing,
+            await reader.might_contain("late@example.com"),
+            await reader.might_contain("nobody@example.com"),
+            await reader.might_contain(REGISTERED[3]),
+        ]
+
+    assert asyncio.run(scenario()) == [None, None, False, True]
+
+
+def test_login_for_unregistered_email_skips_the_database():
+    """A filter negative still verifies the dummy hash, but runs no query."""
+    lookup = AsyncMock()
+    verify = AsyncMock(return_value=False)
+
+    with (
+        patch.object(auth.email_filter, "might_contain", AsyncMock(return_value=False)),
+        patch("app.db.users.crud.get_credentials_by_email", lookup),
+        patch.object(auth.password_service, "verify", verify),
+        patch.object(auth, "_dummy_hash", "$argon2id$dummy"),
+    ):
+        login = auth.authenticate_user(None, "x@example.com", "pw")  # type: ignore
+        result = asyncio.run(login)
+
+    assert result is None
+    lookup.assert_not_awaited()
+    verify.assert_awaited_once_with("$argon2id$dummy", "pw")
+
+
+def test_login_for_tenant_user_is_not_ruled_out_by_the_filter():
+    """With tenancy on, the shared-schema filter never skips the lookup."""
+    with patch.object(settings.tenancy, "enabled", True):
+        emails = _build_email_filter()
+    # As if built from public.users, which holds none of the tenant's emails
+    emails.bloom.add("someone@example.com")
+    emails.ready = True
+    credentials = UserCredentials(
+        uid=uuid.uuid4(),
+        email="tenant@example.com",
+        hashed_password="$argon2id$tenant",
+        role=UserRole.USER,
+        is_active=True,
+        is_superuser=False,
+    )
+    lookup = AsyncMock(return_value=credentials)
+
+    with (
+        patch.object(auth, "email_filter", emails),
+        patch("app.db.users.crud.get_credentials_by_email", lookup),
+        patch.object(
+            auth.password_service,
+            "verify_and_update",
+            AsyncMock(return_value=(True, None)),
+        ),
+    ):
+        login = auth.authenticate_user(None, "tenant@example.com", "pw")  # type: ignore
+        result = asyncio.run(login)
+
+    assert result == credentials
+    lookup.assert_awaited_once_with(None, "tenant@example.com")
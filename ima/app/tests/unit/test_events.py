@@ -0,0 +1,171 @@
+"""
+Unit tests for the write-behind event publisher and the stream consumer.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Sequence
+from unittest.mock import patch
+
+import pytest
+import redis.asyncio as redis
+from app.core.metrics import EVENTS_DROPPED
+from app.services.event_consumer import EventConsumer
+from app.services.events import EVENT_FIELD, EventPublisher, make_event
+from app.tests.fakes import FakeRedis, FakeSession
+from sqlalchemy.exc import IntegrityError
+
+STREAM, DLQ, GROUP = "events", "events:dlq", "sink"
+
+
+def _publisher(client: Any, buffer_size: int = 100) -> EventPublisher:
+    return EventPublisher(
+        client,
+        stream=STREAM,
+        maxlen=1000,
+        buffer_size=buffer_size,
+        batch_size=10,
+        flush_interval=0.01,
+        retry_interval=0.01,
+    )
+
+
+def _consumer(client: FakeRedis, max_deliveries: int = 3) -> EventConsumer:
+    return EventConsumer(
+        client,  # type: ignore[arg-type]
+        FakeSession,  # type: ignore[arg-type]
+        stream=STREAM,
+        group=GROUP,
+        name="worker-1",
+        dlq_stream=DLQ,
+        batch_size=100,
+        block=0,
+        claim_idle=0,
+        max_deliveries=max_deliveries,
+    )
+
+
+class FakeEventTable:
+    """``insert_events`` stand-in; rows of type ``bad`` violate a constraint."""
+
+    def __init__(self) -> None:
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.statements = 0
+
+    async def insert_events(self, db: Any, rows: Sequence[Dict[str, Any]]) -> int:
+        self.statements += 1
+        if any(row["type"] == "bad" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("constraint"))
+        new = [row for row in rows if row["id"] not in self.rows]
+        self.rows.update((row["id"], row) for row in new)
+        return len(new)
+
+
+def test_publish_buffers_and_flush_pipelines_batches():
+    """publish does no I/O; flush writes one pipelined batch of XADDs."""
+    client = FakeRedis()
+    publisher = _publisher(client)
+
+    for n in range(15):
+        assert publisher.publish("auth.login.succeeded", actor=None, n=n)
+    assert client.calls == []
+
+    assert asyncio.run(publisher.flush()) == 10
+    assert client.calls.count("EXEC") == 1
+    assert asyncio.run(publisher.flush()) == 5
+    events = [json.loads(f[EVENT_FIELD]) for _, f in client.streams[STREAM]]
+    assert [e["data"]["n"] for e in events] == list(range(15))
+    assert len(publisher) == 0
+
+
+def test_full_buffer_drops_and_counts():
+    """Beyond buffer_size events are dropped, never queued or awaited."""
+    publisher = _publisher(FakeRedis(), buffer_size=3)
+    dropped = EVENTS_DROPPED.labels("buffer_full")
+    before = dropped._value.get()
+
+    accepted = [publisher.publish("auth.login.failed") for _ in range(5)]
+
+    assert accepted == [True, True, True, False, False]
+    assert len(publisher) == 3
+    assert dropped._value.get() - before == 2
+
+
+def test_failed_flush_keeps_events_in_order():
+    """A batch that could not be written goes back to the front of the buffer."""
+    client = FakeRedis()
+    publisher = _publisher(client)
+    for n in range(12):
+        publisher.publish("auth.user.created", n=n)
+
+    with patch.object(FakeRedis, "xadd", side_effect=redis.ConnectionError("down")):
+        with pytest.raises(redis.ConnectionError):
+            asyncio.run(publisher.flush())
+    assert len(publisher) == 12
+
+    asyncio.run(publisher.drain())
+    events = [json.loads(f[EVENT_FIELD]) for _, f in client.streams[STREAM]]
+    assert [e["data"]["n"] for e in events] == list(range(12))
+
+
+def test_stop_publishes_remaining_events():
+    """Shutdown flushes what the loop has not sent yet."""
+    client = FakeRedis()
+    publisher = _publisher(client)
+
+    async def scenario():
+        publisher.start()
+        publisher.publish("auth.login.succeeded")
+        await publisher.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+    assert len(client.streams[STREAM]) == 1
+
+
+async def _publish(client: FakeRedis, *events: Dict[str, Any]) -> None:
+    for event in events:
+        await client.xadd(STREAM, {EVENT_FIELD: json.dumps(event)})
+
+
+def test_consumer_stores_batch_and_acknowledges():
+    """A batch is inserted in one statement, then acknowledged."""
+    client, table = FakeRedis(), FakeEventTable()
+    consumer = _consumer(client)
+
+    async def scenario() -> int:
+        await consumer.ensure_group()
+        await consumer.ensure_group()  # BUSYGROUP is ignored
+        await _publish(client, *(make_event("auth.login.succeeded") for _ in range(4)))
+        return await consumer.run_once()
+
+    with patch("app.db.events.crud.insert_events", new=table.insert_events):
+        assert asyncio.run(scenario()) == 4
+
+    assert len(table.rows) == 4 and table.statements == 1
+    assert not client.groups[(STREAM, GROUP)].pending
+
+
+def test_consumer_dead_letters_poison_and_exhausted_entries():
+    """Undecodable entries go to the DLQ at once, rejected rows after retries."""
+    client, table = FakeRedis(), FakeEventTable()
+    consumer = _consumer(client, max_deliveries=2)
+
+    async def scenario() -> List[int]:
+        await consumer.ensure_group()
+        await client.xadd(STREAM, {EVENT_FIELD: "not json"})
+        await _publish(client, make_event("auth.login.failed"), make_event("bad"))
+        handled = [await consumer.run_once()]
+        consumer._claimed_at = float("-inf")
+        handled.append(await consumer.run_once())  # second delivery, still bad
+        consumer._claimed_at = float("-inf")
+        handled.append(await consumer.run_once())  # exhausted -> DLQ
+        return handled
+
+    with patch("app.db.events.crud.insert_events", new=table.insert_events):
+        handled = asyncio.run(scenario())
+
+    assert handled == [2, 0, 1]
+    assert [row["type"] for row in table.rows.values()] == ["auth.login.failed"]
+    errors = [fields["error"] for _, fields in client.streams[DLQ]]
+    assert errors == ["undecodable", "not stored after 2 deliveries"]
+    assert not client.groups[(STREAM, GROUP)].pending
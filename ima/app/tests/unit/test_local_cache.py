@@ -0,0 +1,86 @@
+"""
+Unit tests for the in-process L1 cache and its pub/sub invalidation.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+from app.core.cache import RedisCache
+from app.core.local_cache import LocalCache
+from app.tests.fakes import FakeRedis
+
+
+def test_lru_eviction_by_count_and_bytes():
+    """Least recently used entries go first when either bound is exceeded."""
+    local = LocalCache(max_entries=2, max_bytes=100, ttl=60)
+    local.set("a", 1, size=10)
+    local.set("b", 2, size=10)
+    local.get("a")
+    local.set("c", 3, size=10)
+
+    assert local.get("b") == (False, None)
+    assert local.get("a") == (True, 1)
+
+    local.set("big", 4, size=95)
+
+    assert len(local) == 1
+    assert local.stats()["evictions"] == 3
+
+
+def test_expired_entries_are_misses():
+    """Entries expire after their TTL."""
+    local = LocalCache(max_entries=10, max_bytes=1000, ttl=0)
+    local.set("a", 1, size=1)
+
+    assert local.get("a") == (False, None)
+    assert local.stats()["expirations"] == 1
+
+
+def test_l1_hit_skips_redis_and_invalidation_fans_out():
+    """Hot keys are served from memory; a delete evicts them on every worker."""
+    client = FakeRedis()
+    worker_a = RedisCache(client, beta=0, local=LocalCache(100, 10_000, 60))
+    worker_b = RedisCache(client, beta=0, local=LocalCache(100, 10_000, 60))
+    loader = AsyncMock(return_value={"admin": ["users:read"]})
+
+    async def run():
+        await worker_a.get_or_load("roles", loader)
+        await worker_b.get_or_load("roles", loader)
+        await asyncio.sleep(0)  # let both listeners subscribe
+        gets_before = client.calls.count("GET")
+        await worker_b.get_or_load("roles", loader)
+        assert client.calls.count("GET") == gets_before
+
+        await worker_a.delete("roles")
+        await asyncio.sleep(0.01)
+        in_b = worker_b.local.get("roles")
+        await worker_a.stop()
+        await worker_b.stop()
+        return in_b
+
+    assert asyncio.run(run()) == (False, None)
+    assert loader.await_count == 1
+
+
+def test_bulk_delete_is_one_round_trip():
+    """Deleting many keys pipelines the DEL and every invalidation message."""
+    client = FakeRedis()
+    worker_a = RedisCache(client, beta=0, local=LocalCache(100, 10_000, 60))
+    worker_b = RedisCache(client, beta=0, local=LocalCache(100, 10_000, 60))
+    keys = [f"user:{n}" for n in range(50)]
+
+    async def run():
+        for key in keys:
+            await worker_b.get_or_load(key, AsyncMock(return_value=key))
+        await asyncio.sleep(0)  # let the listener subscribe
+        client.calls.clear()
+        await worker_a.delete(*keys)
+        await asyncio.sleep(0.01)
+        left = [key for key in keys if worker_b.local.get(key)[0]]
+        await worker_a.stop()
+        await worker_b.stop()
+        return left
+
+    assert asyncio.run(run()) == []
+    assert client.calls[0] == "EXEC" and client.calls.count("EXEC") == 1
+    assert client.calls.count("PUBLISH") == len(keys)
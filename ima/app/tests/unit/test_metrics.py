@@ -0,0 +1,64 @@
+"""
+Unit tests for the Prometheus middleware and /metrics endpoint.
+"""
+
+from app.core.metrics import PrometheusMiddleware, metrics_endpoint
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/widgets/{widget_id}")
+    async def widget(widget_id: int):
+        return {"id": widget_id}
+
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+    app.add_middleware(PrometheusMiddleware, skip_paths=("/metrics",))
+    return app
+
+
+def _count(route: str, status: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": route, "status": status},
+    )
+    return value or 0.0
+
+
+def test_requests_are_labelled_by_route_template():
+    """Distinct paths of one route share a single label set."""
+    client = TestClient(_app())
+    before = _count("/widgets/{widget_id}", "200")
+
+    for widget_id in (1, 2, 3):
+        assert client.get(f"/widgets/{widget_id}").status_code == 200
+
+    assert _count("/widgets/{widget_id}", "200") - before == 3
+    assert _count("/widgets/1", "200") == 0
+
+
+def test_unmatched_paths_share_one_label():
+    """404s for arbitrary paths do not create new series."""
+    client = TestClient(_app())
+    before = _count("<unmatched>", "404")
+
+    client.get("/nope/1")
+    client.get("/nope/2")
+
+    assert _count("<unmatched>", "404") - before == 2
+
+
+def test_metrics_endpoint_exposes_text_format():
+    """/metrics serves the Prometheus exposition format and is not measured."""
+    client = TestClient(_app())
+    client.get("/widgets/7")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert 'route="/metrics"' not in response.text
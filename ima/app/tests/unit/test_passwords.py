@@ -0,0 +1,141 @@
+"""
+Unit tests for the off-loop password service.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from app.services.passwords import PasswordHasherOverloaded, PasswordService
+
+
+def _service(**overrides) -> PasswordService:
+    params = {
+        "workers": 1,
+        "max_queue": 0,
+        "time_cost": 1,
+        "memory_cost": 1024,
+        "parallelism": 1,
+    }
+    params.update(overrides)
+    return PasswordService(**params)
+
+
+def test_hash_and_verify_run_in_the_pool():
+    """Verification happens on a worker thread, never on the event loop thread."""
+    service = _service()
+    threads = []
+    original = service._verify
+
+    def verify_and_record(hashed, password):
+        threads.append(threading.current_thread().name)
+        return original(hashed, password)
+
+    service._verify = verify_and_record
+
+    async def scenario():
+        hashed = await service.hash("s3cret")
+        return (
+            await service.verify(hashed, "s3cret"),
+            await service.verify(hashed, "wrong"),
+            await service.verify("not-a-hash", "s3cret"),
+        )
+
+    assert asyncio.run(scenario()) == (True, False, False)
+    assert threads[0].startswith("password-hash")
+    service.shutdown()
+
+
+def test_sheds_load_when_queue_is_full():
+    """Jobs beyond workers + max_queue are rejected immediately."""
+    service = _service()
+    release = threading.Event()
+    service._verify = lambda hashed, password: release.wait(5)
+
+    async def scenario():
+        first = asyncio.ensure_future(service.verify("h", "p"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PasswordHasherOverloaded):
+            await service.verify("h", "p")
+        release.set()
+        return await first
+
+    assert asyncio.run(scenario()) is True
+    assert service.stats()["rejected"] == 1
+    assert service.stats()["pending"] == 0
+    service.shutdown()
+
+
+def test_verify_and_update_rehashes_outdated_parameters():
+    """A hash made with weaker parameters is upgraded on successful login."""
+    old = _service()
+    new = _service(time_cost=2)
+
+    async def scenario():
+        hashed = await old.hash("s3cret")
+        upgraded = await new.verify_and_update(hashed, "s3cret")
+        current = await new.verify_and_update(upgraded[1], "s3cret")
+        rejected = await new.verify_and_update(hashed, "wrong")
+        return upgraded, current, rejected
+
+    (valid, new_hash), current, rejected = asyncio.run(scenario())
+    assert valid and new_hash is not None
+    assert current == (True, None)
+    assert rejected == (False, None)
+    old.shutdown()
+    new.shutdown()
+
+
+def test_cancelled_caller_keeps_its_job_pending_until_the_thread_finishes():
+    """Cancelling the awaiting task does not free a slot the worker still uses."""
+    service = _service()
+    started, release = threading.Event(), threading.Event()
+
+    def verify(hashed, password):
+        started.set()
+        return release.wait(5)
+
+    service._verify = verify
+
+    async def scenario():
+        caller = asyncio.ensure_future(service.verify("h", "p"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        pending = service.stats()["pending"]
+        with pytest.raises(PasswordHasherOverloaded):
+            await service.verify("h", "p")
+        release.set()
+        await asyncio.get_running_loop().run_in_executor(None, service.shutdown)
+        return caller.cancelled(), pending
+
+    assert asyncio.run(scenario()) == (True, 1)
+    assert service.stats()["pending"] == 0
+
+
+def test_logins_do_not_queue_behind_import_hashing():
+    """hash_many runs in the import pool; verify still gets a login worker."""
+    service = _service()
+    started, release = threading.Event(), threading.Event()
+
+    def hash_many(passwords):
+        started.set()
+        release.wait(5)
+        return passwords
+
+    service._hash_many = hash_many
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        batch = asyncio.ensure_future(service.hash_many(["a", "b"]))
+        await loop.run_in_executor(None, started.wait, 5)
+        hashed = await service.hash("s3cret")
+        login = await asyncio.wait_for(service.verify(hashed, "s3cret"), 5)
+        stats = service.stats()
+        release.set()
+        return login, await batch, stats
+
+    login, batch, stats = asyncio.run(scenario())
+    assert login is True and batch == ["a", "b"]
+    assert (stats["pending"], stats["import_pending"]) == (0, 1)
+    service.shutdown()
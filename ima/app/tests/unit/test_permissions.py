@@ -0,0 +1,150 @@
+"""
+Unit tests for the compiled permission engine and its per-user cache.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.core.cache import RedisCache
+from app.core.local_cache import LocalCache
+from app.db.users.models import UserRole
+from app.services.permissions import Action, PermissionCache, PermissionEngine
+from app.tests.fakes import FakeRedis
+
+
+def _user(role, is_superuser=False, is_active=True):
+    return SimpleNamespace(role=role, is_superuser=is_superuser, is_active=is_active)
+
+
+def test_roles_inherit_parent_grants():
+    """Moderators get user grants; admins get everything."""
+    engine = PermissionEngine()
+
+    assert engine.has_permission(_user(UserRole.USER), Action.READ, "users")
+    assert not engine.has_permission(_user(UserRole.USER), Action.UPDATE, "users")
+    assert engine.has_permission(_user(UserRole.MODERATOR), "read", "users")
+    assert engine.has_permission(_user(UserRole.MODERATOR), Action.UPDATE, "users")
+    assert not engine.has_permission(_user(UserRole.MODERATOR), "delete", "roles")
+    assert engine.has_permission(_user(UserRole.ADMIN), Action.DELETE, "roles")
+    assert engine.has_permission(_user(UserRole.ADMIN), Action.READ, "internal")
+    assert not engine.has_permission(_user(UserRole.MODERATOR), Action.READ, "internal")
+
+
+def test_superuser_and_inactive_users():
+    """Superusers hold every bit; inactive users hold none."""
+    engine = PermissionEngine()
+
+    superuser = _user(UserRole.USER, is_superuser=True)
+    inactive = _user(UserRole.ADMIN, is_active=False)
+    assert engine.has_permission(superuser, Action.DELETE, "tokens")
+    assert not engine.has_permission(inactive, Action.READ, "users")
+    assert not engine.has_permission(_user(UserRole.ADMIN), "read", "unknown")
+
+
+def test_invalid_policies_fail_at_compile_time():
+    """Typos in grants and inheritance cycles are rejected at startup."""
+    with pytest.raises(ValueError):
+        PermissionEngine(policies={UserRole.USER: ("users:raed",)})
+    with pytest.raises(ValueError):
+        PermissionEngine(
+            parents={UserRole.USER: (UserRole.ADMIN,), UserRole.ADMIN: (UserRole.USER,)}
+        )
+
+
+def test_version_changes_with_policies():
+    """The cache namespace changes whenever the compiled policy does."""
+    default = PermissionEngine()
+    stricter = PermissionEngine(policies={UserRole.ADMIN: ("users:*",)})
+
+    assert default.version == PermissionEngine().version
+    assert default.version != stricter.version
+
+
+def test_effective_masks_are_cached_and_invalidated():
+    """A user's mask is loaded once, then reloaded after invalidation."""
+    engine = PermissionEngine()
+    fake = FakeRedis()
+    perms = PermissionCache(
+        engine,
+        RedisCache(
+            fake,
+            namespace=f"ima:perm:{engine.version}",
+            beta=0,
+            local=LocalCache(max_entries=100, max_bytes=10_000, ttl=30),
+        ),
+    )
+    uid = uuid.uuid4()
+    lookup = AsyncMock(
+        side_effect=[_user(UserRole.USER), _user(UserRole.ADMIN)],
+    )
+
+    async def scenario():
+        with patch("app.db.users.crud.get_user_by_uid", lookup):
+            first = await perms.effective_mask(None, uid)
+            cached = await perms.effective_mask(None, uid)
+            local_hits = perms.cache.local.stats()["hits"]
+            await perms.invalidate(uid)
+            promoted = await perms.effective_mask(None, uid)
+        await perms.cache.stop()
+        return first, cached, promoted, local_hits
+
+    first, cached, promoted, local_hits = asyncio.run(scenario())
+
+    assert lookup.await_count == 2
+    assert first == cached == engine.mask_for(UserRole.USER)
+    assert promoted == engine.all_mask
+    assert local_hits == 1  # the second read never reached Redis
+
+
+def test_internal_stats_require_the_internal_permission():
+    """Anonymous callers get 401; holders of internal:read get the stats."""
+    # pylint: disable=import-outside-toplevel
+    from app.api.v1.internal import router as internal_router
+    from app.main import app
+    from app.services.tokens import StaticKeySet, token_verifier
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    keys = StaticKeySet("unit-test-secret-with-enough-bytes-for-hs256", "HS256")
+    with patch.object(token_verifier, "keys", keys):
+        anonymous = client.get("/api/v1/internal/cache")
+
+    permission = internal_router.dependencies[0].dependency
+    app.dependency_overrides[permission] = lambda: {"sub": str(uuid.uuid4())}
+    try:
+        allowed = client.get("/api/v1/internal/cache")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert anonymous.status_code == 401
+    assert allowed.status_code == 200
+
+
+def test_deactivation_revokes_sessions_after_commit():
+    """Masks and sessions are dropped only once the update has committed."""
+    from app.services import permissions  # pylint: disable=import-outside-toplevel
+
+    uid, steps = uuid.uuid4(), AsyncMock()
+    steps.bulk_update_users.return_value = [(uid, "user@example.com")]
+
+    with (
+        patch("app.db.users.crud.bulk_update_users", steps.bulk_update_users),
+        patch("app.db.users.crud.commit", steps.commit),
+        patch.object(permissions.permission_cache, "invalidate", steps.invalidate),
+        patch.object(permissions.session_store, "revoke_all", steps.revoke_all),
+    ):
+        updated = asyncio.run(
+            permissions.update_user_access(None, [uid], is_active=False)  # type: ignore
+        )
+
+    assert updated == 1
+    assert [name for name, _, _ in steps.mock_calls] == [
+        "bulk_update_users",
+        "commit",
+        "invalidate",
+        "revoke_all",
+    ]
+    steps.revoke_all.assert_awaited_once_with([str(uid)])
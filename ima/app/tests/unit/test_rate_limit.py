@@ -0,0 +1,71 @@
+"""
+Unit tests for the rate limiter and its ASGI middleware.
+"""
+
+from unittest.mock import AsyncMock
+
+import redis.asyncio as redis
+from app.core.rate_limit import LocalTokenBucket, RateLimiter, RateLimitMiddleware
+from app.tests.fakes import FakeRedis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def _client(limiter: RateLimiter, limit: int = 3) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/api/v1/users/me")
+    async def me():
+        return {"ok": True}
+
+    @app.get("/api/v1/health/server")
+    async def health():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, rate_limiter=limiter, limit=limit)
+    return TestClient(app)
+
+
+def test_local_bucket_sheds_after_burst():
+    """The pre-filter rejects a client once its burst is spent."""
+    bucket = LocalTokenBucket(rate=0.001, burst=3, max_clients=10)
+
+    assert [bucket.allow("1.2.3.4") for _ in range(4)] == [True, True, True, False]
+    assert bucket.allow("5.6.7.8")
+
+
+def test_middleware_enforces_limit_and_exempts_health():
+    """Requests over the limit get 429 with Retry-After; probes are exempt."""
+    client = _client(RateLimiter(FakeRedis()))
+
+    codes = [client.get("/api/v1/users/me").status_code for _ in range(4)]
+    rejected = client.get("/api/v1/users/me")
+
+    assert codes == [200, 200, 200, 429]
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert rejected.json()["status"] == "error"
+    assert client.get("/api/v1/health/server").status_code == 200
+
+
+def test_forwarded_for_header_does_not_change_the_identity():
+    """Rotating X-Forwarded-For does not buy a client a fresh limit."""
+    client = _client(RateLimiter(FakeRedis()))
+
+    codes = [
+        client.get(
+            "/api/v1/users/me", headers={"X-Forwarded-For": f"10.0.0.{n}"}
+        ).status_code
+        for n in range(4)
+    ]
+
+    assert codes == [200, 200, 200, 429]
+
+
+def test_redis_outage_fails_open():
+    """With Redis down, requests are allowed in fail-open mode."""
+    limiter = RateLimiter(FakeRedis(), fail_open=True)
+    limiter._script = AsyncMock(  # pylint: disable=protected-access
+        side_effect=redis.ConnectionError("down")
+    )
+
+    assert _client(limiter).get("/api/v1/users/me").status_code == 200
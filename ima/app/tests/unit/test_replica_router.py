@@ -0,0 +1,54 @@
+"""
+Unit tests for read-replica selection in app.db.session.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+from app.db.session import ReplicaRouter, ReplicaState
+
+primary = MagicMock(name="primary_sessionmaker")
+
+
+def _replica(name: str, lag: float = 0.0) -> ReplicaState:
+    return ReplicaState(
+        name=name,
+        engine=MagicMock(),
+        sessionmaker=MagicMock(name=f"{name}_sessionmaker"),
+        lag=lag,
+        checked_at=time.monotonic(),
+    )
+
+
+def _router(*replicas: ReplicaState) -> ReplicaRouter:
+    return ReplicaRouter(
+        list(replicas), max_lag=5.0, lag_check_interval=60.0, retry_after=30.0
+    )
+
+
+def test_round_robin_between_replicas():
+    """Healthy replicas are used in turn."""
+    r1, r2 = _replica("replica1"), _replica("replica2")
+    router = _router(r1, r2)
+
+    picked = [asyncio.run(router.pick()) for _ in range(4)]
+
+    assert picked == [r1, r2, r1, r2]
+
+
+def test_lagging_and_down_replicas_are_skipped():
+    """A lagging replica is skipped; with none usable reads hit the primary."""
+    lagging, down = _replica("replica1", lag=30.0), _replica("replica2")
+    down.down_until = time.monotonic() + 60
+    router = _router(lagging, down)
+
+    assert asyncio.run(router.pick()) is None
+    with patch("app.db.session.AsyncSessionLocal", new=primary):
+        assert asyncio.run(router.sessionmaker()) is primary
+
+
+def test_no_replicas_uses_primary():
+    """Without configured replicas every read uses the primary."""
+    with patch("app.db.session.AsyncSessionLocal", new=primary):
+        assert asyncio.run(_router().sessionmaker()) is primary
@@ -0,0 +1,53 @@
+"""
+Unit tests for the fast envelope encoder in app.core.response.
+"""
+
+import json
+
+from app.core.response import (
+    EnvelopeResponse,
+    ResponseModel,
+    encode_envelope,
+    success_response,
+)
+
+
+def test_encode_envelope_matches_response_model():
+    """The fast encoder produces the same JSON as ResponseModel.model_dump."""
+    expected = ResponseModel(
+        code=422,
+        status="error",
+        message="Invalid payload",
+        timestamp="2025-01-01T00:00:00Z",
+        details={"email": ["not a valid address"], "name": "é"},
+    ).model_dump()
+
+    body = encode_envelope(
+        422,
+        "error",
+        "Invalid payload",
+        details={"email": ["not a valid address"], "name": "é"},
+        timestamp="2025-01-01T00:00:00Z",
+    )
+
+    assert json.loads(body) == expected
+    assert list(json.loads(body)) == list(expected)
+
+
+def test_envelope_response_fills_missing_fields():
+    """Envelope dicts returned by routes get the full ResponseModel shape."""
+    response = EnvelopeResponse({"code": 200, "status": "success", "message": "ok"})
+
+    body = json.loads(response.body)
+
+    assert list(body) == ["code", "status", "message", "timestamp", "data", "details"]
+    assert body["timestamp"].endswith("Z")
+
+
+def test_success_response_uses_fast_path():
+    """success_response returns an EnvelopeResponse with the status code set."""
+    response = success_response(data={"id": 1}, message="Created")
+
+    assert isinstance(response, EnvelopeResponse)
+    assert response.status_code == 200
+    assert json.loads(response.body)["data"] == {"id": 1}
@@ -0,0 +1,61 @@
+"""
+Unit tests for production server sizing and options.
+"""
+
+from pathlib import Path
+
+from app.core.config import ServerSettings
+from app.core.server import cgroup_cpu_quota, uvicorn_options, worker_count
+
+
+def _settings(**values) -> ServerSettings:
+    return ServerSettings(_env_file=None, **values)  # type: ignore[call-arg]
+
+
+def test_cgroup_v2_quota(tmp_path: Path):
+    """cpu.max "quota period" is a CPU count; "max" means unlimited."""
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_quota(tmp_path) == 1.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+
+
+def test_cgroup_v1_quota(tmp_path: Path):
+    """v1 cfs quota/period is used when there is no cpu.max; -1 is unlimited."""
+    v1 = tmp_path / "cpu"
+    v1.mkdir()
+    (v1 / "cpu.cfs_period_us").write_text("100000\n")
+    (v1 / "cpu.cfs_quota_us").write_text("400000\n")
+    assert cgroup_cpu_quota(tmp_path) == 4.0
+
+    (v1 / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+    assert cgroup_cpu_quota(tmp_path / "missing") is None
+
+
+def test_worker_count_follows_quota():
+    """Fractional quotas round down, never below one worker or above the cap."""
+    cfg = _settings()
+
+    assert worker_count(cfg, cpus=1.5) == 1
+    assert worker_count(cfg, cpus=0.5) == 1
+    assert worker_count(cfg, cpus=8) == 8
+    assert worker_count(_settings(SERVER_MAX_WORKERS=4), cpus=8) == 4
+    assert worker_count(_settings(SERVER_WORKERS_PER_CPU=2), cpus=3) == 6
+    assert worker_count(_settings(WEB_CONCURRENCY=3), cpus=64) == 3
+
+
+def test_reload_is_opt_in():
+    """Production options never reload; --reload drops workers and tuning."""
+    cfg = _settings(SERVER_LIMIT_CONCURRENCY=100, SERVER_KEEP_ALIVE=65)
+
+    production = uvicorn_options(cfg, 8000, workers=2)
+    dev = uvicorn_options(cfg, 8000, reload=True)
+
+    assert "reload" not in production
+    assert production["workers"] == 2
+    assert production["limit_concurrency"] == 100
+    assert production["timeout_keep_alive"] == 65
+    assert production["lifespan"] == "on"
+    assert dev == {"host": cfg.host, "port": 8000, "reload": True}
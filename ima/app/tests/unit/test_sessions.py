@@ -0,0 +1,143 @@
+"""
+Unit tests for the Redis session store and session-bound access tokens.
+"""
+
+import asyncio
+from typing import Tuple
+
+import pytest
+from app.services.sessions import SessionStore
+from app.services.tokens import (
+    RevocationList,
+    StaticKeySet,
+    TokenIssuer,
+    TokenRevoked,
+    TokenVerifier,
+)
+from app.tests.fakes import FakeRedis
+
+UID = "6f1c2b9e-3d7a-4c55-9a3e-0f4b8c1d2e3f"
+SECRET = "unit-test-secret-with-enough-bytes-for-hs256"
+
+
+def _store() -> Tuple[SessionStore, FakeRedis]:
+    client = FakeRedis()
+    return SessionStore(client, ttl=60, prefix="sess"), client  # type: ignore[arg-type]
+
+
+def test_create_then_validate_is_one_mget():
+    """A token validates with a single MGET; the secret is never stored."""
+    store, client = _store()
+    session, token = asyncio.run(store.create(UID))
+    client.calls.clear()
+
+    assert asyncio.run(store.validate(token)) == session
+    assert client.calls == ["MGET"]
+    assert token.split(".")[-1] not in str(client.store)
+
+    forged = token[:-1] + ("A" if token[-1] != "A" else "B")
+    for bad in (forged, "garbage", "a.b.c.d", token + "." + token):
+        assert asyncio.run(store.validate(bad)) is None
+
+
+def test_revoke_all_is_one_incr_and_ends_every_session():
+    """Bumping the generation invalidates old tokens; new logins still work."""
+    store, client = _store()
+
+    async def scenario():
+        tokens = [(await store.create(UID))[1] for _ in range(3)]
+        client.calls.clear()
+        await store.revoke_all([UID])
+        assert client.calls.count("INCR") == 1
+        assert [await store.validate(t) for t in tokens] == [None] * 3
+        assert [await store.rotate(t) for t in tokens] == [None] * 3
+
+        session, token = await store.create(UID)
+        assert session.generation == 1
+        assert await store.validate(token) == session
+
+    asyncio.run(scenario())
+
+
+def test_rotate_replaces_token_and_replay_ends_session():
+    """The old refresh token stops working; reusing it revokes the session."""
+    store, _ = _store()
+
+    async def scenario():
+        session, old = await store.create(UID)
+        rotated = await store.rotate(old)
+        assert rotated is not None and rotated[0] == session
+        new = rotated[1]
+        assert await store.validate(old) is None
+        assert await store.validate(new) == session
+
+        assert await store.rotate(old) is None  # replay
+        assert await store.validate(new) is None
+
+    asyncio.run(scenario())
+
+
+def test_forged_rotation_leaves_the_victim_session_alone():
+    """A token with a victim's sid but not their secret changes nothing."""
+    store, client = _store()
+
+    async def scenario():
+        session, token = await store.create(UID)
+        other = "0b7a1d0e-5c2f-4e8a-8f6d-2a9c3e4b5d6f"
+        forgeries = [
+            f"{UID}.0.{session.sid}.guessed-secret",
+            f"{other}.0.{session.sid}.{token.split('.')[-1]}",
+        ]
+        client.calls.clear()
+        assert [await store.rotate(forged) for forged in forgeries] == [None] * 2
+        assert "DEL" not in client.calls
+        assert await store.validate(token) == session
+        assert await store.rotate(token) is not None
+
+    asyncio.run(scenario())
+
+
+def test_revoke_ends_only_that_session():
+    """Logging out one session leaves the user's other sessions alone."""
+    store, _ = _store()
+
+    async def scenario():
+        _, first = await store.create(UID)
+        _, second = await store.create(UID)
+        assert await store.revoke(first)
+        assert not await store.revoke(first)
+        assert await store.validate(first) is None
+        assert await store.validate(second) is not None
+
+    asyncio.run(scenario())
+
+
+def test_verifier_checks_session_and_revocation_in_one_mget():
+    """Session-bound access tokens stop verifying once the session ends."""
+    store, client = _store()
+    issuer = TokenIssuer(SECRET, "HS256", ttl=60)
+    verifier = TokenVerifier(
+        StaticKeySet(SECRET, "HS256"),
+        ["HS256"],
+        revocations=RevocationList(client),  # type: ignore[arg-type]
+        sessions=store,
+    )
+
+    async def scenario():
+        session, _ = await store.create(UID)
+        access = issuer.issue(UID, sid=session.sid, gen=session.generation)
+        client.calls.clear()
+        claims = await verifier.verify(access)
+        assert client.calls == ["MGET"]
+
+        await verifier.revocations.revoke(claims["jti"], claims["exp"])
+        with pytest.raises(TokenRevoked, match="Token"):
+            await verifier.verify(access)
+
+        other, _ = await store.create(UID)
+        access = issuer.issue(UID, sid=other.sid, gen=other.generation)
+        await store.revoke_all([UID])
+        with pytest.raises(TokenRevoked, match="Session"):
+            await verifier.verify(access)
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+"""
+Unit tests for import-time cost and the lifespan-owned resources.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+from app.core import redis_cache
+from app.db import session as db_session
+from app.main import app
+from fastapi.testclient import TestClient
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Cumulative `python -X importtime` budget for app.main, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# Only imported by the lifespan when tracing/JWKS are configured
+DEFERRED_MODULES = (
+    "httpx",
+    "opentelemetry.sdk.trace",
+    "opentelemetry.exporter.otlp.proto.http.trace_exporter",
+    "opentelemetry.instrumentation.fastapi",
+)
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "TRACING_MODE": "auto", "OTEL_EXPORTER_OTLP_ENDPOINT": ""},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_times_us() -> Dict[str, int]:
+    """Cumulative import time per module from ``-X importtime``."""
+    stderr = _run("import app.main", "-X", "importtime").stderr
+    times: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_app_main_within_budget():
+    """Importing the app stays within the cold-start budget."""
+    total_ms = _import_times_us()["app.main"] / 1000
+
+    assert total_ms < IMPORT_BUDGET_MS, f"import app.main took {total_ms:.0f} ms"
+
+
+def test_import_creates_no_resources():
+    """Importing the app opens nothing and skips optional heavy modules."""
+    code = (
+        "import sys, app.main\n"
+        "from app.core import redis_cache\n"
+        "from app.db import session\n"
+        "assert session.engine is None and session.AsyncSessionLocal is None\n"
+        "assert redis_cache.redis_client._client is None\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+
+    assert _run(code).stdout.strip() == ""
+
+
+def test_lifespan_creates_and_releases_resources():
+    """Startup fills app.state.resources; shutdown disposes of them."""
+    with TestClient(app):
+        resources = app.state.resources
+        assert resources.engine is db_session.engine is not None
+        assert db_session.AsyncSessionLocal is not None
+        assert resources.tracer_provider is None
+
+    assert db_session.engine is None
+    assert db_session.AsyncSessionLocal is None
+    assert redis_cache.redis_client._client is None
@@ -0,0 +1,193 @@
+"""
+Unit tests for tenant schema routing (app.db.tenancy, get_tenant_db).
+"""
+
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.core.config import settings
+from app.db.session import get_db, get_tenant_db
+from app.db.tenancy import (
+    InvalidTenant,
+    TenantDirectory,
+    UnknownTenant,
+    schema_for,
+    search_path,
+    set_search_path,
+)
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import greenlet_spawn
+
+
+class FakeDriver:
+    """asyncpg connection stand-in recording the statements it runs."""
+
+    def __init__(self, in_transaction: bool = False) -> None:
+        self.statements: List[str] = []
+        self.in_transaction = in_transaction
+
+    def is_in_transaction(self) -> bool:
+        return self.in_transaction
+
+    async def execute(self, sql: str) -> None:
+        self.statements.append(sql)
+
+
+def _pooled(driver: FakeDriver, info: Dict[str, Any]) -> MagicMock:
+    """A checked-out AsyncConnection sharing its pool entry's ``info``."""
+    conn = MagicMock(info=info)
+    conn.get_raw_connection = AsyncMock(
+        return_value=MagicMock(driver_connection=driver)
+    )
+    return conn
+
+
+def test_schema_for_validates_tenant_ids():
+    """Ids are lower-cased; anything that is not a plain identifier is rejected."""
+    assert schema_for(" Acme_2 ", "tenant_") == "tenant_acme_2"
+
+    for bad in (None, "", "_acme", 'acme"; DROP SCHEMA public; --', "a-b", "x" * 60):
+        with pytest.raises(InvalidTenant):
+            schema_for(bad, "tenant_")
+
+
+def test_search_path_only_set_when_connection_moves_tenant():
+    """A pooled connection keeps its tag across checkouts; SET runs on change."""
+    driver = FakeDriver()
+    info: Dict[str, Any] = {}
+    acme, globex = search_path("tenant_acme", "public"), search_path("tenant_globex")
+
+    sent = [
+        asyncio.run(set_search_path(_pooled(driver, info), path))
+        for path in (acme, acme, globex, globex, acme)
+    ]
+
+    assert sent == [True, False, True, False, True]
+    assert driver.statements[0] == 'SET search_path TO "tenant_acme", "public"'
+    assert len(driver.statements) == 3
+
+
+def test_search_path_refused_inside_transaction():
+    """A transactional SET could be rolled back under the tag."""
+    info: Dict[str, Any] = {}
+    conn = _pooled(FakeDriver(in_transaction=True), info)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(set_search_path(conn, search_path("tenant_acme")))
+    assert not info
+
+
+def test_directory_refetches_unknown_tenants_at_most_once_per_interval():
+    """A miss re-lists the schemas, throttled by min_refresh_interval."""
+    fetch = AsyncMock(return_value=["tenant_acme"])
+    directory = TenantDirectory(fetch, refresh_interval=300, min_refresh_interval=60)
+
+    async def scenario():
+        assert await directory.resolve("acme", "tenant_") == "tenant_acme"
+        for _ in range(3):
+            with pytest.raises(UnknownTenant):
+                await directory.resolve("globex", "tenant_")
+
+    asyncio.run(scenario())
+    assert fetch.await_count == 1
+
+
+def test_directory_keeps_known_tenants_when_refresh_fails():
+    """A failed re-list keeps serving the last known schemas."""
+    fetch = AsyncMock(side_effect=[["tenant_acme"], ConnectionError("db down")])
+    directory = TenantDirectory(fetch, refresh_interval=0, min_refresh_interval=0)
+
+    assert asyncio.run(directory.exists("tenant_acme"))
+    assert asyncio.run(directory.exists("tenant_acme"))
+    assert fetch.await_count == 2
+
+
+@contextmanager
+def _tenant_app(schemas: List[str]):
+    """App with a tenant-scoped route, tenancy on and a fake pool entry."""
+    app = FastAPI()
+    driver = FakeDriver()
+    info: Dict[str, Any] = {}
+
+    @app.get("/whoami")
+    async def whoami(db=Depends(get_tenant_db)) -> Dict[str, Any]:
+        return {"search_path": (await db.connection()).info.get("ima_search_path")}
+
+    session = MagicMock()
+    session.connection = AsyncMock(side_effect=lambda: _pooled(driver, info))
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    directory = TenantDirectory(
+        AsyncMock(return_value=schemas), refresh_interval=300, min_refresh_interval=60
+    )
+    with (
+        patch.object(settings.tenancy, "enabled", True),
+        patch("app.db.session.AsyncSessionLocal", new=factory),
+        patch("app.db.session.tenant_directory", new=directory),
+    ):
+        yield TestClient(app), driver
+
+
+def test_get_tenant_db_scopes_session_to_tenant_schema():
+    """Requests for the same tenant reuse the tagged connection without a SET."""
+    with _tenant_app(["tenant_acme"]) as (client, driver):
+        for _ in range(2):
+            response = client.get("/whoami", headers={"X-Tenant-ID": "acme"})
+            assert response.status_code == 200
+            assert response.json() == {"search_path": '"tenant_acme", "public"'}
+
+    assert driver.statements == ['SET search_path TO "tenant_acme", "public"']
+
+
+def test_get_tenant_db_rejects_missing_and_unknown_tenants():
+    """No header or a bad id is a 400, a tenant without a schema a 404."""
+    with _tenant_app(["tenant_acme"]) as (client, driver):
+        assert client.get("/whoami").status_code == 400
+        bad = client.get("/whoami", headers={"X-Tenant-ID": "acme;--"})
+        assert bad.status_code == 400
+        unknown = client.get("/whoami", headers={"X-Tenant-ID": "globex"})
+        assert unknown.status_code == 404
+
+    assert not driver.statements
+
+
+def test_get_db_resets_search_path_only_once_the_session_begins():
+    """No checkout up front; a tenant-tagged connection is moved back on begin."""
+    driver = FakeDriver()
+    info: Dict[str, Any] = {"ima_search_path": search_path("tenant_acme", "public")}
+    connection = MagicMock(info=info)
+    connection.connection.driver_connection = driver
+    session = AsyncSession()
+    session.connection = AsyncMock()  # type: ignore[method-assign]
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    def begin() -> None:
+        session.sync_session.dispatch.after_begin(
+            session.sync_session, None, connection
+        )
+
+    async def scenario() -> None:
+        dependency = get_db()
+        await dependency.__anext__()
+        session.connection.assert_not_awaited()
+        for _ in range(2):
+            await greenlet_spawn(begin)
+        await dependency.aclose()
+
+    with (
+        patch.object(settings.tenancy, "enabled", True),
+        patch.object(settings.tenancy, "search_path_scope", "session"),
+        patch("app.db.session.AsyncSessionLocal", new=factory),
+    ):
+        asyncio.run(scenario())
+
+    assert driver.statements == ['SET search_path TO "public"']
+    assert info["ima_search_path"] == '"public"'
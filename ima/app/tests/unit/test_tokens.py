@@ -0,0 +1,151 @@
+"""
+Unit tests for cached JWT verification, JWKS rotation and revocation.
+"""
+
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from app.services.tokens import (
+    InvalidToken,
+    JwksKeySet,
+    JwksUnavailable,
+    RevocationList,
+    StaticKeySet,
+    TokenRevoked,
+    TokenVerifier,
+)
+from app.tests.fakes import FakeRedis
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+SECRET = "test-secret-with-enough-bytes-for-hs256"
+
+
+def _hs_token(**claims) -> str:
+    payload = {"sub": "user-1", "exp": int(time.time()) + 60, **claims}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def _rsa_jwk(kid: str):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+    return key, {**public, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+def test_verified_tokens_are_served_from_cache():
+    """A second verification of the same token skips decoding."""
+    verifier = TokenVerifier(StaticKeySet(SECRET, "HS256"), ["HS256"])
+    token = _hs_token()
+
+    async def scenario():
+        first = await verifier.verify(token)
+        second = await verifier.verify(token)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["sub"] == second["sub"] == "user-1"
+    assert verifier.stats()["hits"] == 1
+    assert verifier.stats()["misses"] == 1
+
+
+def test_invalid_and_expired_tokens_are_rejected_and_not_cached():
+    """Bad signatures and expired tokens raise InvalidToken every time."""
+    verifier = TokenVerifier(StaticKeySet(SECRET, "HS256"), ["HS256"])
+    forged = jwt.encode(
+        {"exp": int(time.time()) + 60}, "other-secret-32-bytes-long-enough"
+    )
+    expired = _hs_token(exp=int(time.time()) - 10)
+
+    for token in (forged, expired, forged):
+        with pytest.raises(InvalidToken):
+            asyncio.run(verifier.verify(token))
+    assert verifier.stats()["entries"] == 0
+
+
+def test_jwks_refetches_on_unknown_kid():
+    """Key rotation: a token signed with a new kid triggers one JWKS refetch."""
+    old_key, old_jwk = _rsa_jwk("k1")
+    new_key, new_jwk = _rsa_jwk("k2")
+    published = {"keys": [old_jwk]}
+    fetches = []
+
+    async def fetch(url):
+        fetches.append(url)
+        return published
+
+    keys = JwksKeySet("https://issuer/jwks", 300, 0, fetch=fetch)
+    verifier = TokenVerifier(keys, ["RS256"])
+    exp = int(time.time()) + 60
+
+    async def scenario():
+        await keys.refresh()
+        old = jwt.encode({"exp": exp}, old_key, "RS256", headers={"kid": "k1"})
+        await verifier.verify(old)
+        published["keys"] = [old_jwk, new_jwk]
+        new = jwt.encode({"exp": exp}, new_key, "RS256", headers={"kid": "k2"})
+        await verifier.verify(new)
+        with pytest.raises(InvalidToken):
+            bogus = jwt.encode({"exp": exp}, new_key, "RS256", headers={"kid": "k3"})
+            await verifier.verify(bogus)
+
+    asyncio.run(scenario())
+    assert len(fetches) == 3
+
+
+def test_jwks_fetches_once_per_cooldown_for_unknown_kids_and_outages():
+    """Concurrent misses share one fetch; failed fetches wait out a cooldown."""
+    _, jwk = _rsa_jwk("k1")
+    fetches = []
+
+    async def fetch(url):
+        fetches.append(url)
+        await asyncio.sleep(0.01)
+        if len(fetches) > 1:
+            raise JwksUnavailable("endpoint down")
+        return {"keys": [jwk]}
+
+    keys = JwksKeySet("https://issuer/jwks", 300, 60, fetch=fetch)
+
+    async def lookup(kid):
+        try:
+            await keys.get(kid)
+        except InvalidToken:
+            return False
+        return True
+
+    async def burst(kid):
+        return await asyncio.gather(*(lookup(kid) for _ in range(5)))
+
+    async def scenario():
+        first, bogus = await burst("k1"), await burst("k9")
+        counts = [len(fetches)]
+        keys._retry_at = 0.0  # cooldown over: the outage is hit once, then waited out
+        outage = await burst("k9") + await burst("k9")
+        return first, bogus, outage, counts + [len(fetches)]
+
+    first, bogus, outage, counts = asyncio.run(scenario())
+    assert first == [True] * 5
+    assert bogus + outage == [False] * 15
+    assert counts == [1, 2]
+    assert asyncio.run(lookup("k1")) is True
+
+
+def test_revoked_tokens_are_rejected_even_when_cached():
+    """Revocation is checked with one EXISTS on every verification."""
+    fake = FakeRedis()
+    revocations = RevocationList(fake)
+    verifier = TokenVerifier(
+        StaticKeySet(SECRET, "HS256"), ["HS256"], revocations=revocations
+    )
+    token = _hs_token(jti="abc")
+
+    async def scenario():
+        await verifier.verify(token)
+        await revocations.revoke("abc", time.time() + 60)
+        with pytest.raises(TokenRevoked):
+            await verifier.verify(token)
+
+    asyncio.run(scenario())
+    assert fake.calls.count("EXISTS") == 2
@@ -0,0 +1,70 @@
+"""
+Unit tests for the sampling profile in app.core.tracing.
+"""
+
+from app.core.config import TracingSettings
+from app.core.tracing import TailSamplingSpanProcessor, build_sampler, init_tracing
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+
+
+def _tracer(ratio: float, slow_threshold_ms: float = 10_000):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=build_sampler(ratio, tail_sampling=True))
+    provider.add_span_processor(
+        TailSamplingSpanProcessor(
+            SimpleSpanProcessor(exporter), slow_threshold_ms, max_traces=16
+        )
+    )
+    return provider.get_tracer("test"), exporter
+
+
+def test_unsampled_healthy_traces_are_dropped():
+    """Below the ratio, a fast successful trace is never exported."""
+    tracer, exporter = _tracer(ratio=0.0)
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("db"):
+            pass
+
+    assert exporter.get_finished_spans() == ()
+
+
+def test_unsampled_traces_with_errors_are_exported_whole():
+    """An error anywhere in the trace keeps all of its spans."""
+    tracer, exporter = _tracer(ratio=0.0)
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("db") as child:
+            child.set_status(Status(StatusCode.ERROR))
+
+    spans = exporter.get_finished_spans()
+    assert sorted(span.name for span in spans) == ["db", "request"]
+    assert all(span.context.trace_flags.sampled for span in spans)
+
+
+def test_slow_traces_are_exported():
+    """A root span longer than the threshold keeps the trace."""
+    tracer, exporter = _tracer(ratio=0.0, slow_threshold_ms=0)
+    with tracer.start_as_current_span("request"):
+        pass
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["request"]
+
+
+def test_head_sampled_traces_pass_through():
+    """Traces sampled by the ratio are exported as usual."""
+    tracer, exporter = _tracer(ratio=1.0)
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("db"):
+            pass
+
+    assert len(exporter.get_finished_spans()) == 2
+
+
+def test_off_mode_installs_nothing():
+    """Without an endpoint, auto mode leaves tracing disabled."""
+    config = TracingSettings(TRACING_MODE="auto")  # type: ignore[call-arg]
+    assert init_tracing(otlp_endpoint=None, config=config) is None
@@ -0,0 +1,118 @@
+"""
+Unit tests for the streaming user export (app.services.user_export).
+"""
+
+import asyncio
+import csv
+import importlib
+import io
+import json
+import uuid
+from datetime import datetime
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+from app.api.v1.users import router as users_router
+from app.db.users.models import UserRole
+from app.main import app
+from app.services.user_export import FIELDS, encode_csv, encode_ndjson, export_users
+from fastapi.testclient import TestClient
+
+# The package re-exports the APIRouter under the module's name
+ROUTER_MODULE = importlib.import_module("app.api.v1.users.router")
+
+ROW = (
+    uuid.UUID("6f1c2b9e-3d7a-4c55-9a3e-0f4b8c1d2e3f"),
+    "alice",
+    "alice@example.com",
+    "Alice",
+    None,
+    UserRole.ADMIN,
+    True,
+    None,
+    False,
+    datetime(2026, 10, 18, 12, 30),
+)
+
+
+class FakeCursor:
+    """``crud.stream_users`` stand-in: ``partitions`` fetches, then closed."""
+
+    def __init__(self, partitions: int, db_closed: Optional[List[bool]] = None) -> None:
+        self.partitions = partitions
+        self.fetched = 0
+        self.closed = False
+        self.db_closed = db_closed if db_closed is not None else [False]
+
+    async def stream_users(self, db: Any, fetch_size: int, active_only: bool = False):
+        try:
+            for _ in range(self.partitions):
+                assert not self.db_closed[0], "session closed while streaming"
+                self.fetched += 1
+                yield [ROW] * fetch_size
+        finally:
+            self.closed = True
+
+
+def test_rows_encode_to_ndjson_and_csv():
+    """Both formats carry the public columns with ISO timestamps and role values."""
+    record = json.loads(encode_ndjson([ROW]))
+    assert list(record) == FIELDS
+    assert record["uid"] == str(ROW[0]) and record["role"] == "admin"
+    assert record["created_at"].startswith("2026-10-18T12:30")
+
+    rows = list(csv.reader(io.StringIO(encode_csv([ROW], header=True).decode())))
+    assert rows[0] == FIELDS
+    assert rows[1][FIELDS.index("role")] == "admin"
+    assert rows[1][FIELDS.index("last_name")] == ""
+    assert rows[1][FIELDS.index("created_at")] == "2026-10-18T12:30:00"
+
+
+def test_export_stops_and_closes_cursor_when_client_disconnects():
+    """No fetch happens after the client is gone; the cursor is released."""
+    cursor = FakeCursor(partitions=100)
+    checks = iter([False, False, True])
+
+    async def disconnected() -> bool:
+        return next(checks)
+
+    async def scenario() -> List[bytes]:
+        body = export_users(None, "ndjson", 10, disconnected)  # type: ignore[arg-type]
+        return [chunk async for chunk in body]
+
+    with patch("app.db.users.crud.stream_users", new=cursor.stream_users):
+        chunks = asyncio.run(scenario())
+
+    assert len(chunks) == 2 and chunks[0].count(b"\n") == 10
+    assert cursor.fetched == 3 and cursor.closed
+
+
+def test_export_endpoint_streams_while_the_session_is_open():
+    """The body opens and closes its own read session; one chunk per fetch."""
+    db_closed = [False]
+    cursor = FakeCursor(partitions=3, db_closed=db_closed)
+
+    @asynccontextmanager
+    async def read_session():
+        try:
+            yield object()
+        finally:
+            db_closed[0] = True
+
+    permission = users_router.dependencies[0].dependency
+    app.dependency_overrides[permission] = lambda: {"sub": str(ROW[0])}
+    try:
+        with (
+            patch("app.db.users.crud.stream_users", new=cursor.stream_users),
+            patch("app.core.config.settings.exports.fetch_size", 4),
+            patch.object(ROUTER_MODULE, "read_session", read_session),
+        ):
+            response = TestClient(app).get("/api/v1/users/export?format=csv")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert len(response.text.splitlines()) == 1 + 3 * 4
+    assert cursor.closed and db_closed[0]
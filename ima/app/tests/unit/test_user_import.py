@@ -0,0 +1,228 @@
+"""
+Unit tests for the streaming bulk user import (app.services.user_import).
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import AbstractSet, Any, AsyncIterator, Dict, List, Sequence, Set, Tuple
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from app.db.users import crud
+from app.services.email_filter import email_filter
+from app.services.passwords import PasswordHasherOverloaded
+from app.services.user_import import (
+    UNUSABLE_PASSWORD,
+    ImportFailed,
+    ImportProgress,
+    ImportReport,
+    UserImporter,
+    csv_records,
+    ndjson_records,
+)
+from app.tests.fakes import FakeRedis
+
+EMAIL = crud.COPY_COLUMNS.index("email")
+PASSWORD = crud.COPY_COLUMNS.index("hashed_password")
+
+
+async def _chunks(body: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+async def _collect(records: AsyncIterator[Any]) -> List[Any]:
+    return [record async for record in records]
+
+
+def _parse(parser: Any, body: bytes, size: int = 7, limit: int = 1024) -> List[Any]:
+    return asyncio.run(_collect(parser(_chunks(body, size), limit)))
+
+
+def test_ndjson_records_survive_chunk_boundaries():
+    """Lines split across chunks are rejoined; bad lines become row errors."""
+    body = (
+        b'{"username": "a", "email": "a@example.com"}\r\n'
+        b"\n"
+        b"{not json}\n"
+        b"[1, 2]\n"
+        b'{"username": "b", "email": "b@example.com"}'
+    )
+
+    records = _parse(ndjson_records, body)
+
+    assert [line for line, _ in records] == [1, 3, 4, 5]
+    assert records[0][1] == {"username": "a", "email": "a@example.com"}
+    assert records[1][1].startswith("invalid JSON")
+    assert records[2][1] == "expected a JSON object"
+
+
+def test_csv_records_handle_quotes_headers_and_empty_cells():
+    """Quoted newlines stay in one record; empty cells fall back to defaults."""
+    body = (
+        "\ufeffusername,email,last_name\n"
+        'alice,alice@example.com,"Liddell,\nof Wonderland"\n'
+        "bob,bob@example.com,\n"
+        "carol,carol@example.com\n"
+    ).encode()
+
+    records = _parse(csv_records, body, size=5)
+
+    assert records == [
+        (
+            2,
+            {
+                "username": "alice",
+                "email": "alice@example.com",
+                "last_name": "Liddell,\nof Wonderland",
+            },
+        ),
+        (4, {"username": "bob", "email": "bob@example.com"}),
+        (5, "expected 3 fields, got 2"),
+    ]
+
+
+def test_overlong_line_fails_the_import():
+    """A line without a newline cannot grow the buffer without bound."""
+    with pytest.raises(ImportFailed, match="Line 2"):
+        _parse(ndjson_records, b"{}\n" + b"x" * 100, size=10, limit=50)
+
+
+class FakePasswords:
+    """Password pool stand-in with deterministic 'hashes'."""
+
+    import_workers = 2
+
+    def __init__(self, overloaded: bool = False) -> None:
+        self.overloaded = overloaded
+        self.jobs: List[List[str]] = []
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        if self.overloaded:
+            raise PasswordHasherOverloaded("busy")
+        self.jobs.append(list(passwords))
+        return [f"hashed:{p}" for p in passwords]
+
+
+class FakeStaging:
+    """The crud staging-table functions over in-memory rows."""
+
+    def __init__(self, registered: AbstractSet[str]) -> None:
+        self.registered = set(registered)
+        self.rows: List[Tuple[Any, ...]] = []
+        self.copies = 0
+        self.inserted: Set[int] = set()
+        self.filtered: List[str] = []
+
+    async def create_import_table(self, db: Any) -> None:
+        self.rows = []
+
+    async def copy_users(
+        self, db: Any, records: Any, table: str, columns: Sequence[str]
+    ) -> int:
+        assert table == crud.IMPORT_TABLE and tuple(columns) == crud.IMPORT_COLUMNS
+        records = list(records)
+        self.rows.extend(records)
+        self.copies += 1
+        return len(records)
+
+    async def merge_import_table(self, db: Any) -> List[Tuple[Any, str]]:
+        created = []
+        for row in sorted(self.rows, key=lambda row: row[-1]):
+            email = row[EMAIL].lower()
+            if email not in self.registered:
+                self.registered.add(email)
+                self.inserted.add(row[-1])
+                created.append((row[0], row[EMAIL]))
+        return created
+
+    async def add_to_filter(self, *emails: str) -> None:
+        self.filtered.extend(emails)
+
+    async def import_conflicts(self, db: Any, limit: int) -> List[int]:
+        return sorted(row[-1] for row in self.rows if row[-1] not in self.inserted)[
+            :limit
+        ]
+
+
+@contextmanager
+def _importer(passwords: FakePasswords, registered: AbstractSet[str] = frozenset()):
+    staging, client, db = FakeStaging(registered), FakeRedis(), AsyncMock()
+    db.info = {}
+    importer = UserImporter(
+        db,
+        ImportReport("job-1"),
+        ImportProgress(client, prefix="imp", ttl=60),  # type: ignore[arg-type]
+        passwords,  # type: ignore[arg-type]
+        batch_size=2,
+        queue_depth=1,
+        max_errors=10,
+    )
+    with (
+        patch.multiple(
+            "app.db.users.crud",
+            create_import_table=staging.create_import_table,
+            copy_users=staging.copy_users,
+            merge_import_table=staging.merge_import_table,
+            import_conflicts=staging.import_conflicts,
+        ),
+        patch.object(email_filter, "add", staging.add_to_filter),
+    ):
+        yield importer, staging, client, db
+
+
+def _ndjson(*rows: Dict[str, Any]) -> bytes:
+    return b"\n".join(json.dumps(row).encode() for row in rows)
+
+
+def test_import_stages_batches_merges_and_reports_rows():
+    """Valid rows are copied batch by batch; skipped and bad rows are reported."""
+    body = _ndjson(
+        {"username": "a", "email": "a@example.com", "password": "first secret"},
+        {"username": "b", "email": "taken@example.com"},
+        {"username": "c", "email": "not-an-email"},
+        {"username": "d", "email": "A@example.com", "role": "moderator"},
+        {"username": "e", "email": "e@example.com", "hashed_password": "$argon2id$x"},
+    )
+    passwords = FakePasswords()
+
+    with _importer(passwords, registered={"taken@example.com"}) as (
+        importer,
+        staging,
+        client,
+        db,
+    ):
+        records = ndjson_records(_chunks(body, 16), 1024)
+        report = asyncio.run(importer.run(records))
+
+    assert (report.status, report.rows, report.invalid) == ("done", 5, 1)
+    assert (report.staged, report.imported, report.skipped) == (4, 2, 2)
+    assert [e["line"] for e in report.errors] == [2, 3, 4]
+    assert report.errors[1]["error"].startswith("email:")
+    assert staging.copies == 3
+    stored = {row[EMAIL]: row[PASSWORD] for row in staging.rows}
+    assert stored["a@example.com"] == "hashed:first secret"
+    assert stored["taken@example.com"] == UNUSABLE_PASSWORD
+    assert stored["e@example.com"] == "$argon2id$x"
+    assert passwords.jobs == [["first secret"]]
+    assert staging.filtered == ["a@example.com", "e@example.com"]
+    db.commit.assert_awaited_once()
+    saved = json.loads(asyncio.run(client.get("imp:job-1")))
+    assert saved["status"] == "done" and len(saved["errors"]) == 3
+
+
+def test_failed_import_is_not_committed_and_saved_as_failed():
+    """An overloaded password pool aborts the whole import."""
+    body = _ndjson(
+        *({"username": f"u{n}", "email": f"u{n}@example.com"} for n in range(4)),
+        {"username": "p", "email": "p@example.com", "password": "some secret"},
+    )
+
+    with _importer(FakePasswords(overloaded=True)) as (importer, _, client, db):
+        with pytest.raises(PasswordHasherOverloaded):
+            asyncio.run(importer.run(ndjson_records(_chunks(body, 64), 1024)))
+
+    db.commit.assert_not_awaited()
+    saved = json.loads(asyncio.run(client.get("imp:job-1")))
+    assert saved["status"] == "failed" and saved["imported"] == 0
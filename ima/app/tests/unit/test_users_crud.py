@@ -0,0 +1,106 @@
+"""
+Unit tests for the users repository (no database required).
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.db.users import crud
+from app.db.users.models import UserRole
+
+
+def _rows(count: int):
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "uid": uuid.uuid4(),
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "first_name": None,
+            "last_name": None,
+            "role": UserRole.USER,
+            "is_active": True,
+            "is_verified": False,
+            "is_superuser": False,
+            "created_at": start + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def _session(rows) -> AsyncMock:
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    db = AsyncMock()
+    db.execute.return_value = result
+    return db
+
+
+def test_cursor_round_trip():
+    """Cursors decode back to the (created_at, uid) they were built from."""
+    created_at, uid = datetime(2025, 5, 1, 12, 30, 0, 123456), uuid.uuid4()
+
+    assert crud.decode_cursor(crud.encode_cursor(created_at, uid)) == (created_at, uid)
+
+
+def test_list_users_returns_next_cursor_when_more_rows():
+    """One extra row is fetched to detect a following page."""
+    rows = _rows(3)
+
+    page = asyncio.run(crud.list_users(_session(rows), limit=2))
+
+    assert [user.username for user in page.items] == ["user0", "user1"]
+    assert crud.decode_cursor(page.next_cursor) == (
+        rows[1]["created_at"],
+        rows[1]["uid"],
+    )
+
+
+def test_list_users_last_page_has_no_cursor():
+    """The final page carries no cursor."""
+    page = asyncio.run(crud.list_users(_session(_rows(2)), limit=2))
+
+    assert page.next_cursor is None
+
+
+def test_bulk_update_without_changes_is_a_no_op():
+    """No statement is sent when there is nothing to change."""
+    db = AsyncMock()
+
+    assert asyncio.run(crud.bulk_update_users(db, [uuid.uuid4()])) == []
+    db.execute.assert_not_awaited()
+
+
+def test_updated_users_are_evicted_only_after_commit():
+    """Cached lookups, keyed on the lowercased email, are evicted post-commit."""
+    uid, calls = uuid.uuid4(), []
+    result = MagicMock()
+    result.all.return_value = [(uid, "Mixed@Example.com")]
+    db = AsyncMock()
+    db.info = {}
+    db.execute.return_value = result
+    db.commit.side_effect = lambda: calls.append("commit")
+
+    async def delete(*keys):
+        calls.append(set(keys))
+
+    async def scenario():
+        with patch.object(crud.cache, "delete", delete):
+            await crud.bulk_update_users(db, [uid], role=UserRole.MODERATOR)
+            assert calls == []
+            await crud.commit(db)
+
+    asyncio.run(scenario())
+
+    assert calls == [
+        "commit",
+        {
+            crud.cache.key_for_call(crud.get_user_by_uid, (None, uid), {}),
+            crud.cache.key_for_call(
+                crud.get_user_by_email, (None, "mixed@example.com"), {}
+            ),
+        },
+    ]
+    assert db.info == {}
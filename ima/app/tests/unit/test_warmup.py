@@ -0,0 +1,92 @@
+"""
+Unit tests for the startup warm-up and readiness state.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from app.core import state as app_state
+from app.core.warmup import warm_database, warm_redis, warm_up
+from app.tests.fakes import FakeRedis
+
+
+class _Conn:
+    def __init__(self, engine: "_Engine") -> None:
+        self.engine = engine
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+        self.engine.open -= 1
+
+
+class _Connecting:
+    def __init__(self, engine: "_Engine") -> None:
+        self.engine = engine
+
+    async def start(self) -> _Conn:
+        await asyncio.sleep(0)
+        if self.engine.fail:
+            raise ConnectionRefusedError("refused")
+        self.engine.open += 1
+        self.engine.peak = max(self.engine.peak, self.engine.open)
+        conn = _Conn(self.engine)
+        self.engine.conns.append(conn)
+        return conn
+
+
+class _Engine:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.open = self.peak = 0
+        self.conns: list = []
+
+    def connect(self) -> _Connecting:
+        return _Connecting(self)
+
+
+def test_warm_database_opens_connections_together_and_primes_each():
+    """All connections are open at once, primed, then returned."""
+    engine = _Engine()
+    primed = []
+
+    async def prime(conn):
+        primed.append(conn)
+
+    with patch("app.core.warmup._prime", new=prime):
+        report = asyncio.run(warm_database(engine, 4))
+
+    assert engine.peak == 4
+    assert report["connections"] == 4
+    assert primed == engine.conns
+    assert all(conn.closed for conn in engine.conns)
+
+
+def test_warm_up_reports_failures_without_raising():
+    """A dependency that is down is reported; the other is still warmed."""
+    redis = FakeRedis()
+
+    report = asyncio.run(warm_up(_Engine(fail=True), redis, 2, 3))
+
+    assert "refused" in report["database"]["error"]
+    assert report["redis"]["connections"] == 3
+
+
+def test_ready_after_warm_up_or_timeout():
+    """Readiness flips once warm-up finishes, and also when it times out."""
+
+    async def slow(*_args, **_kwargs):
+        await asyncio.sleep(10)
+
+    async def run(warm):
+        state = app_state.AppState(engine=None, redis=None)  # type: ignore[arg-type]
+        with patch("app.core.state.warm_up", new=warm):
+            await app_state._warm_up(state)  # pylint: disable=protected-access
+        return state
+
+    done = asyncio.run(run(lambda *a, **k: warm_redis(FakeRedis(), 1)))
+    with patch.object(app_state.settings.warmup, "timeout", 0.01):
+        timed_out = asyncio.run(run(slow))
+
+    assert done.ready and done.warmup_report["connections"] == 1
+    assert timed_out.ready and timed_out.warmup_report == {"error": "timeout"}
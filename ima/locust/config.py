@@ -12,6 +12,10 @@ class Settings:
     USERNAME: str = os.getenv("LOCUST_USER", "perf_user")
     PASSWORD: str = os.getenv("LOCUST_PASS", "perf_pass")
 
+    # Pre-seeded user pool: {USERNAME}_{i}@{USER_POOL_DOMAIN}, i < USER_POOL_SIZE
+    USER_POOL_SIZE: int = int(os.getenv("LOCUST_USER_POOL_SIZE", "200"))
+    USER_POOL_DOMAIN: str = os.getenv("LOCUST_USER_POOL_DOMAIN", "perf.example.com")
+
     # Prometheus exporter port
     PROM_PORT: int = int(os.getenv("PROM_PORT", "8000"))
 
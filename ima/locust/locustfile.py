@@ -1,9 +1,13 @@
 from locust import events
+from locust.runners import WorkerRunner
 from prometheus_client import start_http_server, Summary, Counter
 from config import settings
 
-# Import scenarios
+# Import scenarios (traffic mix is set by each class's weight)
+from scenarios.auth_flow import AuthFlow
 from scenarios.health_flow import HealthFlow
+from scenarios.signup_flow import SignupFlow
+from scenarios.user_pool import seed_user_pool
 
 # Prometheus metrics
 REQUEST_LATENCY = Summary(
@@ -17,6 +21,9 @@ REQUEST_COUNT = Counter(
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
     start_http_server(settings.PROM_PORT)
+    # Seed once, from the master (or the single local process)
+    if not isinstance(environment.runner, WorkerRunner):
+        seed_user_pool(environment.host or settings.HOST)
 
 
 @events.request.add_listener
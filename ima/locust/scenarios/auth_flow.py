@@ -0,0 +1,60 @@
+import random
+
+from locust import HttpUser, between, task
+
+from scenarios.user_pool import random_credentials
+
+
+class AuthFlow(HttpUser):
+    """Returning users: log in, then mostly make authenticated reads."""
+
+    weight = 8
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        """Log in once as a random pool account."""
+        self.email, self.password = random_credentials()
+        self.token = None
+        self.login()
+
+    @task(3)
+    def login(self):
+        """POST /auth/login with valid credentials."""
+        with self.client.post(
+            "/api/v1/auth/login",
+            json={"email": self.email, "password": self.password},
+            name="POST /api/v1/auth/login",
+            catch_response=True,
+        ) as r:
+            if r.status_code != 200:
+                r.failure(f"Login failed {r.status_code}")
+                return
+            self.token = r.json()["data"]["access_token"]
+
+    @task(6)
+    def me(self):
+        """GET /auth/me with the current access token."""
+        if self.token is None:
+            return
+        with self.client.get(
+            "/api/v1/auth/me",
+            headers={"Authorization": f"Bearer {self.token}"},
+            name="GET /api/v1/auth/me",
+            catch_response=True,
+        ) as r:
+            if r.status_code != 200:
+                r.failure(f"Current user failed {r.status_code}")
+
+    @task(1)
+    def wrong_password(self):
+        """Failed logins cost a full hash too; 401 is the expected outcome."""
+        with self.client.post(
+            "/api/v1/auth/login",
+            json={"email": self.email, "password": f"wrong-{random.random()}"},
+            name="POST /api/v1/auth/login [invalid]",
+            catch_response=True,
+        ) as r:
+            if r.status_code == 401:
+                r.success()
+            else:
+                r.failure(f"Expected 401, got {r.status_code}")
@@ -4,6 +4,7 @@ from locust import HttpUser, task, between
 class HealthFlow(HttpUser):
     """Simple health check scenario for the IMA service."""
 
+    weight = 1
     wait_time = between(1, 2)
 
     @task
@@ -0,0 +1,42 @@
+import uuid
+
+from locust import HttpUser, between, task
+
+from config import settings
+
+
+class SignupFlow(HttpUser):
+    """New users registering, with the occasional duplicate attempt."""
+
+    weight = 1
+    wait_time = between(1, 3)
+
+    def _signup(self, email):
+        return self.client.post(
+            "/api/v1/auth/signup",
+            json={
+                "username": email.split("@", 1)[0],
+                "email": email,
+                "password": settings.PASSWORD,
+            },
+            name="POST /api/v1/auth/signup",
+            catch_response=True,
+        )
+
+    @task(9)
+    def signup(self):
+        """Register a brand-new account."""
+        email = f"signup_{uuid.uuid4().hex[:12]}@{settings.USER_POOL_DOMAIN}"
+        with self._signup(email) as r:
+            if r.status_code != 201:
+                r.failure(f"Signup failed {r.status_code}")
+
+    @task(1)
+    def duplicate_signup(self):
+        """Re-register a pool account; 409 is the expected outcome."""
+        email = f"{settings.USERNAME}_0@{settings.USER_POOL_DOMAIN}"
+        with self._signup(email) as r:
+            if r.status_code == 409:
+                r.success()
+            else:
+                r.failure(f"Expected 409, got {r.status_code}")
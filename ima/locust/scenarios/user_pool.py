@@ -0,0 +1,49 @@
+"""
+Pre-seeded pool of test accounts shared by the auth scenarios.
+
+The pool is created once per test run (``seed_user_pool``, called from the
+``test_start`` hook) through the public signup endpoint, so it works against
+any deployment. Already-registered accounts are fine: seeding is idempotent.
+"""
+
+import random
+from typing import List, Tuple
+
+import requests
+
+from config import settings
+
+
+def pool_credentials() -> List[Tuple[str, str]]:
+    """(email, password) of every pool account."""
+    return [
+        (f"{settings.USERNAME}_{i}@{settings.USER_POOL_DOMAIN}", settings.PASSWORD)
+        for i in range(settings.USER_POOL_SIZE)
+    ]
+
+
+def random_credentials() -> Tuple[str, str]:
+    """A random pool account."""
+    i = random.randrange(settings.USER_POOL_SIZE)
+    return f"{settings.USERNAME}_{i}@{settings.USER_POOL_DOMAIN}", settings.PASSWORD
+
+
+def seed_user_pool(host: str) -> int:
+    """Sign up every pool account; returns how many were newly created."""
+    created = 0
+    with requests.Session() as session:
+        for i, (email, password) in enumerate(pool_credentials()):
+            response = session.post(
+                f"{host}/api/v1/auth/signup",
+                json={
+                    "username": f"{settings.USERNAME}_{i}",
+                    "email": email,
+                    "password": password,
+                },
+                timeout=30,
+            )
+            if response.status_code == 201:
+                created += 1
+            elif response.status_code != 409:
+                response.raise_for_status()
+    return created
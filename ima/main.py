@@ -1,29 +1,35 @@
 """
 Entry point for the IMA FastAPI service.
 
-This module starts the FastAPI app using uvicorn. Host and port can be
-configured via the HOST and PORT environment variables.
+Serves in production mode by default: cgroup-aware worker count, uvloop
+and httptools, admission control and a graceful drain on SIGTERM (see
+``app.core.server``). Development reload is an explicit opt-in.
+
+Usage:
+    python main.py [--workers N] [--host 0.0.0.0] [--port 8000]
+    python main.py --reload
 """
 
-import os
+import argparse
 
-import uvicorn
+from app.core.server import serve
 
-from app.main import app
 
+def main() -> None:
+    """CLI entrypoint."""
+    parser = argparse.ArgumentParser(description="Run the IMA service.")
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="single-process development server with a file watcher",
+    )
+    parser.add_argument("--workers", type=int, help="override the worker count")
+    parser.add_argument("--host", help="bind address (default: HOST)")
+    parser.add_argument("--port", type=int, help="bind port (default: PORT)")
+    args = parser.parse_args()
 
-def get_env_var(name: str, default: str) -> str:
-    """Retrieve environment variable or return default."""
-    return os.getenv(name, default)
+    serve(reload=args.reload, workers=args.workers, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
-    host: str = get_env_var("HOST", "127.0.0.1")
-    port: int = int(get_env_var("PORT", "8000"))
-
-    uvicorn.run(
-        app,
-        host=host,
-        port=port,
-        reload=True,
-    )
+    main()
@@ -0,0 +1,217 @@
+"""
+SLO gate for Locust runs.
+
+Reads Locust results (the ``<prefix>_stats.csv`` written by ``--csv`` or the
+JSON written by ``--json``) and compares every endpoint listed in the
+baseline file against it:
+
+* p95 / p99 latency may not exceed the baseline by more than
+  ``tolerances.latency`` (relative),
+* throughput may not drop by more than ``tolerances.rps`` (relative),
+* error rate may not exceed the baseline by more than
+  ``tolerances.error_rate`` (absolute).
+
+Exits 1 on any regression (or an endpoint missing from the run), so it can
+gate a release pipeline. ``--update`` rewrites the baseline from the run.
+
+No baseline is shipped: numbers only compare on the same runner and target.
+A missing baseline fails the gate (exit 2): record one with ``--update`` on
+the runner, then keep it where the pipeline can fetch it
+(``LOCUST_BASELINE_URL`` in ``scripts/run_locust.sh``).
+
+Usage:
+    python scripts/assert_locust.py locust/reports/run_stats.csv
+    python scripts/assert_locust.py results.json --baseline locust/baseline.json
+    python scripts/assert_locust.py locust/reports/run_stats.csv --update
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "locust" / "baseline.json"
+DEFAULT_TOLERANCES = {"latency": 0.2, "rps": 0.2, "error_rate": 0.01}
+
+Stats = Dict[str, Dict[str, float]]
+
+
+def _error_rate(requests: float, failures: float) -> float:
+    return failures / requests if requests else 0.0
+
+
+def read_csv(path: Path) -> Stats:
+    """Per-endpoint stats from Locust's ``_stats.csv``."""
+    stats: Stats = {}
+    with path.open(newline="") as handle:
+        for row in csv.DictReader(handle):
+            requests = float(row["Request Count"])
+            stats[row["Name"]] = {
+                "requests": requests,
+                "p95_ms": float(row["95%"]),
+                "p99_ms": float(row["99%"]),
+                "rps": float(row["Requests/s"]),
+                "error_rate": _error_rate(requests, float(row["Failure Count"])),
+            }
+    return stats
+
+
+def _percentile(histogram: Dict[str, int], total: int, pct: float) -> float:
+    """Percentile from Locust's {rounded_ms: count} response-time histogram."""
+    target = total * pct / 100
+    seen = 0
+    for bucket in sorted(histogram, key=float):
+        seen += histogram[bucket]
+        if seen >= target:
+            return float(bucket)
+    return 0.0
+
+
+def read_json(path: Path) -> Stats:
+    """Per-endpoint stats from Locust's ``--json`` output."""
+    entries: List[Dict[str, Any]] = json.loads(path.read_text())
+    stats: Stats = {}
+    agg_hist: Dict[str, int] = {}
+    agg = {"requests": 0, "failures": 0, "start": float("inf"), "end": 0.0}
+    for entry in entries:
+        requests = entry["num_requests"]
+        duration = max(entry["last_request_timestamp"] - entry["start_time"], 1e-9)
+        histogram = {str(k): v for k, v in entry["response_times"].items()}
+        stats[entry["name"]] = {
+            "requests": float(requests),
+            "p95_ms": _percentile(histogram, requests, 95),
+            "p99_ms": _percentile(histogram, requests, 99),
+            "rps": requests / duration,
+            "error_rate": _error_rate(requests, entry["num_failures"]),
+        }
+        for bucket, count in histogram.items():
+            agg_hist[bucket] = agg_hist.get(bucket, 0) + count
+        agg["requests"] += requests
+        agg["failures"] += entry["num_failures"]
+        agg["start"] = min(agg["start"], entry["start_time"])
+        agg["end"] = max(agg["end"], entry["last_request_timestamp"])
+    if entries:
+        total = int(agg["requests"])
+        stats["Aggregated"] = {
+            "requests": float(total),
+            "p95_ms": _percentile(agg_hist, total, 95),
+            "p99_ms": _percentile(agg_hist, total, 99),
+            "rps": total / max(agg["end"] - agg["start"], 1e-9),
+            "error_rate": _error_rate(total, agg["failures"]),
+        }
+    return stats
+
+
+def read_stats(path: Path) -> Stats:
+    """Dispatch on the file type."""
+    return read_json(path) if path.suffix == ".json" else read_csv(path)
+
+
+def compare(current: Stats, baseline: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Return (report lines, regressions)."""
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get("tolerances", {})}
+    min_requests = baseline.get("min_requests", 0)
+    report: List[str] = []
+    regressions: List[str] = []
+
+    for name, base in baseline["endpoints"].items():
+        run = current.get(name)
+        if run is None:
+            regressions.append(f"{name}: missing from the run")
+            continue
+        if run["requests"] < min_requests:
+            regressions.append(
+                f"{name}: only {run['requests']:.0f} requests "
+                f"(need {min_requests} for a meaningful comparison)"
+            )
+            continue
+
+        checks = [
+            (
+                "p95_ms",
+                run["p95_ms"] > base["p95_ms"] * (1 + tolerances["latency"]),
+            ),
+            (
+                "p99_ms",
+                run["p99_ms"] > base["p99_ms"] * (1 + tolerances["latency"]),
+            ),
+            ("rps", run["rps"] < base["rps"] * (1 - tolerances["rps"])),
+            (
+                "error_rate",
+                run["error_rate"] > base["error_rate"] + tolerances["error_rate"],
+            ),
+        ]
+        for metric, failed in checks:
+            mark = "REGRESSION" if failed else "ok"
+            report.append(
+                f"{name:<40} {metric:<10} "
+                f"{base[metric]:>10.3f} -> {run[metric]:>10.3f}  {mark}"
+            )
+            if failed:
+                regressions.append(
+                    f"{name}: {metric} {run[metric]:.3f} vs baseline {base[metric]:.3f}"
+                )
+    return report, regressions
+
+
+def update_baseline(path: Path, current: Stats, names: List[str]) -> None:
+    """Rewrite the baseline's endpoint numbers from ``current``."""
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    baseline.setdefault("tolerances", DEFAULT_TOLERANCES)
+    baseline.setdefault("min_requests", 50)
+    names = names or list(baseline.get("endpoints", {})) or list(current)
+    baseline["endpoints"] = {
+        name: {
+            metric: round(current[name][metric], 4)
+            for metric in ("p95_ms", "p99_ms", "rps", "error_rate")
+        }
+        for name in names
+        if name in current
+    }
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def main() -> int:
+    """CLI entrypoint; returns the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("results", type=Path, help="Locust _stats.csv or JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update", action="store_true", help="write the run as the new baseline"
+    )
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        default=[],
+        help="endpoint to record with --update (default: those in the baseline)",
+    )
+    args = parser.parse_args()
+
+    current = read_stats(args.results)
+    if args.update:
+        update_baseline(args.baseline, current, args.endpoint)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(
+            f"No baseline at {args.baseline}: record one from a run on this "
+            "runner with --update (or set LOCUST_BASELINE_URL for run_locust.sh)",
+            file=sys.stderr,
+        )
+        return 2
+
+    report, regressions = compare(current, json.loads(args.baseline.read_text()))
+    print("\n".join(report))
+    if regressions:
+        print("\nSLO gate FAILED:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  - {regression}", file=sys.stderr)
+        return 1
+    print("\nSLO gate passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark login (argon2 verify) latency against password-pool size.
+
+Runs a closed loop of concurrent "logins" through PasswordService for each
+pool size and reports throughput, p50/p99 latency and the worst event-loop
+stall observed meanwhile (which should stay near zero: hashing never runs
+on the loop).
+
+Usage:
+    python scripts/bench_password_pool.py [--sizes 1,2,4,8] [--clients 32]
+        [--logins 256] [--json results.json]
+
+``bench_password_pool.json`` is a recorded run (host and cost parameters
+under ``meta``); re-record it when the cost parameters change.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import PasswordSettings  # noqa: E402
+from app.services.passwords import PasswordService  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+async def _loop_lag(stop: asyncio.Event, samples: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        samples.append(time.perf_counter() - start - 0.005)
+
+
+async def run(workers: int, clients: int, logins: int) -> Dict[str, float]:
+    """Benchmark one pool size."""
+    cfg = PasswordSettings()  # type: ignore[call-arg]
+    service = PasswordService(
+        workers=workers,
+        max_queue=logins,
+        time_cost=cfg.time_cost,
+        memory_cost=cfg.memory_cost,
+        parallelism=cfg.parallelism,
+    )
+    hashed = await service.hash("correct horse battery staple")
+    latencies: List[float] = []
+    per_client = max(logins // clients, 1)
+
+    async def client() -> None:
+        for _ in range(per_client):
+            start = time.perf_counter()
+            await service.verify(hashed, "correct horse battery staple")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    stop, lag = asyncio.Event(), []
+    lag_task = asyncio.create_task(_loop_lag(stop, lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+    service.shutdown()
+
+    return {
+        "workers": workers,
+        "logins_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_loop_stall_ms": round(max(lag, default=0.0) * 1000, 2),
+    }
+
+
+def main() -> None:
+    """CLI entrypoint."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=256)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    sizes = sorted({int(size) for size in args.sizes.split(",")})
+    results = [asyncio.run(run(size, args.clients, args.logins)) for size in sizes]
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} logins={args.logins}")
+    print("| workers | logins/s | p50 ms | p99 ms | max loop stall ms |")
+    print("|--------:|---------:|-------:|-------:|------------------:|")
+    for row in results:
+        print(
+            f"| {row['workers']} | {row['logins_per_s']} | {row['p50_ms']} "
+            f"| {row['p99_ms']} | {row['max_loop_stall_ms']} |"
+        )
+    if args.json:
+        cfg = PasswordSettings()  # type: ignore[call-arg]
+        meta = {
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "clients": args.clients,
+            "logins": args.logins,
+            "time_cost": cfg.time_cost,
+            "memory_cost": cfg.memory_cost,
+            "parallelism": cfg.parallelism,
+        }
+        payload = {"meta": meta, "results": results}
+        args.json.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
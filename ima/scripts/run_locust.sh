@@ -0,0 +1,44 @@
+#!/usr/bin/env bash
+# Run the Locust suite headless and gate the result against locust/baseline.json.
+# Without a local baseline, LOCUST_BASELINE_URL (a fixed location the pipeline
+# keeps the runner's baseline at) is fetched first; with neither the gate fails.
+# Record a baseline with --update and publish the file to that location.
+#
+# Usage:
+#   scripts/run_locust.sh [--standin] [extra assert_locust.py args, e.g. --update]
+#
+# --standin starts scripts/standin_server.py (app with in-memory Postgres and
+# Redis) on port 8001 and targets it; otherwise TARGET_HOST is used.
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+USERS="${USERS:-50}"
+SPAWN_RATE="${SPAWN_RATE:-10}"
+RUN_TIME="${RUN_TIME:-90s}"
+REPORT_PREFIX="${REPORT_PREFIX:-locust/reports/run}"
+
+if [[ "${1:-}" == "--standin" ]]; then
+  shift
+  export TARGET_HOST="http://127.0.0.1:8001"
+  python scripts/standin_server.py --port 8001 &
+  STANDIN_PID=$!
+  trap 'kill "$STANDIN_PID" 2>/dev/null || true' EXIT
+  for _ in $(seq 1 30); do
+    curl -fs "$TARGET_HOST/api/v1/health/server" >/dev/null && break
+    sleep 1
+  done
+fi
+TARGET_HOST="${TARGET_HOST:-http://localhost:8000}"
+
+BASELINE="locust/baseline.json"
+if [[ ! -f "$BASELINE" && -n "${LOCUST_BASELINE_URL:-}" ]]; then
+  curl -fsSL "$LOCUST_BASELINE_URL" -o "$BASELINE"
+fi
+
+mkdir -p "$(dirname "$REPORT_PREFIX")"
+locust -f locust/locustfile.py --headless \
+  -u "$USERS" -r "$SPAWN_RATE" -t "$RUN_TIME" \
+  --host "$TARGET_HOST" --csv "$REPORT_PREFIX" --only-summary
+
+python scripts/assert_locust.py "${REPORT_PREFIX}_stats.csv" "$@"